@@ -255,7 +255,8 @@ async def list_documents(
 async def get_entity_relationships(
     ctx: RunContext[AgentDependencies],
     entity_name: str,
-    depth: int = 2
+    depth: int = 2,
+    relationship_types: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Get all relationships for a specific entity in the knowledge graph.
@@ -267,13 +268,15 @@ async def get_entity_relationships(
     Args:
         entity_name: Name of the entity to explore (e.g., "Google", "OpenAI")
         depth: Maximum traversal depth for relationships (1-5)
+        relationship_types: Only follow these relationship names (e.g. ["WORKS_FOR"])
     
     Returns:
         Entity relationships and connected entities with relationship types
     """
     input_data = EntityRelationshipInput(
         entity_name=entity_name,
-        depth=depth
+        depth=max(1, min(depth, 5)),
+        relationship_types=relationship_types
     )
     
     return await get_entity_relationships_tool(input_data)
@@ -284,7 +287,9 @@ async def get_entity_timeline(
     ctx: RunContext[AgentDependencies],
     entity_name: str,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0
 ) -> List[Dict[str, Any]]:
     """
     Get the timeline of facts for a specific entity.
@@ -297,6 +302,8 @@ async def get_entity_timeline(
         entity_name: Name of the entity (e.g., "Microsoft", "AI")
         start_date: Start date in ISO format (YYYY-MM-DD), optional
         end_date: End date in ISO format (YYYY-MM-DD), optional
+        limit: Maximum number of facts to return (1-500)
+        offset: Number of newest facts to skip, for paging through long timelines
     
     Returns:
         Chronological list of facts about the entity with timestamps
@@ -304,7 +311,9 @@ async def get_entity_timeline(
     input_data = EntityTimelineInput(
         entity_name=entity_name,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        limit=max(1, min(limit, 500)),
+        offset=max(0, offset)
     )
     
     return await get_entity_timeline_tool(input_data)
\ No newline at end of file
@@ -24,11 +24,18 @@ from .db_utils import (
     close_database,
     create_session,
     get_session,
-    add_message,
+    queue_message,
     get_session_messages,
-    test_connection
+    list_session_messages,
+    decode_message_cursor,
+    encode_message_cursor,
+    test_connection,
+    db_pool,
+    count_documents,
+    decode_document_cursor,
+    encode_document_cursor
 )
-from .graph_utils import initialize_graph, close_graph, test_graph_connection
+from .graph_utils import initialize_graph, close_graph, test_graph_connection, graph_client
 from .models import (
     ChatRequest,
     ChatResponse,
@@ -83,6 +90,15 @@ async def lifespan(app: FastAPI):
         await initialize_database()
         logger.info("Database initialized")
         
+        # Serve sessions and conversation context from memory, invalidated by NOTIFY
+        await db_pool.session_cache.start()
+        
+        # Persist chat messages in batches off the response path (flushed on close)
+        db_pool.message_writer.start()
+        
+        # Monthly message partitions, expired session cleanup and retention
+        db_pool.maintenance.start()
+        
         # Initialize graph database
         await initialize_graph()
         logger.info("Graph database initialized")
@@ -152,19 +168,20 @@ async def get_or_create_session(request: ChatRequest) -> str:
 
 async def get_conversation_context(
     session_id: str,
-    max_messages: int = 10
+    max_messages: int = 6
 ) -> List[Dict[str, str]]:
     """
     Get recent conversation context.
     
     Args:
         session_id: Session ID
-        max_messages: Maximum number of messages to retrieve
+        max_messages: Number of most recent messages to retrieve (6 = last 3 turns)
     
     Returns:
         List of messages
     """
-    messages = await get_session_messages(session_id, limit=max_messages)
+    # The previous turn was just written; replicas may not have it yet
+    messages = await get_session_messages(session_id, limit=max_messages, read_your_writes=True)
     
     return [
         {
@@ -257,7 +274,7 @@ async def save_conversation_turn(
     metadata: Optional[Dict[str, Any]] = None
 ):
     """
-    Save a conversation turn to the database.
+    Queue a conversation turn for the database.
     
     Args:
         session_id: Session ID
@@ -266,7 +283,7 @@ async def save_conversation_turn(
         metadata: Optional metadata
     """
     # Save user message
-    await add_message(
+    await queue_message(
         session_id=session_id,
         role="user",
         content=user_message,
@@ -274,7 +291,7 @@ async def save_conversation_turn(
     )
     
     # Save assistant message
-    await add_message(
+    await queue_message(
         session_id=session_id,
         role="assistant",
         content=assistant_message,
@@ -315,7 +332,7 @@ async def execute_agent(
         if context:
             context_str = "\n".join([
                 f"{msg['role']}: {msg['content']}"
-                for msg in context[-6:]  # Last 3 turns
+                for msg in context
             ])
             full_prompt = f"Previous conversation:\n{context_str}\n\nCurrent question: {message}"
         
@@ -385,6 +402,17 @@ async def health_check():
         raise HTTPException(status_code=500, detail="Health check failed")
 
 
+@app.get("/metrics")
+async def metrics():
+    """Cache and performance metrics."""
+    return {
+        "graph_search_cache": graph_client.search_cache.stats(),
+        "neo4j_pool": graph_client.pool_stats(),
+        "postgres_pool": db_pool.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Non-streaming chat endpoint."""
@@ -437,12 +465,12 @@ async def chat_stream(request: ChatRequest):
                 if context:
                     context_str = "\n".join([
                         f"{msg['role']}: {msg['content']}"
-                        for msg in context[-6:]
+                        for msg in context
                     ])
                     full_prompt = f"Previous conversation:\n{context_str}\n\nCurrent question: {request.message}"
                 
-                # Save user message immediately
-                await add_message(
+                # Queue user message immediately
+                await queue_message(
                     session_id=session_id,
                     role="user",
                     content=request.message,
@@ -487,7 +515,7 @@ async def chat_stream(request: ChatRequest):
                     yield f"data: {json.dumps({'type': 'tools', 'tools': tools_data})}\n\n"
                 
                 # Save assistant response
-                await add_message(
+                await queue_message(
                     session_id=session_id,
                     role="assistant",
                     content=full_response,
@@ -528,7 +556,8 @@ async def search_vector(request: SearchRequest):
     try:
         input_data = VectorSearchInput(
             query=request.query,
-            limit=request.limit
+            limit=request.limit,
+            ef_search=request.ef_search
         )
         
         start_time = datetime.now()
@@ -581,7 +610,10 @@ async def search_hybrid(request: SearchRequest):
     try:
         input_data = HybridSearchInput(
             query=request.query,
-            limit=request.limit
+            limit=request.limit,
+            ef_search=request.ef_search,
+            fusion_method=request.fusion_method,
+            candidate_count=request.candidate_count
         )
         
         start_time = datetime.now()
@@ -605,18 +637,34 @@ async def search_hybrid(request: SearchRequest):
 @app.get("/documents")
 async def list_documents_endpoint(
     limit: int = 20,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
-    """List documents endpoint."""
+    """List documents endpoint (pass next_cursor back as cursor for the next page)."""
+    if cursor:
+        try:
+            decode_document_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        input_data = DocumentListInput(limit=limit, offset=offset)
+        input_data = DocumentListInput(limit=limit, offset=offset, cursor=cursor)
         documents = await list_documents_tool(input_data)
         
+        next_cursor = None
+        if len(documents) == limit:
+            last = documents[-1]
+            next_cursor = encode_document_cursor({
+                "created_at": last.created_at.isoformat(),
+                "id": last.id
+            })
+        
         return {
             "documents": documents,
-            "total": len(documents),
+            "total": await count_documents(),
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": next_cursor
         }
         
     except Exception as e:
@@ -641,6 +689,37 @@ async def get_session_info(session_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/sessions/{session_id}/messages")
+async def list_session_messages_endpoint(
+    session_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """Export session history oldest first (pass next_cursor back as cursor for the next page)."""
+    if cursor:
+        try:
+            decode_message_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        messages = await list_session_messages(session_id, limit=limit, cursor=cursor)
+        
+        next_cursor = None
+        if len(messages) == limit:
+            next_cursor = encode_message_cursor(messages[-1])
+        
+        return {
+            "messages": messages,
+            "limit": limit,
+            "next_cursor": next_cursor
+        }
+        
+    except Exception as e:
+        logger.error(f"Session message listing failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Exception handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
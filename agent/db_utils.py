@@ -4,66 +4,1326 @@ Database utilities for PostgreSQL connection and operations.
 
 import os
 import json
+import random
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+import base64
+import hashlib
+import time
+import re
+from typing import List, Dict, Any, Optional, Tuple, Set
 from datetime import datetime, timedelta, timezone
 from contextlib import asynccontextmanager
-from uuid import UUID
+from contextvars import ContextVar
+from uuid import UUID, uuid4
 import logging
+from logging.handlers import RotatingFileHandler
 
 import asyncpg
-from asyncpg.pool import Pool
+from asyncpg.pool import Pool, PoolConnectionProxy
+from asyncpg.prepared_stmt import PreparedStatement
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the json module is used without it
+    orjson = None
+
+from .cache import TTLCache
+from .metrics import QueryMetrics
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 
+def _json_dumps(value: Any) -> str:
+    """Encode a JSON/JSONB parameter (already serialized strings pass through)."""
+    if isinstance(value, str):
+        return value
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value)
+
+
+def _json_loads(value: Any) -> Any:
+    """Decode a JSON/JSONB column value."""
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+def _decode_json(value: Any) -> Any:
+    """Return a JSON column as Python data, decoding it if no codec did."""
+    if value is None:
+        return {}
+    if isinstance(value, (str, bytes)):
+        return _json_loads(value)
+    return value
+
+
+def _vector_encode(value: Any) -> str:
+    """Encode an embedding as pgvector text ('[1.0,2.0,3.0]')."""
+    if isinstance(value, str):
+        return value
+    return '[' + ','.join(map(str, value)) + ']'
+
+
+def _vector_decode(value: str) -> List[float]:
+    """Decode pgvector text into a list of floats."""
+    body = value.strip()[1:-1]
+    return [float(item) for item in body.split(',')] if body else []
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    """
+    Register JSON, JSONB and vector codecs on a new pool connection.
+    
+    Rows then carry decoded metadata and embeddings, and parameters accept
+    dicts and float lists directly.
+    """
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=_json_dumps,
+            decoder=_json_loads,
+            schema="pg_catalog"
+        )
+    
+    # pgvector may live in any schema (Supabase installs it in "extensions")
+    vector_schema = await conn.fetchval(
+        """
+        SELECT n.nspname
+        FROM pg_type t
+        JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE t.typname = 'vector'
+        LIMIT 1
+        """
+    )
+    if vector_schema:
+        await conn.set_type_codec(
+            "vector",
+            encoder=_vector_encode,
+            decoder=_vector_decode,
+            schema=vector_schema,
+            format="text"
+        )
+
+
+class PreparedConnection(asyncpg.Connection):
+    """
+    Connection that keeps hot statements prepared for its lifetime.
+    
+    asyncpg's statement cache is an LRU shared with ad-hoc queries; hot
+    statements prepared here are never evicted and skip the cache lookup.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prepared: Dict[str, PreparedStatement] = {}
+    
+    async def prepared(self, query: str) -> PreparedStatement:
+        """
+        Get the prepared statement for a query, preparing it on first use.
+        
+        Args:
+            query: SQL query
+        
+        Returns:
+            Prepared statement
+        """
+        statement = self._prepared.get(query)
+        if statement is None:
+            statement = await self.prepare(query)
+            self._prepared[query] = statement
+        return statement
+    
+    async def run_prepared(self, method: str, query: str, *args) -> Any:
+        """
+        Run a query through its prepared statement.
+        
+        A statement invalidated by a schema change (e.g. a recreated search
+        function) is prepared again once, unless inside a transaction.
+        
+        Args:
+            method: PreparedStatement method ("fetch", "fetchrow" or "fetchval")
+            query: SQL query
+            *args: Query parameters
+        
+        Returns:
+            Result of the statement method
+        """
+        try:
+            statement = await self.prepared(query)
+            return await getattr(statement, method)(*args)
+        except (asyncpg.InvalidCachedStatementError, asyncpg.OutdatedSchemaCacheError):
+            self._prepared.pop(query, None)
+            if self.is_in_transaction():
+                raise
+            statement = await self.prepared(query)
+            return await getattr(statement, method)(*args)
+
+
+def _uses_prepared_statements(conn: asyncpg.Connection) -> bool:
+    """Check whether a (pooled) connection is a PreparedConnection."""
+    # asyncpg's isinstance() matches any connection against any Connection
+    # subclass, so inspect the class of the underlying connection instead
+    raw = conn._con if isinstance(conn, PoolConnectionProxy) else conn
+    return PreparedConnection in type(raw).__mro__
+
+
+# Transaction-local settings (name, value) applied by _search_connection, so a
+# slow search can be re-run for EXPLAIN with the settings it actually ran with
+_query_settings: ContextVar[Tuple[Tuple[str, str], ...]] = ContextVar("query_settings", default=())
+
+
+async def _run_query(conn: asyncpg.Connection, method: str, query: str, args: Tuple, name: str) -> Any:
+    """Run a named query (prepared when supported), recording latency and slow queries."""
+    start = time.perf_counter()
+    with db_pool.metrics.time_query(name):
+        if _uses_prepared_statements(conn):
+            result = await conn.run_prepared(method, query, *args)
+        else:
+            result = await getattr(conn, method)(query, *args)
+    
+    db_pool.slow_queries.observe(name, query, args, time.perf_counter() - start, _query_settings.get())
+    return result
+
+
+async def _fetch(conn: asyncpg.Connection, query: str, *args, name: str = "query") -> List[asyncpg.Record]:
+    """Run a named hot query, through its prepared statement when the connection supports it."""
+    return await _run_query(conn, "fetch", query, args, name)
+
+
+async def _fetchrow(conn: asyncpg.Connection, query: str, *args, name: str = "query") -> Optional[asyncpg.Record]:
+    """Fetch one row for a named query, through a prepared statement when supported."""
+    return await _run_query(conn, "fetchrow", query, args, name)
+
+
+async def _fetchval(conn: asyncpg.Connection, query: str, *args, name: str = "query") -> Any:
+    """Fetch one value for a named query, through a prepared statement when supported."""
+    return await _run_query(conn, "fetchval", query, args, name)
+
+
+# Queries that only read, so EXPLAIN ANALYZE may safely run them again
+EXPLAINABLE_QUERIES = frozenset({
+    "get_session",
+    "get_session_messages",
+    "get_document",
+    "list_documents",
+    "count_documents",
+    "vector_search",
+    "hybrid_search",
+    "product_search",
+    "get_document_chunks"
+})
+
+# Queries that call plpgsql functions; a plain EXPLAIN only shows a Function
+# Scan, so their nested statements are captured with auto_explain instead
+FUNCTION_QUERIES = frozenset({
+    "vector_search",
+    "hybrid_search",
+    "product_search",
+    "get_document_chunks"
+})
+
+# Transaction-local auto_explain settings that report every nested statement
+# of a function call to the client as a NOTICE
+AUTO_EXPLAIN_SETTINGS = (
+    ("auto_explain.log_min_duration", "0"),
+    ("auto_explain.log_analyze", "on"),
+    ("auto_explain.log_buffers", "on"),
+    ("auto_explain.log_nested_statements", "on"),
+    ("auto_explain.log_format", "json"),
+    ("auto_explain.log_level", "notice"),
+    ("client_min_messages", "notice")
+)
+
+_AUTO_EXPLAIN_MESSAGE = re.compile(r"duration: ([\d.]+) ms\s+plan:\s*(\{.*\})\s*$", re.DOTALL)
+
+
+def _describe_param(value: Any) -> str:
+    """Describe a query parameter by type and size without its value."""
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        return f"array[{len(value)}]"
+    if isinstance(value, str):
+        return f"text[{len(value)}]"
+    if isinstance(value, dict):
+        return f"json[{len(value)}]"
+    return type(value).__name__
+
+
+def _summarize_plan(explain: Dict[str, Any], execution_ms: Optional[float] = None) -> Dict[str, Any]:
+    """Summarize one EXPLAIN or auto_explain (FORMAT JSON) result."""
+    plan = explain["Plan"]
+    stats = {"seq_scans": []}
+    _collect_plan_stats(plan, stats)
+    return {
+        "execution_ms": explain.get("Execution Time", execution_ms),
+        "planning_ms": explain.get("Planning Time"),
+        "shared_hit_blocks": plan.get("Shared Hit Blocks"),
+        "shared_read_blocks": plan.get("Shared Read Blocks"),
+        "seq_scans": stats["seq_scans"],
+        "plan": plan
+    }
+
+
+def _collect_plan_stats(plan: Dict[str, Any], stats: Dict[str, Any]):
+    """Collect sequential scans from an EXPLAIN (FORMAT JSON) plan tree."""
+    if plan.get("Node Type") == "Seq Scan":
+        stats["seq_scans"].append({
+            "relation": plan.get("Relation Name"),
+            "rows": plan.get("Actual Rows"),
+            "rows_removed_by_filter": plan.get("Rows Removed by Filter", 0)
+        })
+    for child in plan.get("Plans", []):
+        _collect_plan_stats(child, stats)
+
+
+class SlowQueryMonitor:
+    """
+    Opt-in log of queries slower than a threshold.
+    
+    Each slow query is logged with a fingerprint of its normalized SQL and of
+    its parameters (values are never logged). A sample of slow read-only
+    queries is re-run under EXPLAIN (ANALYZE, BUFFERS) on a read connection
+    (a replica when configured), in the background, and the plan summary -
+    including sequential scans - is logged with it. The re-run replays the
+    transaction-local settings of the original query (e.g. hnsw.ef_search).
+    
+    Search queries call plpgsql functions, whose plan under EXPLAIN is a single
+    Function Scan. For those the query is run with auto_explain loaded on the
+    connection and every nested statement's plan is collected from the NOTICEs
+    it reports. Where auto_explain cannot be loaded, the plain EXPLAIN is
+    logged with an explain_note.
+    """
+    
+    def __init__(self, pool: "DatabasePool"):
+        """
+        Initialize monitor from DB_SLOW_QUERY_* settings.
+        
+        Args:
+            pool: Pool that provides connections for EXPLAIN
+        """
+        self.pool = pool
+        threshold_ms = float(os.getenv("DB_SLOW_QUERY_MS", "0"))
+        self.threshold_seconds = threshold_ms / 1000 if threshold_ms > 0 else None
+        self.explain_sample_rate = float(os.getenv("DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+        self.explain_timeout_ms = int(os.getenv("DB_SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "30000"))
+        self.log_path = os.getenv("DB_SLOW_QUERY_LOG_PATH", "logs/slow_queries.log")
+        self.slow_queries = 0
+        self.explains = 0
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._log: Optional[logging.Logger] = None
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether slow queries are recorded."""
+        return self.threshold_seconds is not None
+    
+    def _get_log(self) -> logging.Logger:
+        """Get the slow-query logger, attaching the rotating file on first use."""
+        if self._log is None:
+            self._log = logging.getLogger(f"{__name__}.slow_queries")
+            if self.log_path and not self._log.handlers:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                handler = RotatingFileHandler(
+                    self.log_path,
+                    maxBytes=int(os.getenv("DB_SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+                    backupCount=int(os.getenv("DB_SLOW_QUERY_LOG_BACKUPS", "5")),
+                    encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                self._log.addHandler(handler)
+                self._log.propagate = False
+        return self._log
+    
+    @staticmethod
+    def fingerprint(query: str, args: Tuple) -> Dict[str, Any]:
+        """
+        Fingerprint a query and its parameters.
+        
+        Args:
+            query: SQL query
+            args: Query parameters
+        
+        Returns:
+            Query and parameter fingerprints plus parameter shapes
+        """
+        normalized = re.sub(r"\s+", " ", query).strip()
+        return {
+            "query_fingerprint": hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16],
+            "params_fingerprint": hashlib.sha1(repr(args).encode("utf-8")).hexdigest()[:16],
+            "params": [_describe_param(arg) for arg in args]
+        }
+    
+    def observe(
+        self,
+        name: str,
+        query: str,
+        args: Tuple,
+        elapsed_seconds: float,
+        settings: Tuple[Tuple[str, str], ...] = ()
+    ):
+        """
+        Record a query if it was slow, scheduling a sampled EXPLAIN.
+        
+        Args:
+            name: Query name
+            query: SQL query
+            args: Query parameters
+            elapsed_seconds: Query latency
+            settings: Transaction-local settings the query ran with
+        """
+        if not self.enabled or elapsed_seconds < self.threshold_seconds:
+            return
+        
+        self.slow_queries += 1
+        entry = {
+            "name": name,
+            "elapsed_ms": round(elapsed_seconds * 1000, 3),
+            **self.fingerprint(query, args)
+        }
+        
+        explain = (
+            name in EXPLAINABLE_QUERIES
+            and entry["query_fingerprint"] not in self._pending
+            and random.random() < self.explain_sample_rate
+        )
+        if not explain:
+            self._get_log().warning(json.dumps(entry))
+            return
+        
+        self._pending.add(entry["query_fingerprint"])
+        task = asyncio.create_task(self._explain(entry, query, args, settings))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _explain(
+        self,
+        entry: Dict[str, Any],
+        query: str,
+        args: Tuple,
+        settings: Tuple[Tuple[str, str], ...] = ()
+    ):
+        """Capture EXPLAIN (ANALYZE, BUFFERS) for a slow read-only query and log it."""
+        try:
+            async with self.pool.acquire(readonly=True) as conn:
+                async with conn.transaction(readonly=True):
+                    await conn.execute(
+                        "SELECT set_config('statement_timeout', $1, true)",
+                        str(self.explain_timeout_ms)
+                    )
+                    for setting, value in settings:
+                        await conn.execute("SELECT set_config($1, $2, true)", setting, value)
+                    
+                    statements = None
+                    if entry["name"] in FUNCTION_QUERIES:
+                        try:
+                            statements = await self._auto_explain(conn, query, args)
+                        except asyncpg.PostgresError as e:
+                            # auto_explain not installed or LOAD not permitted
+                            entry["explain_note"] = f"auto_explain unavailable: {e}"
+                    
+                    if statements is None:
+                        result = await conn.fetchval(
+                            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}",
+                            *args
+                        )
+            
+            if statements is None:
+                entry["explain"] = _summarize_plan(_decode_json(result)[0])
+            elif not statements:
+                raise RuntimeError("auto_explain reported no plans")
+            else:
+                # The outermost call finishes (and is reported) last
+                entry["explain"] = {
+                    **statements[-1],
+                    "seq_scans": [scan for statement in statements for scan in statement["seq_scans"]],
+                    "statements": statements
+                }
+            self.explains += 1
+        except Exception as e:
+            entry["explain_error"] = str(e)
+        finally:
+            self._pending.discard(entry["query_fingerprint"])
+        
+        self._get_log().warning(json.dumps(entry, default=str))
+    
+    @staticmethod
+    async def _auto_explain(conn: asyncpg.Connection, query: str, args: Tuple) -> List[Dict[str, Any]]:
+        """
+        Run a function query with auto_explain reporting its nested statements.
+        
+        Args:
+            conn: Connection inside a read-only transaction
+            query: SQL query
+            args: Query parameters
+        
+        Returns:
+            Plan summary of every statement, in completion order
+        """
+        statements = []
+        
+        def on_log(connection, message):
+            match = _AUTO_EXPLAIN_MESSAGE.search(message.message)
+            if not match:
+                return
+            explain = json.loads(match.group(2))
+            # Parameter values are never logged
+            explain.pop("Query Parameters", None)
+            statements.append({
+                "query_text": explain.pop("Query Text", None),
+                **_summarize_plan(explain, float(match.group(1)))
+            })
+        
+        # Savepoint so a failed LOAD leaves the transaction usable for EXPLAIN;
+        # the library stays loaded but is inert outside this transaction
+        async with conn.transaction():
+            await conn.execute("LOAD 'auto_explain'")
+            for setting, value in AUTO_EXPLAIN_SETTINGS:
+                await conn.execute("SELECT set_config($1, $2, true)", setting, value)
+        
+        conn.add_log_listener(on_log)
+        try:
+            await conn.fetch(query, *args)
+            # Notices are dispatched via the event loop
+            await asyncio.sleep(0)
+        finally:
+            conn.remove_log_listener(on_log)
+        
+        return statements
+    
+    def cancel_pending(self):
+        """Cancel EXPLAIN captures still running (e.g. at shutdown)."""
+        for task in list(self._tasks):
+            task.cancel()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get monitor statistics.
+        
+        Returns:
+            Threshold, slow query count and captured plans
+        """
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_seconds * 1000 if self.enabled else None,
+            "slow_queries": self.slow_queries,
+            "explains": self.explains
+        }
+
+
+# NOTIFY channel carrying "<origin>:<session id>" after session or message writes
+SESSION_CACHE_CHANNEL = "session_cache_invalidate"
+
+
+class SessionCache:
+    """
+    Write-through cache of active sessions and their recent messages.
+    
+    Sessions and a window of each session's most recent messages are kept in
+    memory so a chat turn can load its session and conversation context
+    without a round trip. Writes made through this module update the cache
+    and NOTIFY the other API workers, which drop their copies. The cache is
+    only used while its LISTEN connection to the primary is up (start() is
+    called by the API); otherwise every read goes to the database.
+    
+    A database read takes a generation token before it starts and passes it
+    to set_session/set_messages; if the session was invalidated while the
+    read was in flight the token no longer matches and the (possibly stale)
+    result is not cached.
+    """
+    
+    def __init__(self, pool: "DatabasePool"):
+        """
+        Initialize cache from SESSION_CACHE_* settings.
+        
+        Args:
+            pool: Pool whose primary receives the LISTEN connection
+        """
+        self.pool = pool
+        max_size = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+        ttl_seconds = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "300"))
+        self.window = int(os.getenv("SESSION_CACHE_MESSAGES", "20"))
+        self.sessions = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        # session id -> (most recent messages, whether that is the whole session)
+        self.messages = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.origin = uuid4().hex
+        self.invalidations = 0
+        # Invalidation sequence per recently invalidated session; the epoch
+        # changes whenever the map is cleared, so tokens never repeat
+        self._sequence = 0
+        self._epoch = 0
+        self._generations: Dict[str, int] = {}
+        self._listener: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+    
+    @property
+    def active(self) -> bool:
+        """Whether cached entries may be served (invalidations are being received)."""
+        return self.sessions.enabled and self._listener is not None and not self._listener.is_closed()
+    
+    async def start(self):
+        """Open the LISTEN connection; the cache stays bypassed if it fails."""
+        if not self.sessions.enabled or self._listener is not None:
+            return
+        
+        self._closing = False
+        try:
+            await self._listen()
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+            logger.error(f"Session cache disabled, cannot listen for invalidations: {e}")
+            self._schedule_reconnect()
+    
+    async def _listen(self):
+        """Connect to the primary and subscribe to invalidations."""
+        # LISTEN is not available on hot standbys, so always use the primary
+        connection = await asyncpg.connect(self.pool.database_url)
+        connection.add_termination_listener(self._on_terminated)
+        await connection.add_listener(SESSION_CACHE_CHANNEL, self._on_notify)
+        self._listener = connection
+        logger.info("Session cache listening for invalidations")
+    
+    def _on_notify(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str):
+        """Drop a session written by another worker."""
+        origin, _, session_id = payload.partition(":")
+        if origin == self.origin:
+            return
+        
+        if session_id == "*":
+            self.clear()
+        else:
+            self.invalidate(session_id)
+        self.invalidations += 1
+    
+    def _on_terminated(self, connection: asyncpg.Connection):
+        """Stop serving cached entries until invalidations are received again."""
+        self._listener = None
+        self.clear()
+        if not self._closing:
+            logger.warning("Session cache lost its LISTEN connection, reconnecting")
+            self._schedule_reconnect()
+    
+    def _schedule_reconnect(self):
+        """Retry the LISTEN connection in the background with backoff."""
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+    
+    async def _reconnect(self):
+        """Reconnect the LISTEN connection, clearing entries missed while down."""
+        delay = 1.0
+        while not self._closing and self._listener is None:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+                self.clear()
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+                logger.warning(f"Session cache reconnect failed: {e}")
+                delay = min(delay * 2, 30.0)
+    
+    async def close(self):
+        """Close the LISTEN connection and drop all entries."""
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            await listener.close()
+        self.clear()
+    
+    def notify_payload(self, session_id: str) -> str:
+        """Payload announcing a write to a session ("*" for all sessions)."""
+        return f"{self.origin}:{session_id}"
+    
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a cached session that has not expired."""
+        if not self.active:
+            return None
+        
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        
+        expires_at = session["expires_at"]
+        if expires_at and datetime.fromisoformat(expires_at) <= datetime.now(timezone.utc):
+            self.invalidate(session_id)
+            return None
+        
+        return dict(session)
+    
+    def generation(self, session_id: str) -> Tuple[int, Optional[int]]:
+        """Token that changes whenever a session is invalidated; take it before a read."""
+        return (self._epoch, self._generations.get(session_id))
+    
+    def set_session(
+        self,
+        session: Dict[str, Any],
+        cost_seconds: float = 0.0,
+        generation: Optional[Tuple[int, Optional[int]]] = None
+    ):
+        """
+        Cache a session.
+        
+        Args:
+            session: Session data
+            cost_seconds: Time it took to load it
+            generation: Token taken before the read (skips the store if it changed)
+        """
+        if not self.active:
+            return
+        if generation is not None and generation != self.generation(session["id"]):
+            return
+        self.sessions.set(session["id"], dict(session), cost_seconds=cost_seconds)
+    
+    def get_messages(self, session_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the most recent messages of a session from the cache.
+        
+        Args:
+            session_id: Session UUID
+            limit: Number of most recent messages wanted
+        
+        Returns:
+            Messages in creation order, or None if the window cannot answer
+        """
+        if not self.active or limit > self.window:
+            return None
+        
+        entry = self.messages.get(session_id)
+        if entry is None:
+            return None
+        
+        messages, complete = entry
+        if len(messages) < limit and not complete:
+            return None
+        
+        return list(messages[-limit:])
+    
+    def set_messages(
+        self,
+        session_id: str,
+        messages: List[Dict[str, Any]],
+        complete: bool,
+        cost_seconds: float = 0.0,
+        generation: Optional[Tuple[int, Optional[int]]] = None
+    ):
+        """
+        Cache the most recent messages of a session.
+        
+        Args:
+            session_id: Session UUID
+            messages: Most recent messages in creation order
+            complete: Whether these are all messages of the session
+            cost_seconds: Time it took to load them
+            generation: Token taken before the read (skips the store if it changed)
+        """
+        if generation is not None and generation != self.generation(session_id):
+            return
+        if self.active:
+            self.messages.set(
+                session_id,
+                (list(messages[-self.window:]), complete and len(messages) <= self.window),
+                cost_seconds=cost_seconds
+            )
+    
+    def append_message(self, session_id: str, message: Dict[str, Any]):
+        """Append a newly written message to a cached window."""
+        if not self.active:
+            return
+        
+        # A read in flight started before this message was written
+        self._bump_generation(session_id)
+        entry = self.messages.get(session_id)
+        if entry is not None:
+            messages, complete = entry
+            self.set_messages(session_id, messages + [message], complete)
+    
+    def invalidate(self, session_id: str):
+        """Drop a session and its messages."""
+        self.invalidate_session(session_id)
+        self.messages.invalidate(session_id)
+    
+    def invalidate_session(self, session_id: str):
+        """Drop a session but keep its messages."""
+        self.sessions.invalidate(session_id)
+        self._bump_generation(session_id)
+    
+    def _bump_generation(self, session_id: str):
+        """Change a session's generation so in-flight reads are not cached."""
+        # Bounded: forgetting sessions is safe as long as the epoch changes
+        if len(self._generations) >= max(self.sessions.max_size, 1):
+            self._generations.clear()
+            self._epoch += 1
+        self._sequence += 1
+        self._generations[session_id] = self._sequence
+    
+    def clear(self):
+        """Drop all entries."""
+        self.sessions.clear()
+        self.messages.clear()
+        self._generations.clear()
+        self._epoch += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Whether the cache is active, invalidations received and per-cache stats
+        """
+        return {
+            "active": self.active,
+            "window": self.window,
+            "invalidations": self.invalidations,
+            "sessions": self.sessions.stats(),
+            "messages": self.messages.stats()
+        }
+
+
+class MessageWriter:
+    """
+    Write-behind persistence of chat messages.
+    
+    Messages are queued with a client-side id and timestamp and written by a
+    background task in multi-row inserts, flushed every
+    MESSAGE_WRITE_FLUSH_MS or as soon as MESSAGE_WRITE_BATCH_SIZE messages
+    are waiting. The API starts the writer and stop() flushes what is left at
+    shutdown. Queued messages are visible to this worker through the session
+    cache at once and to other workers after the flush.
+    """
+    
+    def __init__(self, pool: "DatabasePool"):
+        """
+        Initialize writer from MESSAGE_WRITE_* settings.
+        
+        Args:
+            pool: Pool whose primary receives the inserts
+        """
+        self.pool = pool
+        self.enabled = os.getenv("MESSAGE_WRITE_BEHIND", "true").lower() == "true"
+        self.batch_size = max(1, int(os.getenv("MESSAGE_WRITE_BATCH_SIZE", "100")))
+        self.flush_interval = float(os.getenv("MESSAGE_WRITE_FLUSH_MS", "20")) / 1000
+        # Callers wait for a flush instead of queueing beyond this
+        self.max_pending = max(self.batch_size, int(os.getenv("MESSAGE_WRITE_MAX_PENDING", "10000")))
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self._pending: List[Tuple[str, str, str, str, Dict[str, Any], datetime]] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+    
+    @property
+    def running(self) -> bool:
+        """Whether messages are queued instead of written inline."""
+        return self._task is not None and not self._task.done() and not self._stopping
+    
+    def start(self):
+        """Start the background flush task."""
+        if self.enabled and not self.running:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"Message writer started (batch {self.batch_size}, "
+                f"flush every {self.flush_interval * 1000:g} ms)"
+            )
+    
+    async def stop(self):
+        """Stop the background task and write all queued messages."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            # Let an in-flight batch finish rather than cancelling it mid-insert
+            await self._task
+            self._task = None
+        
+        try:
+            await self.flush()
+        except Exception as e:
+            # Shutdown must still close the pools; report what could not be written
+            logger.error(f"Message writer stopped with {len(self._pending)} unwritten message(s): {e}")
+    
+    async def enqueue(
+        self,
+        message_id: str,
+        session_id: str,
+        role: str,
+        content: str,
+        metadata: Dict[str, Any],
+        created_at: datetime
+    ):
+        """
+        Queue one message for the next flush.
+        
+        Args:
+            message_id: Message UUID
+            session_id: Session UUID
+            role: Message role
+            content: Message content
+            metadata: Message metadata
+            created_at: Message timestamp (keeps turn order within a batch)
+        """
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        
+        self._pending.append((message_id, session_id, role, content, metadata, created_at))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+    
+    async def _run(self):
+        """Flush on a timer or when a full batch is waiting."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                # Messages stay queued; retry after a pause instead of every tick
+                logger.error(f"Message flush failed: {e}")
+                await asyncio.sleep(1.0)
+    
+    async def flush(self):
+        """Write all queued messages in batches."""
+        async with self._flush_lock:
+            while self._pending:
+                # Messages queued during the write are appended behind the batch
+                batch = self._pending[:self.batch_size]
+                await self._write(batch)
+                del self._pending[:len(batch)]
+    
+    async def _write(self, batch: List[Tuple]):
+        """
+        Insert one batch, falling back to single rows so one bad message does
+        not drop the rest.
+        
+        Only data errors (constraint violations, invalid values) are blamed on
+        the messages. Anything else - lost connections, shutdowns, timeouts,
+        deadlocks - is raised so the batch stays queued and is retried.
+        """
+        try:
+            await self._insert(batch)
+            return
+        except (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError) as e:
+            if len(batch) > 1:
+                logger.warning(f"Batched message insert failed, retrying one by one: {e}")
+            elif isinstance(e, asyncpg.UniqueViolationError):
+                # Written by an earlier attempt that failed after the insert
+                logger.debug(f"Message {batch[0][0]} already written")
+                return
+            else:
+                self.failed += 1
+                logger.error(f"Dropping message {batch[0][0]} for session {batch[0][1]}: {e}")
+                return
+        
+        for row in batch:
+            await self._write([row])
+    
+    async def _insert(self, batch: List[Tuple]):
+        """Insert a batch with one statement and notify each session once."""
+        columns = list(zip(*batch))
+        async with self.pool.acquire() as conn:
+            await _fetch(
+                conn,
+                """
+                WITH inserted AS (
+                    INSERT INTO messages (id, session_id, role, content, metadata, created_at)
+                    SELECT * FROM unnest(
+                        $1::uuid[], $2::uuid[], $3::text[], $4::text[], $5::jsonb[], $6::timestamptz[]
+                    )
+                    RETURNING session_id
+                )
+                SELECT pg_notify($7, $8 || ':' || session_id::text)
+                FROM (SELECT DISTINCT session_id FROM inserted) written
+                """,
+                *[list(column) for column in columns],
+                SESSION_CACHE_CHANNEL,
+                self.pool.session_cache.origin,
+                name="write_messages"
+            )
+        
+        self.written += len(batch)
+        self.batches += 1
+    
+    def pending_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the queued (or in-flight) messages of a session.
+        
+        Args:
+            session_id: Session UUID
+        
+        Returns:
+            Messages in the shape returned by get_session_messages
+        """
+        return [
+            {
+                "id": message_id,
+                "role": role,
+                "content": content,
+                "metadata": metadata,
+                "created_at": created_at.isoformat()
+            }
+            for message_id, queued_session_id, role, content, metadata, created_at in self._pending
+            if queued_session_id == session_id
+        ]
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get writer statistics.
+        
+        Returns:
+            Queue depth and written, batch and failure counts
+        """
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+            "failed": self.failed
+        }
+
+
+# pg_try_advisory_lock key so only one worker runs maintenance at a time
+MAINTENANCE_LOCK_ID = 7_360_049
+
+
+class MessageMaintenance:
+    """
+    Periodic housekeeping for sessions and the partitioned messages table.
+    
+    Each pass creates the upcoming monthly message partitions, deletes
+    expired sessions (and their messages) in batches, and - when
+    MESSAGE_RETENTION_MONTHS is set - drops or archives (detaches) message
+    partitions older than the retention. The API starts it; with several
+    workers an advisory lock lets one of them do each pass.
+    """
+    
+    def __init__(self, pool: "DatabasePool"):
+        """
+        Initialize maintenance from MESSAGE_* and SESSION_* settings.
+        
+        Args:
+            pool: Pool whose primary receives the maintenance statements
+        """
+        self.pool = pool
+        self.interval_seconds = float(os.getenv("MESSAGE_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+        self.partitions_ahead = int(os.getenv("MESSAGE_PARTITIONS_AHEAD", "2"))
+        # 0 keeps all message partitions
+        self.retention_months = int(os.getenv("MESSAGE_RETENTION_MONTHS", "0"))
+        self.archive = os.getenv("MESSAGE_RETENTION_ARCHIVE", "false").lower() == "true"
+        self.session_batch_size = int(os.getenv("SESSION_CLEANUP_BATCH_SIZE", "1000"))
+        # Expired sessions are kept a while so queued messages can still be written
+        self.session_grace = timedelta(minutes=float(os.getenv("SESSION_EXPIRY_GRACE_MINUTES", "60")))
+        self.runs = 0
+        self.sessions_deleted = 0
+        self.partitions_created: List[str] = []
+        self.partitions_removed: List[str] = []
+        self.last_run_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the periodic maintenance task."""
+        if self.interval_seconds > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the maintenance task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        """Run a pass now and then every interval_seconds."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Message maintenance failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+    
+    async def run_once(self) -> Optional[Dict[str, Any]]:
+        """
+        Run one maintenance pass.
+        
+        Returns:
+            Partitions created and removed and sessions deleted, or None if
+            another worker holds the maintenance lock
+        """
+        async with self.pool.acquire() as conn:
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", MAINTENANCE_LOCK_ID):
+                return None
+            
+            try:
+                created = await conn.fetchval(
+                    "SELECT array_agg(name) FROM ensure_message_partitions($1) AS name",
+                    self.partitions_ahead
+                ) or []
+                
+                # Small batches keep each cascading delete short
+                deleted = 0
+                while True:
+                    with self.pool.metrics.time_query("delete_expired_sessions"):
+                        batch = await conn.fetchval(
+                            "SELECT delete_expired_sessions($1, $2)",
+                            self.session_batch_size,
+                            self.session_grace
+                        )
+                    deleted += batch
+                    if batch < self.session_batch_size:
+                        break
+                
+                removed = []
+                if self.retention_months > 0:
+                    removed = await conn.fetchval(
+                        "SELECT array_agg(name) FROM drop_message_partitions($1, $2) AS name",
+                        self.retention_months,
+                        self.archive
+                    ) or []
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", MAINTENANCE_LOCK_ID)
+        
+        self.runs += 1
+        self.sessions_deleted += deleted
+        self.partitions_created.extend(created)
+        self.partitions_removed.extend(removed)
+        self.last_run_at = datetime.now(timezone.utc)
+        self.last_error = None
+        
+        if created or removed or deleted:
+            logger.info(
+                f"Message maintenance: {len(created)} partition(s) created, "
+                f"{len(removed)} {'archived' if self.archive else 'dropped'}, "
+                f"{deleted} expired session(s) deleted"
+            )
+        
+        return {"partitions_created": created, "partitions_removed": removed, "sessions_deleted": deleted}
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get maintenance statistics.
+        
+        Returns:
+            Settings, run count, totals and the last run time and error
+        """
+        return {
+            "interval_seconds": self.interval_seconds,
+            "retention_months": self.retention_months or None,
+            "runs": self.runs,
+            "sessions_deleted": self.sessions_deleted,
+            "partitions_created": self.partitions_created[-12:],
+            "partitions_removed": self.partitions_removed[-12:],
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_error": self.last_error
+        }
+
+
+REPLICA_SELECTION_STRATEGIES = ("round_robin", "least_busy")
+
+
 class DatabasePool:
-    """Manages PostgreSQL connection pool."""
+    """
+    Manages PostgreSQL connection pools.
+    
+    Writes go to the primary pool. Read-only work can be routed to optional
+    read-replica pools with acquire(readonly=True).
+    """
     
-    def __init__(self, database_url: Optional[str] = None):
+    def __init__(
+        self,
+        database_url: Optional[str] = None,
+        replica_urls: Optional[List[str]] = None,
+        replica_selection: Optional[str] = None
+    ):
         """
         Initialize database pool.
         
         Args:
-            database_url: PostgreSQL connection URL
+            database_url: PostgreSQL connection URL of the primary
+            replica_urls: Read-replica URLs (defaults to comma-separated DATABASE_REPLICA_URLS)
+            replica_selection: "round_robin" or "least_busy" (defaults to DATABASE_REPLICA_SELECTION)
         """
         self.database_url = database_url or os.getenv("DATABASE_URL")
         if not self.database_url:
             raise ValueError("DATABASE_URL environment variable not set")
         
+        if replica_urls is None:
+            replica_urls = os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+        self.replica_urls = [url.strip() for url in replica_urls if url and url.strip()]
+        
+        self.replica_selection = replica_selection or os.getenv("DATABASE_REPLICA_SELECTION", "round_robin")
+        if self.replica_selection not in REPLICA_SELECTION_STRATEGIES:
+            raise ValueError(f"Replica selection must be one of {REPLICA_SELECTION_STRATEGIES}")
+        
+        self.min_size = int(os.getenv("DB_POOL_MIN_SIZE", "5"))
+        self.max_size = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+        self.max_inactive_connection_lifetime = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300"))
+        self.command_timeout = float(os.getenv("DB_COMMAND_TIMEOUT", "60"))
+        # Seconds to wait for a free connection (0 waits indefinitely)
+        self.acquire_timeout = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "0")) or None
+        
         self.pool: Optional[Pool] = None
+        self.replica_pools: List[Pool] = []
+        self._next_replica = 0
+        self.metrics = QueryMetrics()
+        self.slow_queries = SlowQueryMonitor(self)
+        self.session_cache = SessionCache(self)
+        self.message_writer = MessageWriter(self)
+        self.maintenance = MessageMaintenance(self)
+    
+    async def _create_pool(self, url: str) -> Pool:
+        """Create one asyncpg pool with the shared settings."""
+        statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+        return await asyncpg.create_pool(
+            url,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+            command_timeout=self.command_timeout,
+            statement_cache_size=statement_cache_size,
+            # Transaction-mode poolers (pgbouncer, Supabase :6543) cannot keep
+            # prepared statements; DB_STATEMENT_CACHE_SIZE=0 turns them off
+            connection_class=PreparedConnection if statement_cache_size > 0 else asyncpg.Connection,
+            init=_init_connection
+        )
     
     async def initialize(self):
-        """Create connection pool."""
+        """Create connection pools."""
         if not self.pool:
-            self.pool = await asyncpg.create_pool(
-                self.database_url,
-                min_size=5,
-                max_size=20,
-                max_inactive_connection_lifetime=300,
-                command_timeout=60
-            )
+            self.pool = await self._create_pool(self.database_url)
             logger.info("Database connection pool initialized")
+            
+            # An unreachable replica is skipped; its reads go to the primary
+            for index, url in enumerate(self.replica_urls):
+                try:
+                    self.replica_pools.append(await self._create_pool(url))
+                except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+                    logger.error(f"Read replica {index} unavailable, skipping: {e}")
+            
+            if self.replica_pools:
+                logger.info(
+                    f"Initialized {len(self.replica_pools)} read replica pool(s) "
+                    f"({self.replica_selection})"
+                )
     
     async def close(self):
-        """Close connection pool."""
+        """Close connection pools."""
+        self.slow_queries.cancel_pending()
+        await self.maintenance.stop()
+        await self.message_writer.stop()
+        await self.session_cache.close()
+        
+        for replica in self.replica_pools:
+            await replica.close()
+        self.replica_pools = []
+        
         if self.pool:
             await self.pool.close()
             self.pool = None
             logger.info("Database connection pool closed")
     
+    def _select_replica(self) -> Optional[Pool]:
+        """Pick a replica pool for a read, or None if there are no replicas."""
+        if not self.replica_pools:
+            return None
+        
+        if self.replica_selection == "least_busy":
+            return min(
+                self.replica_pools,
+                key=lambda replica: replica.get_size() - replica.get_idle_size()
+            )
+        
+        replica = self.replica_pools[self._next_replica % len(self.replica_pools)]
+        self._next_replica += 1
+        return replica
+    
     @asynccontextmanager
-    async def acquire(self):
-        """Acquire a connection from the pool."""
+    async def acquire(self, readonly: bool = False):
+        """
+        Acquire a connection from the pool.
+        
+        Args:
+            readonly: Route to a read replica when configured. Replicas lag the
+                primary, so reads that must see the caller's own writes should
+                stay on the primary.
+        """
         if not self.pool:
             await self.initialize()
         
-        async with self.pool.acquire() as connection:
-            yield connection
+        replica = self._select_replica() if readonly else None
+        if replica is not None:
+            start = time.perf_counter()
+            try:
+                connection = await replica.acquire(timeout=self.acquire_timeout)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+                logger.warning(f"Read replica unavailable, reading from primary: {e}")
+            else:
+                self.metrics.acquire_wait.observe(time.perf_counter() - start)
+                try:
+                    yield connection
+                finally:
+                    await replica.release(connection)
+                return
+        
+        start = time.perf_counter()
+        acquired = False
+        try:
+            async with self.pool.acquire(timeout=self.acquire_timeout) as connection:
+                acquired = True
+                self.metrics.acquire_wait.observe(time.perf_counter() - start)
+                yield connection
+        except asyncio.TimeoutError:
+            # Command timeouts raise the same error; only count pool starvation
+            if not acquired:
+                self.metrics.acquire_timeouts += 1
+                logger.error(f"Timed out after {self.acquire_timeout}s waiting for a database connection")
+            raise
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage and latency metrics.
+        
+        Returns:
+            Connection counts per pool, pool settings, acquire wait and query latency
+        """
+        def pool_usage(pool: Optional[Pool]) -> Optional[Dict[str, int]]:
+            if pool is None:
+                return None
+            size = pool.get_size()
+            idle = pool.get_idle_size()
+            return {"size": size, "idle": idle, "in_use": size - idle}
+        
+        return {
+            "primary": pool_usage(self.pool),
+            "replicas": [pool_usage(replica) for replica in self.replica_pools],
+            "config": {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "acquire_timeout": self.acquire_timeout,
+                "command_timeout": self.command_timeout
+            },
+            **self.metrics.snapshot(),
+            "slow_queries": self.slow_queries.stats(),
+            "session_cache": self.session_cache.stats(),
+            "message_writer": self.message_writer.stats(),
+            "maintenance": self.maintenance.stats()
+        }
 
 
 # Global database pool instance
@@ -100,17 +1360,32 @@ async def create_session(
     async with db_pool.acquire() as conn:
         expires_at = datetime.now(timezone.utc) + timedelta(minutes=timeout_minutes)
         
-        result = await conn.fetchrow(
+        result = await _fetchrow(
+            conn,
             """
             INSERT INTO sessions (user_id, metadata, expires_at)
             VALUES ($1, $2, $3)
-            RETURNING id::text
+            RETURNING id::text, created_at, updated_at
             """,
             user_id,
-            json.dumps(metadata or {}),
-            expires_at
+            metadata or {},
+            expires_at,
+            name="create_session"
         )
         
+        # A new session has no messages, so its first turn needs no reads
+        cache = db_pool.session_cache
+        if cache.active:
+            cache.set_session({
+                "id": result["id"],
+                "user_id": user_id,
+                "metadata": metadata or {},
+                "created_at": result["created_at"].isoformat(),
+                "updated_at": result["updated_at"].isoformat(),
+                "expires_at": expires_at.isoformat()
+            })
+            cache.set_messages(result["id"], [], complete=True)
+        
         return result["id"]
 
 
@@ -124,8 +1399,15 @@ async def get_session(session_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Session data or None if not found/expired
     """
+    cached = db_pool.session_cache.get_session(session_id)
+    if cached is not None:
+        return cached
+    
+    generation = db_pool.session_cache.generation(session_id)
+    start = time.perf_counter()
     async with db_pool.acquire() as conn:
-        result = await conn.fetchrow(
+        result = await _fetchrow(
+            conn,
             """
             SELECT 
                 id::text,
@@ -138,18 +1420,25 @@ async def get_session(session_id: str) -> Optional[Dict[str, Any]]:
             WHERE id = $1::uuid
             AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
             """,
-            session_id
+            session_id,
+            name="get_session"
         )
         
         if result:
-            return {
+            session = {
                 "id": result["id"],
                 "user_id": result["user_id"],
-                "metadata": json.loads(result["metadata"]),
+                "metadata": _decode_json(result["metadata"]),
                 "created_at": result["created_at"].isoformat(),
                 "updated_at": result["updated_at"].isoformat(),
                 "expires_at": result["expires_at"].isoformat() if result["expires_at"] else None
             }
+            db_pool.session_cache.set_session(
+                session,
+                cost_seconds=time.perf_counter() - start,
+                generation=generation
+            )
+            return session
         
         return None
 
@@ -166,18 +1455,28 @@ async def update_session(session_id: str, metadata: Dict[str, Any]) -> bool:
         True if updated, False if not found
     """
     async with db_pool.acquire() as conn:
-        result = await conn.execute(
+        # Other workers drop their cached copy when the update commits
+        results = await _fetch(
+            conn,
             """
-            UPDATE sessions
-            SET metadata = metadata || $2::jsonb
-            WHERE id = $1::uuid
-            AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
+            WITH updated AS (
+                UPDATE sessions
+                SET metadata = metadata || $2::jsonb
+                WHERE id = $1::uuid
+                AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
+                RETURNING id
+            )
+            SELECT pg_notify($3, $4) FROM updated
             """,
             session_id,
-            json.dumps(metadata)
+            metadata,
+            SESSION_CACHE_CHANNEL,
+            db_pool.session_cache.notify_payload(session_id),
+            name="update_session"
         )
         
-        return result.split()[-1] != "0"
+        db_pool.session_cache.invalidate_session(session_id)
+        return len(results) > 0
 
 
 # Message Management Functions
@@ -200,63 +1499,292 @@ async def add_message(
         Message ID
     """
     async with db_pool.acquire() as conn:
-        result = await conn.fetchrow(
+        # Other workers drop their cached messages when the insert commits
+        result = await _fetchrow(
+            conn,
             """
-            INSERT INTO messages (session_id, role, content, metadata)
-            VALUES ($1::uuid, $2, $3, $4)
-            RETURNING id::text
+            WITH inserted AS (
+                INSERT INTO messages (session_id, role, content, metadata)
+                VALUES ($1::uuid, $2, $3, $4)
+                RETURNING id, created_at
+            )
+            SELECT id::text, created_at, pg_notify($5, $6) FROM inserted
             """,
             session_id,
             role,
             content,
-            json.dumps(metadata or {})
+            metadata or {},
+            SESSION_CACHE_CHANNEL,
+            db_pool.session_cache.notify_payload(session_id),
+            name="add_message"
         )
         
+        cache = db_pool.session_cache
+        if cache.active:
+            cache.append_message(session_id, {
+                "id": result["id"],
+                "role": role,
+                "content": content,
+                "metadata": metadata or {},
+                "created_at": result["created_at"].isoformat()
+            })
+        
         return result["id"]
 
 
+async def queue_message(
+    session_id: str,
+    role: str,
+    content: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Add a message to a session without waiting for the insert.
+    
+    The message goes to the write-behind message writer when it is running
+    (API) and is written inline with add_message otherwise.
+    
+    Args:
+        session_id: Session UUID
+        role: Message role (user/assistant/system)
+        content: Message content
+        metadata: Optional message metadata
+    
+    Returns:
+        Message ID
+    """
+    writer = db_pool.message_writer
+    if not writer.running:
+        return await add_message(session_id, role, content, metadata)
+    
+    message = {
+        "id": str(uuid4()),
+        "role": role,
+        "content": content,
+        "metadata": metadata or {},
+        "created_at": datetime.now(timezone.utc)
+    }
+    await writer.enqueue(
+        message["id"],
+        session_id,
+        role,
+        content,
+        message["metadata"],
+        message["created_at"]
+    )
+    db_pool.session_cache.append_message(
+        session_id,
+        {**message, "created_at": message["created_at"].isoformat()}
+    )
+    
+    return message["id"]
+
+
 async def get_session_messages(
     session_id: str,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    read_your_writes: bool = False
 ) -> List[Dict[str, Any]]:
     """
-    Get messages for a session.
+    Get the most recent messages of a session.
+    
+    With a limit only the newest messages are read (newest first through the
+    (session_id, created_at) index, then reversed), so the cost does not grow
+    with the length of the session. Limits within the session cache window
+    are served from memory when cached.
     
     Args:
         session_id: Session UUID
-        limit: Maximum number of messages to return
+        limit: Number of most recent messages to return (None for all)
+        read_your_writes: Read from the primary so messages just written are included
     
     Returns:
         List of messages ordered by creation time
     """
-    async with db_pool.acquire() as conn:
-        query = """
-            SELECT 
-                id::text,
-                role,
-                content,
-                metadata,
-                created_at
-            FROM messages
-            WHERE session_id = $1::uuid
-            ORDER BY created_at
-        """
-        
+    cache = db_pool.session_cache
+    if limit:
+        cached = cache.get_messages(session_id, limit)
+        if cached is not None:
+            return cached
+    
+    query = """
+        SELECT 
+            id::text,
+            role,
+            content,
+            metadata,
+            created_at
+        FROM messages
+        WHERE session_id = $1::uuid
+    """
+    
+    # An invalidation arriving during the read means it may be stale
+    generation = cache.generation(session_id)
+    start = time.perf_counter()
+    async with db_pool.acquire(readonly=not read_your_writes) as conn:
         if limit:
-            query += f" LIMIT {limit}"
+            # Read the whole cache window so later turns are served from it
+            fetch_limit = max(limit, cache.window) if cache.active else limit
+            query += " ORDER BY created_at DESC, id DESC LIMIT $2"
+            results = await _fetch(conn, query, session_id, fetch_limit, name="get_session_messages")
+            results = list(reversed(results))
+        else:
+            fetch_limit = None
+            query += " ORDER BY created_at, id"
+            results = await _fetch(conn, query, session_id, name="get_session_messages_all")
         
-        results = await conn.fetch(query, session_id)
+        messages = [_message_from_row(row) for row in results]
+    
+    complete = fetch_limit is None or len(messages) < fetch_limit
+    messages = _merge_pending_messages(messages, db_pool.message_writer.pending_messages(session_id), complete)
+    
+    # Replica reads may lag; only cache what was read from the primary
+    if read_your_writes or not db_pool.replica_pools:
+        cache.set_messages(
+            session_id,
+            messages,
+            complete,
+            cost_seconds=time.perf_counter() - start,
+            generation=generation
+        )
+    
+    return messages[-limit:] if limit else messages
+
+
+def _merge_pending_messages(
+    messages: List[Dict[str, Any]],
+    pending: List[Dict[str, Any]],
+    complete: bool
+) -> List[Dict[str, Any]]:
+    """
+    Add messages still queued in the message writer to messages read from the database.
+    
+    Args:
+        messages: Messages read from the database, in creation order
+        pending: Queued messages of the same session
+        complete: Whether messages holds the whole session
+    
+    Returns:
+        Merged messages in creation order
+    """
+    written = {message["id"] for message in messages}
+    pending = [message for message in pending if message["id"] not in written]
+    if not pending:
+        return messages
+    
+    def order(message: Dict[str, Any]) -> Tuple[datetime, str]:
+        return datetime.fromisoformat(message["created_at"]), message["id"]
+    
+    # A truncated read is only the tail; older queued messages fall outside it
+    if not complete and messages:
+        oldest = order(messages[0])
+        pending = [message for message in pending if order(message) > oldest]
+    
+    return sorted(messages + pending, key=order)
+
+
+async def list_session_messages(
+    session_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Page through the full history of a session, oldest first.
+    
+    Pass the cursor of the last message of a page (encode_message_cursor) to
+    fetch the next page; each page is an index range scan regardless of depth.
+    
+    Args:
+        session_id: Session UUID
+        limit: Maximum number of messages to return
+        cursor: Keyset cursor to continue after
+    
+    Returns:
+        List of messages ordered by creation time
+    """
+    params: List[Any] = [session_id]
+    query = """
+        SELECT 
+            id::text,
+            role,
+            content,
+            metadata,
+            created_at
+        FROM messages
+        WHERE session_id = $1::uuid
+    """
+    
+    if cursor:
+        created_at, message_id = decode_message_cursor(cursor)
+        params.extend([created_at, message_id])
+        # The plain bound keeps the scan on the (session_id, created_at) index
+        query += """
+            AND created_at >= $2::timestamptz
+            AND (created_at, id) > ($2::timestamptz, $3::uuid)
+        """
+    
+    query += " ORDER BY created_at, id LIMIT $%d" % (len(params) + 1)
+    params.append(limit)
+    
+    async with db_pool.acquire(readonly=True) as conn:
+        results = await _fetch(conn, query, *params, name="list_session_messages")
         
-        return [
-            {
-                "id": row["id"],
-                "role": row["role"],
-                "content": row["content"],
-                "metadata": json.loads(row["metadata"]),
-                "created_at": row["created_at"].isoformat()
-            }
-            for row in results
-        ]
+        return [_message_from_row(row) for row in results]
+
+
+def _message_from_row(row: Any) -> Dict[str, Any]:
+    """Convert a messages row to a message dict."""
+    return {
+        "id": row["id"],
+        "role": row["role"],
+        "content": row["content"],
+        "metadata": _decode_json(row["metadata"]),
+        "created_at": row["created_at"].isoformat()
+    }
+
+
+def encode_message_cursor(message: Dict[str, Any]) -> str:
+    """
+    Build the keyset cursor that continues a history export after a message.
+    
+    Args:
+        message: Message returned by list_session_messages
+    
+    Returns:
+        Opaque cursor string
+    """
+    return _encode_keyset_cursor(message["created_at"], message["id"])
+
+
+def decode_message_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a message keyset cursor.
+    
+    Args:
+        cursor: Cursor from encode_message_cursor
+    
+    Returns:
+        Tuple of (created_at, message id)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    return _decode_keyset_cursor(cursor, "message")
+
+
+def _encode_keyset_cursor(created_at: str, row_id: str) -> str:
+    """Encode a (created_at, id) keyset position as an opaque string."""
+    payload = json.dumps({"created_at": created_at, "id": row_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_keyset_cursor(cursor: str, kind: str) -> Tuple[datetime, str]:
+    """Decode a (created_at, id) keyset position, raising ValueError if malformed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(payload["created_at"]), str(UUID(payload["id"]))
+    except (ValueError, KeyError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Invalid {kind} cursor: {cursor}") from e
 
 
 # Document Management Functions
@@ -270,8 +1798,9 @@ async def get_document(document_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Document data or None if not found
     """
-    async with db_pool.acquire() as conn:
-        result = await conn.fetchrow(
+    async with db_pool.acquire(readonly=True) as conn:
+        result = await _fetchrow(
+            conn,
             """
             SELECT 
                 id::text,
@@ -284,7 +1813,8 @@ async def get_document(document_id: str) -> Optional[Dict[str, Any]]:
             FROM documents
             WHERE id = $1::uuid
             """,
-            document_id
+            document_id,
+            name="get_document"
         )
         
         if result:
@@ -293,7 +1823,7 @@ async def get_document(document_id: str) -> Optional[Dict[str, Any]]:
                 "title": result["title"],
                 "source": result["source"],
                 "content": result["content"],
-                "metadata": json.loads(result["metadata"]),
+                "metadata": _decode_json(result["metadata"]),
                 "created_at": result["created_at"].isoformat(),
                 "updated_at": result["updated_at"].isoformat()
             }
@@ -301,62 +1831,99 @@ async def get_document(document_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def encode_document_cursor(document: Dict[str, Any]) -> str:
+    """
+    Build the keyset cursor that continues a listing after a document.
+    
+    Args:
+        document: Document returned by list_documents
+    
+    Returns:
+        Opaque cursor string
+    """
+    return _encode_keyset_cursor(document["created_at"], document["id"])
+
+
+def decode_document_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a keyset cursor.
+    
+    Args:
+        cursor: Cursor from encode_document_cursor
+    
+    Returns:
+        Tuple of (created_at, document id)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    return _decode_keyset_cursor(cursor, "document")
+
+
 async def list_documents(
     limit: int = 100,
     offset: int = 0,
-    metadata_filter: Optional[Dict[str, Any]] = None
+    metadata_filter: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
-    List documents with optional filtering.
+    List documents with optional filtering, newest first.
+    
+    Pass the cursor of the last document of a page (encode_document_cursor)
+    to fetch the next page; unlike offset, its cost does not grow with depth.
     
     Args:
         limit: Maximum number of documents to return
-        offset: Number of documents to skip
+        offset: Number of documents to skip (prefer cursor for deep pages)
         metadata_filter: Optional metadata filter
+        cursor: Keyset cursor to continue after
     
     Returns:
         List of documents
     """
-    async with db_pool.acquire() as conn:
-        query = """
-            SELECT 
-                d.id::text,
-                d.title,
-                d.source,
-                d.metadata,
-                d.created_at,
-                d.updated_at,
-                COUNT(c.id) AS chunk_count
-            FROM documents d
-            LEFT JOIN chunks c ON d.id = c.document_id
-        """
-        
-        params = []
-        conditions = []
-        
-        if metadata_filter:
-            conditions.append(f"d.metadata @> ${len(params) + 1}::jsonb")
-            params.append(json.dumps(metadata_filter))
-        
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        
-        query += """
-            GROUP BY d.id, d.title, d.source, d.metadata, d.created_at, d.updated_at
-            ORDER BY d.created_at DESC
-            LIMIT $%d OFFSET $%d
-        """ % (len(params) + 1, len(params) + 2)
-        
-        params.extend([limit, offset])
-        
-        results = await conn.fetch(query, *params)
+    params: List[Any] = []
+    conditions = []
+    
+    if metadata_filter:
+        params.append(metadata_filter)
+        conditions.append(f"d.metadata @> ${len(params)}::jsonb")
+    
+    if cursor:
+        created_at, document_id = decode_document_cursor(cursor)
+        params.extend([created_at, document_id])
+        conditions.append(f"(d.created_at, d.id) < (${len(params) - 1}::timestamptz, ${len(params)}::uuid)")
+    
+    query = """
+        SELECT 
+            d.id::text,
+            d.title,
+            d.source,
+            d.metadata,
+            d.created_at,
+            d.updated_at,
+            d.chunk_count
+        FROM documents d
+    """
+    
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    
+    query += """
+        ORDER BY d.created_at DESC, d.id DESC
+        LIMIT $%d OFFSET $%d
+    """ % (len(params) + 1, len(params) + 2)
+    
+    params.extend([limit, offset])
+    
+    async with db_pool.acquire(readonly=True) as conn:
+        results = await _fetch(conn, query, *params, name="list_documents")
         
         return [
             {
                 "id": row["id"],
                 "title": row["title"],
                 "source": row["source"],
-                "metadata": json.loads(row["metadata"]),
+                "metadata": _decode_json(row["metadata"]),
                 "created_at": row["created_at"].isoformat(),
                 "updated_at": row["updated_at"].isoformat(),
                 "chunk_count": row["chunk_count"]
@@ -365,10 +1932,85 @@ async def list_documents(
         ]
 
 
+# Exact document totals, cached so paging does not count the table per request
+_document_count_cache = TTLCache(
+    max_size=128,
+    ttl_seconds=float(os.getenv("DOCUMENT_COUNT_TTL_SECONDS", "60"))
+)
+
+
+async def count_documents(metadata_filter: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Count documents, cached for DOCUMENT_COUNT_TTL_SECONDS.
+    
+    Args:
+        metadata_filter: Optional metadata filter
+    
+    Returns:
+        Number of matching documents
+    """
+    cache_key = json.dumps(metadata_filter or {}, sort_keys=True)
+    cached = _document_count_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    start = time.perf_counter()
+    async with db_pool.acquire(readonly=True) as conn:
+        if metadata_filter:
+            total = await _fetchval(
+                conn,
+                "SELECT COUNT(*) FROM documents WHERE metadata @> $1::jsonb",
+                metadata_filter,
+                name="count_documents"
+            )
+        else:
+            total = await _fetchval(conn, "SELECT COUNT(*) FROM documents", name="count_documents")
+    
+    _document_count_cache.set(cache_key, total, cost_seconds=time.perf_counter() - start)
+    return total
+
+
 # Vector Search Functions
+@asynccontextmanager
+async def _search_connection(ef_search: Optional[int] = None, limit: int = 10):
+    """
+    Acquire a read-replica connection for a vector search, tuning HNSW recall.
+    
+    The search runs in a transaction with a local hnsw.ef_search, so the
+    setting never leaks to other pool users. ef_search (or the server
+    default when None) is raised to at least limit, since HNSW cannot return
+    more candidates than it explores.
+    
+    Args:
+        ef_search: HNSW candidate list size (None keeps the server default)
+        limit: Number of results the search will return
+    """
+    async with db_pool.acquire(readonly=True) as conn:
+        async with conn.transaction():
+            ef_search = await conn.fetchval(
+                """
+                SELECT set_config(
+                    'hnsw.ef_search',
+                    GREATEST(COALESCE($1::int, current_setting('hnsw.ef_search', true)::int, 40), $2)::text,
+                    true
+                )
+                """,
+                ef_search,
+                limit
+            )
+            
+            # Lets a sampled EXPLAIN of a slow search replay the setting
+            token = _query_settings.set((("hnsw.ef_search", ef_search),))
+            try:
+                yield conn
+            finally:
+                _query_settings.reset(token)
+
+
 async def vector_search(
     embedding: List[float],
-    limit: int = 10
+    limit: int = 10,
+    ef_search: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Perform vector similarity search.
@@ -376,19 +2018,18 @@ async def vector_search(
     Args:
         embedding: Query embedding vector
         limit: Maximum number of results
+        ef_search: HNSW candidate list size; higher improves recall at the cost of latency
     
     Returns:
         List of matching chunks ordered by similarity (best first)
     """
-    async with db_pool.acquire() as conn:
-        # Convert embedding to PostgreSQL vector string format
-        # PostgreSQL vector format: '[1.0,2.0,3.0]' (no spaces after commas)
-        embedding_str = '[' + ','.join(map(str, embedding)) + ']'
-        
-        results = await conn.fetch(
+    async with _search_connection(ef_search, limit) as conn:
+        results = await _fetch(
+            conn,
             "SELECT * FROM match_chunks($1::vector, $2)",
-            embedding_str,
-            limit
+            embedding,
+            limit,
+            name="vector_search"
         )
         
         return [
@@ -397,7 +2038,7 @@ async def vector_search(
                 "document_id": row["document_id"],
                 "content": row["content"],
                 "similarity": row["similarity"],
-                "metadata": json.loads(row["metadata"]),
+                "metadata": _decode_json(row["metadata"]),
                 "document_title": row["document_title"],
                 "document_source": row["document_source"]
             }
@@ -409,31 +2050,47 @@ async def hybrid_search(
     embedding: List[float],
     query_text: str,
     limit: int = 10,
-    text_weight: float = 0.3
+    text_weight: float = 0.3,
+    ef_search: Optional[int] = None,
+    fusion_method: str = "weighted",
+    candidate_count: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Perform hybrid search (vector + keyword).
     
+    The vector and keyword searches each return their own top candidates
+    (index-backed), and only those candidates are fused and ranked.
+    
     Args:
         embedding: Query embedding vector
         query_text: Query text for keyword search
         limit: Maximum number of results
         text_weight: Weight for text similarity (0-1)
+        ef_search: HNSW candidate list size for the vector part
+        fusion_method: "weighted" (blend scores) or "rrf" (reciprocal rank fusion)
+        candidate_count: Candidates per search branch (default 4 x limit, at least 40)
     
     Returns:
         List of matching chunks ordered by combined score (best first)
     """
-    async with db_pool.acquire() as conn:
-        # Convert embedding to PostgreSQL vector string format
-        # PostgreSQL vector format: '[1.0,2.0,3.0]' (no spaces after commas)
-        embedding_str = '[' + ','.join(map(str, embedding)) + ']'
-        
-        results = await conn.fetch(
-            "SELECT * FROM hybrid_search($1::vector, $2, $3, $4)",
-            embedding_str,
+    if fusion_method not in ("weighted", "rrf"):
+        raise ValueError(f"Unknown fusion method: {fusion_method}")
+    
+    # The vector branch needs ef_search >= its candidate count to fill it;
+    # _search_connection raises it to branch_limit even when ef_search is None
+    branch_limit = candidate_count or max(limit * 4, 40)
+    
+    async with _search_connection(ef_search, branch_limit) as conn:
+        results = await _fetch(
+            conn,
+            "SELECT * FROM hybrid_search($1::vector, $2, $3, $4, $5, $6)",
+            embedding,
             query_text,
             limit,
-            text_weight
+            text_weight,
+            fusion_method,
+            branch_limit,
+            name="hybrid_search"
         )
         
         return [
@@ -444,7 +2101,7 @@ async def hybrid_search(
                 "combined_score": row["combined_score"],
                 "vector_similarity": row["vector_similarity"],
                 "text_similarity": row["text_similarity"],
-                "metadata": json.loads(row["metadata"]),
+                "metadata": _decode_json(row["metadata"]),
                 "document_title": row["document_title"],
                 "document_source": row["document_source"]
             }
@@ -452,6 +2109,59 @@ async def hybrid_search(
         ]
 
 
+async def product_search(
+    embedding: List[float],
+    limit: int = 10,
+    compliance_tags: Optional[List[str]] = None,
+    category: Optional[str] = None,
+    ef_search: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Search products by similarity within compliance tag and category filters.
+    
+    Selective filters are answered exactly from the tag/category indexes;
+    broader ones use filtered ANN search (see search_products in
+    sql/evi_schema_additions.sql), so filters never cut the result short.
+    
+    Args:
+        embedding: Query embedding vector
+        limit: Maximum number of results
+        compliance_tags: Only products with any of these tags
+        category: Only products in this category
+        ef_search: HNSW candidate list size for unfiltered searches
+    
+    Returns:
+        List of matching products ordered by similarity (best first)
+    """
+    exact_threshold = int(os.getenv("PRODUCT_SEARCH_EXACT_THRESHOLD", "2000"))
+    
+    async with _search_connection(ef_search, limit) as conn:
+        results = await _fetch(
+            conn,
+            "SELECT * FROM search_products($1::vector, NULL, $2, $3, $4, $5)",
+            embedding,
+            compliance_tags or None,
+            limit,
+            category,
+            exact_threshold,
+            name="product_search"
+        )
+        
+        return [
+            {
+                "product_id": str(row["product_id"]),
+                "name": row["name"],
+                "description": row["description"],
+                "url": row["url"],
+                "category": row["category"],
+                "similarity": row["similarity"],
+                "compliance_tags": list(row["compliance_tags"] or []),
+                "metadata": _decode_json(row["metadata"])
+            }
+            for row in results
+        ]
+
+
 # Chunk Management Functions
 async def get_document_chunks(document_id: str) -> List[Dict[str, Any]]:
     """
@@ -463,10 +2173,12 @@ async def get_document_chunks(document_id: str) -> List[Dict[str, Any]]:
     Returns:
         List of chunks ordered by chunk index
     """
-    async with db_pool.acquire() as conn:
-        results = await conn.fetch(
+    async with db_pool.acquire(readonly=True) as conn:
+        results = await _fetch(
+            conn,
             "SELECT * FROM get_document_chunks($1::uuid)",
-            document_id
+            document_id,
+            name="get_document_chunks"
         )
         
         return [
@@ -474,7 +2186,7 @@ async def get_document_chunks(document_id: str) -> List[Dict[str, Any]]:
                 "chunk_id": row["chunk_id"],
                 "content": row["content"],
                 "chunk_index": row["chunk_index"],
-                "metadata": json.loads(row["metadata"])
+                "metadata": _decode_json(row["metadata"])
             }
             for row in results
         ]
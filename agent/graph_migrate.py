@@ -0,0 +1,57 @@
+"""
+Build Neo4j indices and constraints for the knowledge graph.
+
+Run once per deployment (or after upgrading graphiti-core) so API and
+ingestion startup can skip index building:
+    python -m agent.graph_migrate
+    python -m agent.graph_migrate --status
+"""
+
+import asyncio
+import logging
+import argparse
+
+from dotenv import load_dotenv
+
+from .graph_utils import get_graph_client, get_graph_schema_version
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    """Main function for running graph schema migrations."""
+    parser = argparse.ArgumentParser(description="Build knowledge graph indices and constraints")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the schema version is current")
+    parser.add_argument("--status", action="store_true", help="Only show the stored and current schema versions")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    client = get_graph_client()
+    client.auto_migrate = False
+
+    try:
+        await client.initialize()
+        stored = await client.get_schema_version()
+        print(f"Stored schema version:  {stored or '(none)'}")
+        print(f"Current schema version: {get_graph_schema_version()}")
+
+        if args.status:
+            return
+
+        if await client.migrate_schema(force=args.force):
+            print("Graph indices and constraints built")
+        else:
+            print("Graph schema is up to date")
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -9,8 +9,13 @@ from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
 from contextlib import asynccontextmanager
 import asyncio
+import time
+import uuid
 
+from neo4j import AsyncGraphDatabase
 from graphiti_core import Graphiti
+from graphiti_core.driver.driver import GraphDriver
+from graphiti_core.driver.neo4j_driver import Neo4jDriver
 from graphiti_core.utils.maintenance.graph_data_operations import clear_data
 from graphiti_core.llm_client.config import LLMConfig
 from graphiti_core.llm_client.openai_client import OpenAIClient
@@ -18,11 +23,216 @@ from graphiti_core.embedder.openai import OpenAIEmbedder, OpenAIEmbedderConfig
 from graphiti_core.cross_encoder.openai_reranker_client import OpenAIRerankerClient
 from dotenv import load_dotenv
 
+from .cache import TTLCache
+from .providers import get_openai_client
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Bump when the indices created by GraphitiClient.migrate_schema change
+GRAPH_SCHEMA_REVISION = 1
+
+
+def get_graph_schema_version() -> str:
+    """Schema version: our index revision plus the graphiti-core version that builds its indices."""
+    try:
+        from importlib.metadata import version
+        graphiti_version = version("graphiti-core")
+    except Exception:
+        graphiti_version = "unknown"
+    
+    return f"{GRAPH_SCHEMA_REVISION}:graphiti-{graphiti_version}"
+
+class PooledNeo4jDriver(Neo4jDriver):
+    """
+    Neo4j driver with a configurable connection pool and usage statistics.
+    
+    Queries and sessions (Graphiti's bulk writes and clear_data use
+    sessions) are gated by a semaphore the size of the pool, so time spent
+    waiting for a free connection is measured rather than hidden inside
+    the driver. A session holds its slot from first use until it is closed.
+    """
+    
+    def __init__(
+        self,
+        uri: str,
+        user: Optional[str],
+        password: Optional[str],
+        max_connection_pool_size: Optional[int] = None,
+        connection_acquisition_timeout: Optional[float] = None,
+        max_connection_lifetime: Optional[float] = None,
+        keep_alive: Optional[bool] = None
+    ):
+        """
+        Initialize driver.
+        
+        Args:
+            uri: Neo4j connection URI
+            user: Neo4j username
+            password: Neo4j password
+            max_connection_pool_size: Maximum pooled connections
+            connection_acquisition_timeout: Seconds to wait for a free connection
+            max_connection_lifetime: Seconds before a connection is recycled
+            keep_alive: Enable TCP keep-alive on connections
+        """
+        GraphDriver.__init__(self)
+        
+        self.max_connection_pool_size = max_connection_pool_size or int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "50"))
+        self.connection_acquisition_timeout = connection_acquisition_timeout or float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))
+        self.max_connection_lifetime = max_connection_lifetime or float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+        self.keep_alive = (
+            keep_alive
+            if keep_alive is not None
+            else os.getenv("NEO4J_KEEP_ALIVE", "true").lower() == "true"
+        )
+        
+        self.client = AsyncGraphDatabase.driver(
+            uri=uri,
+            auth=(user or '', password or ''),
+            max_connection_pool_size=self.max_connection_pool_size,
+            connection_acquisition_timeout=self.connection_acquisition_timeout,
+            max_connection_lifetime=self.max_connection_lifetime,
+            keep_alive=self.keep_alive
+        )
+        
+        self._gate = asyncio.Semaphore(self.max_connection_pool_size)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.queries = 0
+        self.sessions = 0
+        self.waits = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+    
+    async def _acquire(self):
+        """Take a pool slot, recording how long it waited for one."""
+        start = time.perf_counter()
+        await self._gate.acquire()
+        
+        waited = time.perf_counter() - start
+        if waited > 0.001:
+            self.waits += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+    
+    def _release(self):
+        """Give back a pool slot."""
+        self.in_flight -= 1
+        self._gate.release()
+    
+    async def execute_query(self, cypher_query_, **kwargs: Any):
+        """Run a query, recording how long it waited for a connection."""
+        await self._acquire()
+        self.queries += 1
+        try:
+            return await super().execute_query(cypher_query_, **kwargs)
+        finally:
+            self._release()
+    
+    def session(self, database: str) -> "_GatedSession":
+        """Open a session that holds a pool slot from first use until closed."""
+        return _GatedSession(self, super().session(database))
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool usage.
+        
+        Returns:
+            Pool settings, in-flight queries and sessions, and wait times
+        """
+        acquisitions = self.queries + self.sessions
+        return {
+            "max_connection_pool_size": self.max_connection_pool_size,
+            "connection_acquisition_timeout": self.connection_acquisition_timeout,
+            "keep_alive": self.keep_alive,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": round(self.in_flight / self.max_connection_pool_size, 3),
+            "queries": self.queries,
+            "sessions": self.sessions,
+            "waited": self.waits,
+            "avg_wait_ms": round(self.total_wait_seconds / acquisitions * 1000, 3) if acquisitions else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3)
+        }
+
+
+class _GatedSession:
+    """Neo4j session wrapper holding a PooledNeo4jDriver slot while in use."""
+    
+    def __init__(self, driver: PooledNeo4jDriver, session: Any):
+        """
+        Initialize wrapper.
+        
+        Args:
+            driver: Driver whose pool slot the session takes
+            session: Underlying Neo4j session
+        """
+        self._driver = driver
+        self._session = session
+        self._held = False
+    
+    async def _acquire(self):
+        """Take the driver slot on first use."""
+        if not self._held:
+            await self._driver._acquire()
+            self._held = True
+            self._driver.sessions += 1
+    
+    def _release(self):
+        """Give the slot back once."""
+        if self._held:
+            self._held = False
+            self._driver._release()
+    
+    async def __aenter__(self) -> "_GatedSession":
+        """Take the slot and open the session."""
+        await self._acquire()
+        try:
+            await self._session.__aenter__()
+        except BaseException:
+            self._release()
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the session and give the slot back."""
+        try:
+            return await self._session.__aexit__(exc_type, exc, tb)
+        finally:
+            self._release()
+    
+    async def run(self, query: str, **kwargs: Any):
+        """Run a query in an auto-commit transaction."""
+        await self._acquire()
+        return await self._session.run(query, **kwargs)
+    
+    async def execute_read(self, func, *args, **kwargs):
+        """Run a read transaction function."""
+        await self._acquire()
+        return await self._session.execute_read(func, *args, **kwargs)
+    
+    async def execute_write(self, func, *args, **kwargs):
+        """Run a write transaction function."""
+        await self._acquire()
+        return await self._session.execute_write(func, *args, **kwargs)
+    
+    async def close(self):
+        """Close the session and give the slot back."""
+        try:
+            await self._session.close()
+        finally:
+            self._release()
+    
+    def __getattr__(self, name: str) -> Any:
+        """Forward anything else to the underlying session."""
+        return getattr(self._session, name)
+
+
 # Help from this PR for setting up the custom clients: https://github.com/getzep/graphiti/pull/601/files
 class GraphitiClient:
     """Manages Graphiti knowledge graph operations."""
@@ -66,6 +276,25 @@ class GraphitiClient:
         if not self.embedding_api_key:
             raise ValueError("EMBEDDING_API_KEY environment variable not set")
         
+        # Statistics cache: (loop time computed, statistics)
+        self.stats_ttl = float(os.getenv("GRAPH_STATS_TTL_SECONDS", "60"))
+        self._stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        
+        # Search result cache, keyed by graph generation and normalized query.
+        # The generation is a token stored in Neo4j and replaced on every write,
+        # so writes from other processes (ingestion, graph workers) are noticed
+        # within GRAPH_GENERATION_CHECK_SECONDS.
+        self.search_cache = TTLCache(
+            max_size=int(os.getenv("GRAPH_SEARCH_CACHE_SIZE", "256")),
+            ttl_seconds=float(os.getenv("GRAPH_SEARCH_CACHE_TTL_SECONDS", "300"))
+        )
+        self.generation_check_seconds = float(os.getenv("GRAPH_GENERATION_CHECK_SECONDS", "5"))
+        self._generation: Optional[str] = None
+        self._generation_checked_at = 0.0
+        
+        # Build missing indices on startup (otherwise only via agent.graph_migrate)
+        self.auto_migrate = os.getenv("GRAPH_AUTO_MIGRATE", "true").lower() == "true"
+        
         self.graphiti: Optional[Graphiti] = None
         self._initialized = False
     
@@ -75,39 +304,13 @@ class GraphitiClient:
             return
         
         try:
-            # Create LLMConfig
-            llm_config = LLMConfig(
-                api_key=self.llm_api_key,
-                model=self.llm_choice,
-                small_model=self.llm_choice,  # Can be the same as main model
-                base_url=self.llm_base_url
-            )
-            
-            # Create OpenAI LLM client
-            llm_client = OpenAIClient(config=llm_config)
+            self.graphiti = self._build_graphiti()
             
-            # Create OpenAI embedder
-            embedder = OpenAIEmbedder(
-                config=OpenAIEmbedderConfig(
-                    api_key=self.embedding_api_key,
-                    embedding_model=self.embedding_model,
-                    embedding_dim=self.embedding_dimensions,
-                    base_url=self.embedding_base_url
-                )
-            )
-            
-            # Initialize Graphiti with custom clients
-            self.graphiti = Graphiti(
-                self.neo4j_uri,
-                self.neo4j_user,
-                self.neo4j_password,
-                llm_client=llm_client,
-                embedder=embedder,
-                cross_encoder=OpenAIRerankerClient(client=llm_client, config=llm_config)
-            )
-            
-            # Build indices and constraints
-            await self.graphiti.build_indices_and_constraints()
+            # Build indices and constraints only when the schema version changed
+            if self.auto_migrate:
+                await self.migrate_schema()
+            elif await self.get_schema_version() != get_graph_schema_version():
+                logger.warning("Graph schema is out of date; run `python -m agent.graph_migrate`")
             
             self._initialized = True
             logger.info(f"Graphiti client initialized successfully with LLM: {self.llm_choice} and embedder: {self.embedding_model}")
@@ -116,6 +319,104 @@ class GraphitiClient:
             logger.error(f"Failed to initialize Graphiti: {e}")
             raise
     
+    def _build_graphiti(self) -> Graphiti:
+        """Create a Graphiti instance on a pooled driver with shared OpenAI clients."""
+        llm_config = LLMConfig(
+            api_key=self.llm_api_key,
+            model=self.llm_choice,
+            small_model=self.llm_choice,  # Can be the same as main model
+            base_url=self.llm_base_url
+        )
+        llm_http_client = get_openai_client(self.llm_base_url, self.llm_api_key)
+        
+        llm_client = OpenAIClient(config=llm_config, client=llm_http_client)
+        
+        embedder = OpenAIEmbedder(
+            config=OpenAIEmbedderConfig(
+                api_key=self.embedding_api_key,
+                embedding_model=self.embedding_model,
+                embedding_dim=self.embedding_dimensions,
+                base_url=self.embedding_base_url
+            ),
+            client=get_openai_client(self.embedding_base_url, self.embedding_api_key)
+        )
+        
+        return Graphiti(
+            self.neo4j_uri,
+            self.neo4j_user,
+            self.neo4j_password,
+            llm_client=llm_client,
+            embedder=embedder,
+            cross_encoder=OpenAIRerankerClient(client=llm_http_client, config=llm_config),
+            graph_driver=PooledNeo4jDriver(self.neo4j_uri, self.neo4j_user, self.neo4j_password)
+        )
+    
+    def pool_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get Neo4j connection pool usage.
+        
+        Returns:
+            Pool statistics, or None before initialization
+        """
+        if self.graphiti and isinstance(self.graphiti.driver, PooledNeo4jDriver):
+            return self.graphiti.driver.pool_stats()
+        return None
+    
+    async def get_schema_version(self) -> Optional[str]:
+        """
+        Read the schema version marker.
+        
+        Returns:
+            Stored schema version, or None if the graph has no marker
+        """
+        records, _, _ = await self.graphiti.driver.execute_query(
+            "MATCH (s:SchemaVersion {id: 'graph'}) RETURN s.version AS version"
+        )
+        return records[0]["version"] if records else None
+    
+    async def _write_schema_version(self):
+        """Store the current schema version marker."""
+        await self.graphiti.driver.execute_query(
+            """
+            MERGE (s:SchemaVersion {id: 'graph'})
+            SET s.version = $version, s.updated_at = datetime()
+            """,
+            params={"version": get_graph_schema_version()}
+        )
+    
+    async def migrate_schema(self, force: bool = False) -> bool:
+        """
+        Build indices and constraints if the stored schema version is outdated.
+        
+        Args:
+            force: Rebuild even if the version is current
+        
+        Returns:
+            True if indices were built
+        """
+        if self.graphiti is None:
+            self.graphiti = self._build_graphiti()
+        
+        current = get_graph_schema_version()
+        stored = await self.get_schema_version()
+        
+        if stored == current and not force:
+            logger.debug(f"Graph schema {current} is up to date")
+            return False
+        
+        logger.info(f"Building graph indices and constraints (schema {stored} -> {current})")
+        await self.graphiti.build_indices_and_constraints()
+        await self._ensure_episode_name_index()
+        await self._write_schema_version()
+        
+        return True
+    
+    async def _ensure_episode_name_index(self):
+        """Index episode names, which Graphiti leaves unindexed, for existence checks."""
+        await self.graphiti.driver.execute_query(
+            "CREATE INDEX episodic_name IF NOT EXISTS FOR (e:Episodic) ON (e.name)"
+        )
+    
     async def close(self):
         """Close Graphiti connection."""
         if self.graphiti:
@@ -157,9 +458,86 @@ class GraphitiClient:
             source_description=source,
             reference_time=episode_timestamp
         )
+        await self._bump_generation()
         
         logger.info(f"Added episode {episode_id} to knowledge graph")
     
+    async def add_episodes_bulk(self, episodes: List[Dict[str, Any]]):
+        """
+        Add several episodes to the knowledge graph in one batch.
+        
+        Uses graphiti-core's bulk episode API, which extracts and deduplicates
+        entities and edges once for the whole batch instead of once per episode.
+        The bulk path skips Graphiti's edge invalidation and date extraction.
+        Falls back to one add_episode call per episode when the installed
+        graphiti-core has no bulk API.
+        
+        Args:
+            episodes: Episodes with episode_id, content, source and optional timestamp
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        if not episodes:
+            return
+        
+        if not hasattr(self.graphiti, "add_episode_bulk"):
+            for episode in episodes:
+                await self.add_episode(
+                    episode_id=episode["episode_id"],
+                    content=episode["content"],
+                    source=episode["source"],
+                    timestamp=episode.get("timestamp"),
+                    metadata=episode.get("metadata")
+                )
+            return
+        
+        from graphiti_core.nodes import EpisodeType
+        from graphiti_core.utils.bulk_utils import RawEpisode
+        
+        now = datetime.now(timezone.utc)
+        
+        await self.graphiti.add_episode_bulk([
+            RawEpisode(
+                name=episode["episode_id"],
+                content=episode["content"],
+                source=EpisodeType.text,
+                source_description=episode["source"],
+                reference_time=episode.get("timestamp") or now
+            )
+            for episode in episodes
+        ])
+        await self._bump_generation()
+        
+        logger.info(f"Added {len(episodes)} episodes to knowledge graph in bulk")
+    
+    async def get_existing_episode_names(self, names: List[str]) -> set:
+        """
+        Find which episode names already exist in the graph.
+        
+        Args:
+            names: Episode names to look up
+        
+        Returns:
+            Subset of names with an existing episode
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        if not names:
+            return set()
+        
+        records, _, _ = await self.graphiti.driver.execute_query(
+            """
+            MATCH (e:Episodic)
+            WHERE e.name IN $names
+            RETURN DISTINCT e.name AS name
+            """,
+            params={"names": list(names)}
+        )
+        
+        return {record["name"] for record in records}
+    
     async def search(
         self,
         query: str,
@@ -169,6 +547,9 @@ class GraphitiClient:
         """
         Search the knowledge graph.
         
+        Results are cached per normalized query until the TTL expires or the
+        graph changes.
+        
         Args:
             query: Search query
             center_node_distance: Distance from center nodes
@@ -180,12 +561,23 @@ class GraphitiClient:
         if not self._initialized:
             await self.initialize()
         
+        cache_key = None
+        if self.search_cache.enabled:
+            generation = await self._current_generation()
+            cache_key = (generation, " ".join(query.casefold().split()), center_node_distance, use_hybrid_search)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                return [dict(result) for result in cached]
+        
         try:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            
             # Use Graphiti's search method (simplified parameters)
             results = await self.graphiti.search(query)
             
             # Convert results to dictionaries
-            return [
+            formatted = [
                 {
                     "fact": result.fact,
                     "uuid": str(result.uuid),
@@ -196,23 +588,122 @@ class GraphitiClient:
                 for result in results
             ]
             
+            if cache_key is not None:
+                self.search_cache.set(cache_key, formatted, cost_seconds=loop.time() - start)
+            
+            return [dict(result) for result in formatted]
+            
         except Exception as e:
             logger.error(f"Graph search failed: {e}")
             return []
     
+    async def _current_generation(self) -> Optional[str]:
+        """
+        Get the graph generation token, re-reading it from Neo4j at most
+        every generation_check_seconds.
+        """
+        now = asyncio.get_running_loop().time()
+        if self._generation is not None and now - self._generation_checked_at < self.generation_check_seconds:
+            return self._generation
+        
+        try:
+            records, _, _ = await self.graphiti.driver.execute_query(
+                "MATCH (g:GraphGeneration {id: 'graph'}) RETURN g.token AS token"
+            )
+            token = records[0]["token"] if records else "initial"
+            if token != self._generation:
+                self.search_cache.clear()
+            self._generation = token
+            self._generation_checked_at = now
+        except Exception as e:
+            logger.warning(f"Could not read graph generation: {e}")
+        
+        return self._generation
+    
+    async def _bump_generation(self):
+        """Replace the graph generation token after a write, invalidating cached searches."""
+        token = uuid.uuid4().hex
+        self.search_cache.clear()
+        self._stats_cache = None
+        self._generation = token
+        self._generation_checked_at = asyncio.get_running_loop().time()
+        
+        try:
+            await self.graphiti.driver.execute_query(
+                "MERGE (g:GraphGeneration {id: 'graph'}) SET g.token = $token",
+                params={"token": token}
+            )
+        except Exception as e:
+            logger.warning(f"Could not persist graph generation: {e}")
+    
+    async def resolve_entity(self, entity_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the entity node for a name.
+        
+        Tries an exact name match (indexed), then the name/summary fulltext
+        index so aliases and spelling variants still resolve.
+        
+        Args:
+            entity_name: Name of the entity
+        
+        Returns:
+            Entity uuid, name and summary, or None if not found
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        records, _, _ = await self.graphiti.driver.execute_query(
+            """
+            MATCH (n:Entity {name: $name})
+            RETURN n.uuid AS uuid, n.name AS name, n.summary AS summary
+            LIMIT 1
+            """,
+            params={"name": entity_name}
+        )
+        
+        if not records:
+            from graphiti_core.helpers import lucene_sanitize
+            
+            query = lucene_sanitize(entity_name).strip()
+            if not query:
+                return None
+            
+            records, _, _ = await self.graphiti.driver.execute_query(
+                """
+                CALL db.index.fulltext.queryNodes('node_name_and_summary', $query, {limit: 5})
+                YIELD node, score
+                WHERE node:Entity
+                RETURN node.uuid AS uuid, node.name AS name, node.summary AS summary
+                ORDER BY score DESC
+                LIMIT 1
+                """,
+                params={"query": query}
+            )
+        
+        if not records:
+            return None
+        
+        record = records[0]
+        return {"uuid": record["uuid"], "name": record["name"], "summary": record["summary"]}
+    
     async def get_related_entities(
         self,
         entity_name: str,
         relationship_types: Optional[List[str]] = None,
-        depth: int = 1
+        depth: int = 1,
+        limit: int = 50
     ) -> Dict[str, Any]:
         """
-        Get entities related to a given entity using Graphiti search.
+        Get entities related to a given entity by traversing the graph.
+        
+        Expands breadth-first one hop per query, so the work done is bounded
+        by the relationship limit rather than by the number of paths.
         
         Args:
             entity_name: Name of the entity
-            relationship_types: Types of relationships to follow (not used with Graphiti)
-            depth: Maximum depth to traverse (not used with Graphiti)
+            relationship_types: Relationship names to follow (e.g. "WORKS_FOR"); all if None
+            depth: Maximum number of hops (1-5)
+            limit: Maximum number of relationships returned (1-200)
         
         Returns:
             Related entities and relationships
@@ -220,43 +711,116 @@ class GraphitiClient:
         if not self._initialized:
             await self.initialize()
         
-        # Use Graphiti search to find related information about the entity
-        results = await self.graphiti.search(f"relationships involving {entity_name}")
+        depth = max(1, min(int(depth), 5))
+        limit = max(1, min(int(limit), 200))
+        types = [t.upper().replace(" ", "_") for t in relationship_types] if relationship_types else None
         
-        # Extract entity information from the search results
-        related_entities = set()
-        facts = []
+        result = {
+            "central_entity": entity_name,
+            "entity_found": False,
+            "related_entities": [],
+            "relationships": [],
+            "related_facts": [],
+            "depth": depth,
+            "truncated": False,
+            "search_method": "cypher_traversal"
+        }
         
-        for result in results:
-            facts.append({
-                "fact": result.fact,
-                "uuid": str(result.uuid),
-                "valid_at": str(result.valid_at) if hasattr(result, 'valid_at') and result.valid_at else None
-            })
+        entity = await self.resolve_entity(entity_name)
+        if not entity:
+            return result
+        
+        result["central_entity"] = entity["name"]
+        result["entity_found"] = True
+        
+        visited = {entity["uuid"]}
+        frontier = [entity["uuid"]]
+        seen_edges = set()
+        
+        for hop in range(1, depth + 1):
+            remaining = limit - len(result["relationships"])
+            if not frontier or remaining <= 0:
+                break
+            
+            records, _, _ = await self.graphiti.driver.execute_query(
+                """
+                MATCH (a:Entity)-[r:RELATES_TO]-(b:Entity)
+                WHERE a.uuid IN $frontier
+                  AND NOT b.uuid IN $visited
+                  AND ($types IS NULL OR r.name IN $types)
+                RETURN startNode(r).name AS source, endNode(r).name AS target,
+                       r.uuid AS uuid, r.name AS type, r.fact AS fact,
+                       r.valid_at AS valid_at, r.invalid_at AS invalid_at,
+                       b.uuid AS neighbor_uuid, b.name AS neighbor_name, b.summary AS neighbor_summary
+                LIMIT $limit
+                """,
+                params={
+                    "frontier": frontier,
+                    "visited": list(visited),
+                    "types": types,
+                    "limit": remaining + 1
+                }
+            )
+            
+            if len(records) > remaining:
+                result["truncated"] = True
+                records = records[:remaining]
+            
+            next_frontier = []
+            for record in records:
+                if record["uuid"] not in seen_edges:
+                    seen_edges.add(record["uuid"])
+                    valid_at = str(record["valid_at"]) if record["valid_at"] else None
+                    result["relationships"].append({
+                        "from": record["source"],
+                        "to": record["target"],
+                        "type": record["type"],
+                        "fact": record["fact"],
+                        "valid_at": valid_at,
+                        "invalid_at": str(record["invalid_at"]) if record["invalid_at"] else None,
+                        "hops": hop
+                    })
+                    result["related_facts"].append({
+                        "fact": record["fact"],
+                        "uuid": record["uuid"],
+                        "valid_at": valid_at
+                    })
+                
+                if record["neighbor_uuid"] not in visited:
+                    visited.add(record["neighbor_uuid"])
+                    next_frontier.append(record["neighbor_uuid"])
+                    result["related_entities"].append({
+                        "name": record["neighbor_name"],
+                        "summary": record["neighbor_summary"],
+                        "hops": hop
+                    })
             
-            # Simple entity extraction from fact text (could be enhanced)
-            if entity_name.lower() in result.fact.lower():
-                related_entities.add(entity_name)
+            frontier = next_frontier
         
-        return {
-            "central_entity": entity_name,
-            "related_facts": facts,
-            "search_method": "graphiti_semantic_search"
-        }
+        return result
     
     async def get_entity_timeline(
         self,
         entity_name: str,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        limit: int = 50,
+        offset: int = 0
     ) -> List[Dict[str, Any]]:
         """
-        Get timeline of facts for an entity using Graphiti.
+        Get timeline of facts for an entity, newest first.
+        
+        Date filtering, ordering and pagination run in Cypher over the
+        indexed valid_at/invalid_at edge properties. A fact is included when
+        its validity interval overlaps [start_date, end_date]; open-ended
+        intervals count as unbounded.
         
         Args:
             entity_name: Name of the entity
-            start_date: Start of time range (not currently used)
-            end_date: End of time range (not currently used)
+            start_date: Start of time range (naive dates are taken as UTC)
+            end_date: End of time range (naive dates are taken as UTC)
+            limit: Maximum number of facts (1-500)
+            offset: Number of facts to skip
         
         Returns:
             Timeline of facts
@@ -264,26 +828,71 @@ class GraphitiClient:
         if not self._initialized:
             await self.initialize()
         
-        # Search for temporal information about the entity
-        results = await self.graphiti.search(f"timeline history of {entity_name}")
+        entity = await self.resolve_entity(entity_name)
+        if not entity:
+            return []
         
-        timeline = []
-        for result in results:
-            timeline.append({
-                "fact": result.fact,
-                "uuid": str(result.uuid),
-                "valid_at": str(result.valid_at) if hasattr(result, 'valid_at') and result.valid_at else None,
-                "invalid_at": str(result.invalid_at) if hasattr(result, 'invalid_at') and result.invalid_at else None
-            })
+        def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+            if value is None or value.tzinfo is not None:
+                return value
+            return value.replace(tzinfo=timezone.utc)
         
-        # Sort by valid_at if available
-        timeline.sort(key=lambda x: x.get('valid_at') or '', reverse=True)
+        records, _, _ = await self.graphiti.driver.execute_query(
+            """
+            MATCH (n:Entity {uuid: $uuid})-[r:RELATES_TO]-(m:Entity)
+            WHERE ($start IS NULL OR r.invalid_at IS NULL OR r.invalid_at >= $start)
+              AND ($end IS NULL OR r.valid_at IS NULL OR r.valid_at <= $end)
+            RETURN r.uuid AS uuid, r.fact AS fact, r.name AS type,
+                   r.valid_at AS valid_at, r.invalid_at AS invalid_at,
+                   m.name AS related_entity
+            ORDER BY coalesce(r.valid_at, r.created_at) DESC, r.uuid
+            SKIP $offset
+            LIMIT $limit
+            """,
+            params={
+                "uuid": entity["uuid"],
+                "start": as_utc(start_date),
+                "end": as_utc(end_date),
+                "offset": max(0, int(offset)),
+                "limit": max(1, min(int(limit), 500))
+            }
+        )
         
-        return timeline
+        return [
+            {
+                "fact": record["fact"],
+                "uuid": record["uuid"],
+                "type": record["type"],
+                "related_entity": record["related_entity"],
+                "valid_at": str(record["valid_at"]) if record["valid_at"] else None,
+                "invalid_at": str(record["invalid_at"]) if record["invalid_at"] else None
+            }
+            for record in records
+        ]
+    
+    async def ping(self) -> bool:
+        """
+        Check that Neo4j answers a trivial query.
+        
+        Returns:
+            True if the database responded
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        records, _, _ = await self.graphiti.driver.execute_query("RETURN 1 AS ok")
+        return bool(records) and records[0]["ok"] == 1
     
-    async def get_graph_statistics(self) -> Dict[str, Any]:
+    async def get_graph_statistics(self, use_cache: bool = True) -> Dict[str, Any]:
         """
-        Get basic statistics about the knowledge graph.
+        Get statistics about the knowledge graph from direct Cypher counts.
+        
+        Label and relationship-type counts come from Neo4j's count store, so
+        no LLM or embedding calls are made. Results are cached for
+        GRAPH_STATS_TTL_SECONDS.
+        
+        Args:
+            use_cache: Return cached statistics while they are fresh
         
         Returns:
             Graph statistics
@@ -291,15 +900,61 @@ class GraphitiClient:
         if not self._initialized:
             await self.initialize()
         
-        # For now, return a simple search to verify the graph is working
-        # More detailed statistics would require direct Neo4j access
+        loop = asyncio.get_running_loop()
+        if use_cache and self._stats_cache and loop.time() - self._stats_cache[0] < self.stats_ttl:
+            return self._stats_cache[1]
+        
         try:
-            test_results = await self.graphiti.search("test")
-            return {
+            records, _, _ = await self.graphiti.driver.execute_query(
+                """
+                CALL { MATCH (n) RETURN count(n) AS total_nodes }
+                CALL { MATCH ()-[r]->() RETURN count(r) AS total_relationships }
+                CALL { MATCH (n:Entity) RETURN count(n) AS entities }
+                CALL { MATCH (n:Episodic) RETURN count(n) AS episodes }
+                CALL { MATCH (n:Community) RETURN count(n) AS communities }
+                CALL { MATCH ()-[r:RELATES_TO]->() RETURN count(r) AS relates_to }
+                CALL { MATCH ()-[r:MENTIONS]->() RETURN count(r) AS mentions }
+                CALL { MATCH ()-[r:HAS_MEMBER]->() RETURN count(r) AS has_member }
+                RETURN total_nodes, total_relationships, entities, episodes, communities,
+                       relates_to, mentions, has_member
+                """
+            )
+            counts = records[0]
+            
+            # Source descriptions look like "Document: <title> (Chunk: <n>)"
+            source_records, _, _ = await self.graphiti.driver.execute_query(
+                """
+                MATCH (e:Episodic)
+                WITH split(e.source_description, ' (Chunk: ')[0] AS source, count(*) AS episodes
+                RETURN source, episodes
+                ORDER BY episodes DESC
+                LIMIT $limit
+                """,
+                params={"limit": 50}
+            )
+            
+            stats = {
                 "graphiti_initialized": True,
-                "sample_search_results": len(test_results),
-                "note": "Detailed statistics require direct Neo4j access"
+                "total_nodes": counts["total_nodes"],
+                "total_relationships": counts["total_relationships"],
+                "node_types": {
+                    "Entity": counts["entities"],
+                    "Episodic": counts["episodes"],
+                    "Community": counts["communities"]
+                },
+                "relationship_types": {
+                    "RELATES_TO": counts["relates_to"],
+                    "MENTIONS": counts["mentions"],
+                    "HAS_MEMBER": counts["has_member"]
+                },
+                "episodes_by_source": {
+                    record["source"]: record["episodes"] for record in source_records
+                },
+                "computed_at": datetime.now(timezone.utc).isoformat()
             }
+            self._stats_cache = (loop.time(), stats)
+            return stats
+            
         except Exception as e:
             return {
                 "graphiti_initialized": False,
@@ -311,9 +966,13 @@ class GraphitiClient:
         if not self._initialized:
             await self.initialize()
         
+        self._stats_cache = None
+        
         try:
             # Use Graphiti's proper clear_data function with the driver
             await clear_data(self.graphiti.driver)
+            # Indices survive clear_data, but the version marker node does not
+            await self._write_schema_version()
             logger.warning("Cleared all data from knowledge graph")
         except Exception as e:
             logger.error(f"Failed to clear graph using clear_data: {e}")
@@ -321,40 +980,49 @@ class GraphitiClient:
             if self.graphiti:
                 await self.graphiti.close()
             
-            # Create OpenAI-compatible clients for reinitialization
-            llm_config = LLMConfig(
-                api_key=self.llm_api_key,
-                model=self.llm_choice,
-                small_model=self.llm_choice,
-                base_url=self.llm_base_url
-            )
-            
-            llm_client = OpenAIClient(config=llm_config)
-            
-            embedder = OpenAIEmbedder(
-                config=OpenAIEmbedderConfig(
-                    api_key=self.embedding_api_key,
-                    embedding_model=self.embedding_model,
-                    embedding_dim=self.embedding_dimensions,
-                    base_url=self.embedding_base_url
-                )
-            )
-            
-            self.graphiti = Graphiti(
-                self.neo4j_uri,
-                self.neo4j_user,
-                self.neo4j_password,
-                llm_client=llm_client,
-                embedder=embedder,
-                cross_encoder=OpenAIRerankerClient(client=llm_client, config=llm_config)
-            )
-            await self.graphiti.build_indices_and_constraints()
+            self.graphiti = self._build_graphiti()
+            await self.migrate_schema(force=True)
             
             logger.warning("Reinitialized Graphiti client (fresh indices created)")
+        
+        await self._bump_generation()
+
+
+# Process-wide Graphiti clients, one per Neo4j URI and user
+_graph_clients: Dict[Tuple[str, str], GraphitiClient] = {}
+
+
+def get_graph_client(
+    neo4j_uri: Optional[str] = None,
+    neo4j_user: Optional[str] = None,
+    neo4j_password: Optional[str] = None
+) -> GraphitiClient:
+    """
+    Get the shared Graphiti client for a Neo4j database.
+    
+    All callers in a process share one Graphiti instance, Neo4j driver pool
+    and set of OpenAI HTTP clients.
+    
+    Args:
+        neo4j_uri: Neo4j connection URI (defaults to NEO4J_URI)
+        neo4j_user: Neo4j username (defaults to NEO4J_USER)
+        neo4j_password: Neo4j password (defaults to NEO4J_PASSWORD)
+    
+    Returns:
+        Shared Graphiti client
+    """
+    uri = neo4j_uri or os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    user = neo4j_user or os.getenv("NEO4J_USER", "neo4j")
+    key = (uri, user)
+    
+    if key not in _graph_clients:
+        _graph_clients[key] = GraphitiClient(uri, user, neo4j_password)
+    
+    return _graph_clients[key]
 
 
 # Global Graphiti client instance
-graph_client = GraphitiClient()
+graph_client = get_graph_client()
 
 
 async def initialize_graph():
@@ -363,8 +1031,9 @@ async def initialize_graph():
 
 
 async def close_graph():
-    """Close graph client."""
-    await graph_client.close()
+    """Close all graph clients."""
+    for client in _graph_clients.values():
+        await client.close()
 
 
 # Convenience functions for common operations
@@ -416,7 +1085,8 @@ async def search_knowledge_graph(
 
 async def get_entity_relationships(
     entity: str,
-    depth: int = 2
+    depth: int = 2,
+    relationship_types: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Get relationships for an entity.
@@ -424,11 +1094,16 @@ async def get_entity_relationships(
     Args:
         entity: Entity name
         depth: Maximum traversal depth
+        relationship_types: Relationship names to follow (all if None)
     
     Returns:
         Entity relationships
     """
-    return await graph_client.get_related_entities(entity, depth=depth)
+    return await graph_client.get_related_entities(
+        entity,
+        relationship_types=relationship_types,
+        depth=depth
+    )
 
 
 async def test_graph_connection() -> bool:
@@ -440,9 +1115,7 @@ async def test_graph_connection() -> bool:
     """
     try:
         await graph_client.initialize()
-        stats = await graph_client.get_graph_statistics()
-        logger.info(f"Graph connection successful. Stats: {stats}")
-        return True
+        return await graph_client.ping()
     except Exception as e:
         logger.error(f"Graph connection test failed: {e}")
         return False
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Lightweight in-process latency metrics for the /metrics endpoint.
+"""
+
+import time
+import bisect
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Bucket upper bounds in seconds (Prometheus client defaults plus 1 ms)
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count, sum, max and percentile estimates."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Initialize histogram.
+
+        Args:
+            buckets: Ascending bucket upper bounds in seconds
+        """
+        self.buckets = sorted(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float):
+        """
+        Record one observation.
+
+        Args:
+            seconds: Observed latency
+        """
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """
+        Estimate a percentile as the upper bound of the bucket that holds it.
+
+        Args:
+            quantile: Quantile between 0 and 1
+
+        Returns:
+            Latency in seconds (capped at the observed max), or None without data
+        """
+        if not self.count:
+            return None
+
+        rank = quantile * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.max_seconds
+                return min(self.buckets[index], self.max_seconds)
+
+        return self.max_seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize the histogram in milliseconds.
+
+        Returns:
+            Count, mean, max, p50/p95/p99 and cumulative bucket counts
+        """
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 3) if seconds is not None else None
+
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            running += bucket_count
+            cumulative[f"le_{ms(bound):g}ms"] = running
+        cumulative["le_inf"] = self.count
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total_seconds / self.count) if self.count else None,
+            "max_ms": ms(self.max_seconds) if self.count else None,
+            "p50_ms": ms(self.percentile(0.50)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "p99_ms": ms(self.percentile(0.99)),
+            "buckets": cumulative
+        }
+
+
+class QueryMetrics:
+    """Pool acquire-wait and per-query latency histograms."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Initialize metrics.
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self._buckets = buckets
+        self.acquire_wait = LatencyHistogram(buckets)
+        self.acquire_timeouts = 0
+        self.queries: Dict[str, LatencyHistogram] = {}
+        self.query_errors: Dict[str, int] = {}
+
+    def observe_query(self, name: str, seconds: float):
+        """Record the latency of a named query."""
+        histogram = self.queries.get(name)
+        if histogram is None:
+            histogram = self.queries[name] = LatencyHistogram(self._buckets)
+        histogram.observe(seconds)
+
+    @contextmanager
+    def time_query(self, name: str) -> Iterator[None]:
+        """
+        Time a named query, counting it as an error if it raises.
+
+        Args:
+            name: Query name reported in the metrics
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.query_errors[name] = self.query_errors.get(name, 0) + 1
+            raise
+        finally:
+            self.observe_query(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize all histograms.
+
+        Returns:
+            Acquire wait, acquire timeouts and per-query latency summaries
+        """
+        return {
+            "acquire_wait": self.acquire_wait.snapshot(),
+            "acquire_timeouts": self.acquire_timeouts,
+            "queries": {
+                name: {**histogram.snapshot(), "errors": self.query_errors.get(name, 0)}
+                for name, histogram in sorted(self.queries.items())
+            }
+        }
@@ -23,6 +23,12 @@ class SearchType(str, Enum):
     GRAPH = "graph"
 
 
+class FusionMethod(str, Enum):
+    """Hybrid search score fusion enumeration."""
+    WEIGHTED = "weighted"
+    RRF = "rrf"
+
+
 # Request Models
 class ChatRequest(BaseModel):
     """Chat request model."""
@@ -41,6 +47,9 @@ class SearchRequest(BaseModel):
     search_type: SearchType = Field(default=SearchType.HYBRID, description="Type of search")
     limit: int = Field(default=10, ge=1, le=50, description="Maximum results")
     filters: Dict[str, Any] = Field(default_factory=dict, description="Search filters")
+    ef_search: Optional[int] = Field(None, ge=10, le=1000, description="HNSW recall/latency trade-off (higher = better recall, slower)")
+    fusion_method: FusionMethod = Field(default=FusionMethod.WEIGHTED, description="Hybrid score fusion: weighted scores or reciprocal rank fusion")
+    candidate_count: Optional[int] = Field(None, ge=1, le=1000, description="Candidates taken from each hybrid search branch before fusion")
     
     model_config = ConfigDict(use_enum_values=True)
 
@@ -210,6 +219,12 @@ class IngestionConfig(BaseModel):
     extract_entities: bool = True
     # New option for faster ingestion
     skip_graph_building: bool = Field(default=False, description="Skip knowledge graph building for faster ingestion")
+    bulk_graph_ingestion: bool = Field(default=False, description="Submit each document's graph episodes through Graphiti's bulk API")
+    queue_graph_building: bool = Field(default=False, description="Queue graph episodes for ingestion.graph_worker instead of building inline")
+    # Near-duplicate chunk detection
+    deduplicate_chunks: bool = Field(default=True, description="Detect near-duplicate chunks before embedding")
+    dedup_threshold: float = Field(default=0.9, ge=0.5, le=1.0, description="Estimated Jaccard similarity for duplicates")
+    dedup_mode: Literal["drop", "link"] = Field(default="link", description="Drop duplicates or keep them linked to the original")
     
     @field_validator('chunk_overlap')
     @classmethod
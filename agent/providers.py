@@ -3,7 +3,7 @@ Flexible provider configuration for LLM and embedding models.
 """
 
 import os
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic_ai.models.openai import OpenAIModel
 import openai
@@ -12,6 +12,26 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Process-wide HTTP clients, one per (base_url, api_key)
+_openai_clients: Dict[Tuple[str, str], openai.AsyncOpenAI] = {}
+
+
+def get_openai_client(base_url: str, api_key: str) -> openai.AsyncOpenAI:
+    """
+    Get a shared OpenAI-compatible client so its HTTP connection pool is reused.
+    
+    Args:
+        base_url: API base URL
+        api_key: API key
+    
+    Returns:
+        Shared client for this base URL and key
+    """
+    key = (base_url, api_key)
+    if key not in _openai_clients:
+        _openai_clients[key] = openai.AsyncOpenAI(base_url=base_url, api_key=api_key)
+    return _openai_clients[key]
+
 
 def get_llm_model(model_choice: Optional[str] = None) -> OpenAIModel:
     """
@@ -41,10 +61,7 @@ def get_embedding_client() -> openai.AsyncOpenAI:
     base_url = os.getenv('EMBEDDING_BASE_URL', 'https://api.openai.com/v1')
     api_key = os.getenv('EMBEDDING_API_KEY', 'ollama')
     
-    return openai.AsyncOpenAI(
-        base_url=base_url,
-        api_key=api_key
-    )
+    return get_openai_client(base_url, api_key)
 
 
 def get_embedding_model() -> str:
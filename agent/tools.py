@@ -23,7 +23,7 @@ from .graph_utils import (
     get_entity_relationships,
     graph_client
 )
-from .models import ChunkResult, GraphSearchResult, DocumentMetadata
+from .models import ChunkResult, GraphSearchResult, DocumentMetadata, FusionMethod
 from .providers import get_embedding_client, get_embedding_model
 
 # Load environment variables
@@ -62,6 +62,7 @@ class VectorSearchInput(BaseModel):
     """Input for vector search tool."""
     query: str = Field(..., description="Search query")
     limit: int = Field(default=10, description="Maximum number of results")
+    ef_search: Optional[int] = Field(None, ge=10, le=1000, description="HNSW candidate list size (recall vs latency)")
 
 
 class GraphSearchInput(BaseModel):
@@ -74,6 +75,9 @@ class HybridSearchInput(BaseModel):
     query: str = Field(..., description="Search query")
     limit: int = Field(default=10, description="Maximum number of results")
     text_weight: float = Field(default=0.3, description="Weight for text similarity (0-1)")
+    ef_search: Optional[int] = Field(None, ge=10, le=1000, description="HNSW candidate list size (recall vs latency)")
+    fusion_method: FusionMethod = Field(default=FusionMethod.WEIGHTED, description="Score fusion: weighted or rrf (reciprocal rank fusion)")
+    candidate_count: Optional[int] = Field(None, ge=1, le=1000, description="Candidates per search branch (default 4 x limit, at least 40)")
 
 
 class DocumentInput(BaseModel):
@@ -85,12 +89,14 @@ class DocumentListInput(BaseModel):
     """Input for listing documents."""
     limit: int = Field(default=20, description="Maximum number of documents")
     offset: int = Field(default=0, description="Number of documents to skip")
+    cursor: Optional[str] = Field(None, description="Keyset cursor from the previous page (next_cursor)")
 
 
 class EntityRelationshipInput(BaseModel):
     """Input for entity relationship query."""
     entity_name: str = Field(..., description="Name of the entity")
-    depth: int = Field(default=2, description="Maximum traversal depth")
+    depth: int = Field(default=2, ge=1, le=5, description="Maximum traversal depth")
+    relationship_types: Optional[List[str]] = Field(None, description="Relationship names to follow (e.g. WORKS_FOR)")
 
 
 class EntityTimelineInput(BaseModel):
@@ -98,6 +104,8 @@ class EntityTimelineInput(BaseModel):
     entity_name: str = Field(..., description="Name of the entity")
     start_date: Optional[str] = Field(None, description="Start date (ISO format)")
     end_date: Optional[str] = Field(None, description="End date (ISO format)")
+    limit: int = Field(default=50, ge=1, le=500, description="Maximum number of facts")
+    offset: int = Field(default=0, ge=0, description="Number of facts to skip (for paging)")
 
 
 # Tool Implementation Functions
@@ -118,7 +126,8 @@ async def vector_search_tool(input_data: VectorSearchInput) -> List[ChunkResult]
         # Perform vector search
         results = await vector_search(
             embedding=embedding,
-            limit=input_data.limit
+            limit=input_data.limit,
+            ef_search=input_data.ef_search
         )
 
         # Convert to ChunkResult models
@@ -191,7 +200,10 @@ async def hybrid_search_tool(input_data: HybridSearchInput) -> List[ChunkResult]
             embedding=embedding,
             query_text=input_data.query,
             limit=input_data.limit,
-            text_weight=input_data.text_weight
+            text_weight=input_data.text_weight,
+            ef_search=input_data.ef_search,
+            fusion_method=input_data.fusion_method.value,
+            candidate_count=input_data.candidate_count
         )
         
         # Convert to ChunkResult models
@@ -251,7 +263,8 @@ async def list_documents_tool(input_data: DocumentListInput) -> List[DocumentMet
     try:
         documents = await list_documents(
             limit=input_data.limit,
-            offset=input_data.offset
+            offset=input_data.offset,
+            cursor=input_data.cursor
         )
         
         # Convert to DocumentMetadata models
@@ -286,7 +299,8 @@ async def get_entity_relationships_tool(input_data: EntityRelationshipInput) ->
     try:
         return await get_entity_relationships(
             entity=input_data.entity_name,
-            depth=input_data.depth
+            depth=input_data.depth,
+            relationship_types=input_data.relationship_types
         )
         
     except Exception as e:
@@ -324,7 +338,9 @@ async def get_entity_timeline_tool(input_data: EntityTimelineInput) -> List[Dict
         timeline = await graph_client.get_entity_timeline(
             entity_name=input_data.entity_name,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            limit=input_data.limit,
+            offset=input_data.offset
         )
         
         return timeline
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark knowledge graph episode throughput against a local Neo4j.
+
+Chunks a sample document and submits it through GraphBuilder at several
+concurrency levels, printing episodes/s for each. Requires the Neo4j and
+LLM settings from .env (see docker-compose.yml for the local Neo4j).
+
+Usage:
+    python benchmarks/graph_ingestion_benchmark.py --document big_tech_docs/doc1_openai_funding.md
+    python benchmarks/graph_ingestion_benchmark.py --concurrency 1 3 6 --rate 0
+    python benchmarks/graph_ingestion_benchmark.py --bulk --concurrency 1
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingestion.chunker import ChunkingConfig, create_chunker
+from ingestion.graph_builder import create_graph_builder
+
+
+async def run_benchmark(document: str, concurrency_levels, rate: float, max_chunks: int, bulk: bool):
+    """Submit the same document once per concurrency level and report throughput."""
+    with open(document, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    chunker = create_chunker(ChunkingConfig(chunk_size=800, chunk_overlap=100, use_semantic_splitting=False))
+    chunks = chunker.chunk_document(content=content, title="Benchmark", source=document)[:max_chunks]
+
+    print(f"Document: {document} ({len(chunks)} chunks, {'bulk' if bulk else 'per-episode'} submission)")
+    print(f"{'concurrency':>12} {'rate/s':>8} {'episodes':>9} {'errors':>7} {'seconds':>9} {'episodes/s':>11}")
+
+    for concurrency in concurrency_levels:
+        builder = create_graph_builder(max_concurrency=concurrency, episodes_per_second=rate, use_bulk=bulk)
+        try:
+            result = await builder.add_document_to_graph(
+                chunks=chunks,
+                document_title="Benchmark",
+                document_source=f"benchmark_c{concurrency}_{os.path.basename(document)}"
+            )
+        finally:
+            await builder.close()
+
+        print(
+            f"{concurrency:>12} {rate:>8.1f} {result['episodes_created']:>9} "
+            f"{len(result['errors']):>7} {result['elapsed_seconds']:>9.1f} "
+            f"{result['episodes_per_second']:>11.2f}"
+        )
+
+
+def main():
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark graph episode throughput")
+    parser.add_argument("--document", "-d", default="big_tech_docs/doc1_openai_funding.md", help="Markdown document to ingest")
+    parser.add_argument("--concurrency", "-c", type=int, nargs="+", default=[1, 3, 6], help="Concurrency levels to test")
+    parser.add_argument("--rate", type=float, default=0.0, help="Episodes per second limit (0 disables)")
+    parser.add_argument("--bulk", action="store_true", help="Use Graphiti bulk episode ingestion")
+    parser.add_argument("--max-chunks", type=int, default=12, help="Maximum chunks to submit per run")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.document, args.concurrency, args.rate, args.max_chunks, args.bulk))
+
+
+if __name__ == "__main__":
+    main()
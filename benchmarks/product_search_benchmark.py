@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Benchmark filtered product search on a synthetic catalog.
+
+Generates --products products (default 100k) with clustered 1536-dimensional
+embeddings, skewed categories and skewed compliance tags in a separate
+product_benchmark schema (the real products table is not touched), then runs
+the same queries for several filters with:
+
+    post-filter  HNSW top-k filtered afterwards (the previous search_products)
+    search       search_products (index prefilter or filtered HNSW scan)
+
+and reports latency, how many of the requested results came back and recall
+against an exact search. Requires DATABASE_URL and the search_products
+function from sql/evi_schema_additions.sql. Building the catalog and its HNSW
+index takes several minutes; it is reused by later runs.
+
+Usage:
+    python benchmarks/product_search_benchmark.py
+    python benchmarks/product_search_benchmark.py --queries 200 --limit 20
+    python benchmarks/product_search_benchmark.py --rebuild --products 20000
+    python benchmarks/product_search_benchmark.py --drop
+"""
+
+import os
+import time
+import asyncio
+import argparse
+
+import asyncpg
+from dotenv import load_dotenv
+
+SCHEMA = "product_benchmark"
+CATEGORIES = 20
+TAGS = 200
+INSERT_BATCH = 10000
+
+POST_FILTER_QUERY = """
+    SELECT p.id
+    FROM products p
+    WHERE p.embedding IS NOT NULL
+        AND ($2::text[] IS NULL OR p.compliance_tags && $2)
+        AND ($3::text IS NULL OR p.category = $3)
+    ORDER BY p.embedding <=> $1::text::vector
+    LIMIT $4
+"""
+
+EXACT_QUERY = """
+    SELECT p.id
+    FROM products p
+    WHERE p.embedding IS NOT NULL
+        AND ($2::text[] IS NULL OR p.compliance_tags && $2)
+        AND ($3::text IS NULL OR p.category = $3)
+    ORDER BY (p.embedding <=> $1::text::vector) + 0
+    LIMIT $4
+"""
+
+SEARCH_QUERY = """
+    SELECT product_id AS id
+    FROM search_products($1::text::vector, NULL, $2, $4, $3, $5)
+"""
+
+
+async def build_catalog(conn: asyncpg.Connection, products: int, seed: float):
+    """Create the synthetic catalog and its indexes in the benchmark schema."""
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    await conn.execute(f"CREATE TABLE {SCHEMA}.products (LIKE public.products INCLUDING DEFAULTS)")
+    await conn.execute("SELECT setseed($1)", seed)
+
+    # One random direction per category; products scatter around theirs
+    await conn.execute(f"""
+        CREATE TABLE {SCHEMA}.centroids AS
+        SELECT c AS category_id,
+            (SELECT array_agg(random() * 2 - 1) FROM generate_series(1, 1536) WHERE c >= 0) AS v
+        FROM generate_series(0, {CATEGORIES - 1}) c
+    """)
+
+    start = time.perf_counter()
+    for first in range(1, products + 1, INSERT_BATCH):
+        last = min(first + INSERT_BATCH - 1, products)
+        # Categories and tags are skewed so some filters are broad and some rare
+        await conn.execute(f"""
+            INSERT INTO {SCHEMA}.products (name, description, url, category, embedding, compliance_tags)
+            SELECT
+                'Product ' || i,
+                'Synthetic benchmark product ' || i,
+                'https://example.com/products/' || i,
+                'category_' || lpad(pick.category_id::text, 2, '0'),
+                emb.embedding,
+                tag.tags
+            FROM generate_series($1::int, $2::int) i
+            CROSS JOIN LATERAL (
+                SELECT floor({CATEGORIES} * random() ^ 2)::int AS category_id WHERE i > 0
+            ) pick
+            JOIN {SCHEMA}.centroids ce ON ce.category_id = pick.category_id
+            CROSS JOIN LATERAL (
+                SELECT array_agg(ce.v[d] + (random() - 0.5) ORDER BY d)::vector(1536) AS embedding
+                FROM generate_series(1, 1536) d
+            ) emb
+            CROSS JOIN LATERAL (
+                SELECT array_agg(DISTINCT 'TAG_' || lpad((floor({TAGS} * random() ^ 3) + 1)::text, 3, '0')) AS tags
+                FROM generate_series(1, 1 + i % 4) t
+            ) tag
+        """, first, last)
+        print(f"  inserted {last:>7} products ({time.perf_counter() - start:.0f}s)")
+
+    print("  building indexes...")
+    await conn.execute("SET maintenance_work_mem = '1GB'")
+    await conn.execute(
+        f"CREATE INDEX ON {SCHEMA}.products USING hnsw (embedding vector_cosine_ops) "
+        "WITH (m = 16, ef_construction = 64)"
+    )
+    await conn.execute(f"CREATE INDEX ON {SCHEMA}.products USING GIN (compliance_tags)")
+    await conn.execute(f"CREATE INDEX ON {SCHEMA}.products (category)")
+    await conn.execute(f"ANALYZE {SCHEMA}.products")
+    print(f"  catalog ready in {time.perf_counter() - start:.0f}s")
+
+
+async def pick_filters(conn: asyncpg.Connection):
+    """Choose broad and selective tag/category filters from the generated data."""
+    tags = await conn.fetch("""
+        SELECT tag, count(*) AS products
+        FROM products, unnest(compliance_tags) tag
+        GROUP BY tag ORDER BY products DESC, tag
+    """)
+    categories = await conn.fetch("""
+        SELECT category, count(*) AS products
+        FROM products GROUP BY category ORDER BY products DESC, category
+    """)
+
+    common_tag = tags[0]["tag"]
+    mid_tag = tags[len(tags) // 4]["tag"]
+    rare_tag = tags[-1]["tag"]
+    common_category = categories[0]["category"]
+    rare_category = categories[-1]["category"]
+
+    return [
+        ("no filter", None, None),
+        (f"tag {common_tag}", [common_tag], None),
+        (f"tag {mid_tag}", [mid_tag], None),
+        (f"tag {rare_tag}", [rare_tag], None),
+        (f"category {common_category}", None, common_category),
+        (f"category {rare_category}", None, rare_category),
+        (f"tag {mid_tag} + {rare_category}", [mid_tag], rare_category)
+    ]
+
+
+def percentile(values, quantile: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+async def timed_ids(conn: asyncpg.Connection, query: str, *args):
+    """Run a query and return (elapsed ms, result ids)."""
+    start = time.perf_counter()
+    rows = await conn.fetch(query, *args)
+    return (time.perf_counter() - start) * 1000, [row["id"] for row in rows]
+
+
+async def run_benchmark(args):
+    """Build (or reuse) the catalog, run every filter and print a report."""
+    conn = await asyncpg.connect(
+        os.getenv("DATABASE_URL"),
+        server_settings={"search_path": f"{SCHEMA}, public"}
+    )
+
+    try:
+        if args.drop:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            print(f"Dropped schema {SCHEMA}")
+            return
+
+        exists = await conn.fetchval("SELECT to_regclass($1)", f"{SCHEMA}.products")
+        count = await conn.fetchval(f"SELECT count(*) FROM {SCHEMA}.products") if exists else 0
+        if args.rebuild or count != args.products:
+            print(f"Building synthetic catalog of {args.products} products in schema {SCHEMA}...")
+            await build_catalog(conn, args.products, args.seed)
+
+        version = await conn.fetchval("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        queries = [
+            row["embedding"]
+            for row in await conn.fetch(
+                "SELECT embedding::text AS embedding FROM products TABLESAMPLE SYSTEM (1) REPEATABLE (7) LIMIT $1",
+                args.queries
+            )
+        ]
+
+        print(
+            f"pgvector {version}, {args.products} products, {len(queries)} queries, "
+            f"top {args.limit}, exact threshold {args.exact_threshold}"
+        )
+        print(
+            f"{'filter':<34} {'matches':>8} | {'method':<11} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'filled':>7} {'recall':>7}"
+        )
+
+        for label, tags, category in await pick_filters(conn):
+            matches = await conn.fetchval(
+                "SELECT count(*) FROM products WHERE ($1::text[] IS NULL OR compliance_tags && $1) "
+                "AND ($2::text IS NULL OR category = $2)",
+                tags,
+                category
+            )
+            expected = min(args.limit, matches)
+
+            exact = [
+                set((await timed_ids(conn, EXACT_QUERY, query, tags, category, args.limit))[1])
+                for query in queries
+            ]
+
+            methods = [
+                ("post-filter", POST_FILTER_QUERY, (tags, category, args.limit)),
+                ("search", SEARCH_QUERY, (tags, category, args.limit, args.exact_threshold))
+            ]
+            for index, (method, query_sql, params) in enumerate(methods):
+                latencies, filled, recall = [], [], []
+                for query, truth in zip(queries, exact):
+                    elapsed, ids = await timed_ids(conn, query_sql, query, *params)
+                    latencies.append(elapsed)
+                    filled.append(len(ids) / expected if expected else 1.0)
+                    recall.append(len(truth & set(ids)) / len(truth) if truth else 1.0)
+
+                prefix = f"{label:<34} {matches:>8}" if index == 0 else f"{'':<34} {'':>8}"
+                print(
+                    f"{prefix} | {method:<11} {percentile(latencies, 0.5):>8.2f} "
+                    f"{percentile(latencies, 0.95):>8.2f} {sum(filled) / len(filled):>7.1%} "
+                    f"{sum(recall) / len(recall):>7.1%}"
+                )
+    finally:
+        await conn.close()
+
+
+def main():
+    """Parse arguments and run the benchmark."""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Benchmark filtered product search")
+    parser.add_argument("--products", type=int, default=100000, help="Synthetic catalog size")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per filter")
+    parser.add_argument("--limit", type=int, default=10, help="Results per query")
+    parser.add_argument("--exact-threshold", type=int, default=int(os.getenv("PRODUCT_SEARCH_EXACT_THRESHOLD", "2000")), help="search_products exact_threshold")
+    parser.add_argument("--seed", type=float, default=0.42, help="Data generation seed (-1 to 1)")
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate the catalog even if it exists")
+    parser.add_argument("--drop", action="store_true", help="Drop the benchmark schema and exit")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
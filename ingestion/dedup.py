@@ -0,0 +1,307 @@
+"""
+Near-duplicate chunk detection using MinHash signatures and LSH banding.
+"""
+
+import re
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+
+import numpy as np
+
+from .chunker import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime used for the universal hash family (same choice as datasketch)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+DEDUP_MODES = ("drop", "link")
+
+
+@dataclass
+class DeduplicationConfig:
+    """Configuration for near-duplicate detection."""
+    num_perm: int = 128
+    shingle_size: int = 5
+    threshold: float = 0.9
+    mode: str = "link"
+    seed: int = 1
+
+    def __post_init__(self):
+        """Validate configuration."""
+        if self.num_perm <= 0:
+            raise ValueError("Number of permutations must be positive")
+        if self.shingle_size <= 0:
+            raise ValueError("Shingle size must be positive")
+        if not 0.0 < self.threshold <= 1.0:
+            raise ValueError("Threshold must be between 0 and 1")
+        if self.mode not in DEDUP_MODES:
+            raise ValueError(f"Mode must be one of {DEDUP_MODES}")
+
+
+class MinHasher:
+    """Computes MinHash signatures over word shingles."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """
+        Initialize MinHasher.
+
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            shingle_size: Number of words per shingle
+            seed: Seed for the permutation parameters
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> List[str]:
+        """Split normalized text into overlapping word shingles."""
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+
+        if not tokens:
+            return []
+
+        if len(tokens) <= self.shingle_size:
+            return [" ".join(tokens)]
+
+        return [
+            " ".join(tokens[i:i + self.shingle_size])
+            for i in range(len(tokens) - self.shingle_size + 1)
+        ]
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: Text to sign
+
+        Returns:
+            Array of num_perm uint64 values
+        """
+        shingles = set(self.shingles(text))
+
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+
+        hashes = np.array(
+            [
+                int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                for s in shingles
+            ],
+            dtype=np.uint64
+        )
+
+        # (a * h + b) mod p for every (permutation, shingle) pair; uint64 overflow is intended
+        permuted = np.bitwise_and(
+            (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME,
+            _MAX_HASH
+        )
+
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+        """Estimate Jaccard similarity from two signatures."""
+        return float(np.mean(signature_a == signature_b))
+
+
+def optimal_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Choose LSH band parameters for a similarity threshold.
+
+    The S-curve of banded LSH crosses 50% candidate probability at roughly
+    (1/b)^(1/r); pick the (bands, rows) split whose crossing point is closest
+    to, but not above, the requested threshold so true duplicates are not missed.
+
+    Args:
+        num_perm: Signature length
+        threshold: Target Jaccard similarity
+
+    Returns:
+        Tuple of (bands, rows)
+    """
+    best = (num_perm, 1)
+    best_distance = float("inf")
+
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if bands == 0:
+            break
+
+        crossing = (1.0 / bands) ** (1.0 / rows)
+        if crossing > threshold:
+            continue
+
+        distance = threshold - crossing
+        if distance < best_distance:
+            best = (bands, rows)
+            best_distance = distance
+
+    return best
+
+
+class MinHashLSH:
+    """Banded LSH index over MinHash signatures."""
+
+    def __init__(self, num_perm: int = 128, threshold: float = 0.9):
+        """
+        Initialize LSH index.
+
+        Args:
+            num_perm: Signature length
+            threshold: Target Jaccard similarity
+        """
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.bands, self.rows = optimal_bands(num_perm, threshold)
+        self._buckets: List[Dict[bytes, List[Any]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[Any, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """Hashable key for every band of a signature."""
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def insert(self, key: Any, signature: np.ndarray):
+        """Add a signature to the index."""
+        if key in self._signatures:
+            return
+
+        self._signatures[key] = signature
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band_key, []).append(key)
+
+    def query(self, signature: np.ndarray) -> List[Any]:
+        """Return keys sharing at least one band with the signature."""
+        candidates = []
+        seen = set()
+
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            for key in bucket.get(band_key, ()):
+                if key not in seen:
+                    seen.add(key)
+                    candidates.append(key)
+
+        return candidates
+
+    def find_duplicate(self, signature: np.ndarray) -> Optional[Tuple[Any, float]]:
+        """
+        Find the most similar indexed signature above the threshold.
+
+        Args:
+            signature: Signature to look up
+
+        Returns:
+            Tuple of (key, estimated similarity) or None
+        """
+        best = None
+
+        for key in self.query(signature):
+            similarity = MinHasher.similarity(signature, self._signatures[key])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+
+        return best
+
+
+class ChunkDeduplicator:
+    """Drops or links near-duplicate chunks within and across documents."""
+
+    def __init__(self, config: Optional[DeduplicationConfig] = None):
+        """
+        Initialize deduplicator.
+
+        The LSH index lives for the lifetime of this object, so one instance
+        per ingestion run detects duplicates across every document in the run.
+
+        Args:
+            config: Deduplication configuration
+        """
+        self.config = config or DeduplicationConfig()
+        self.hasher = MinHasher(
+            num_perm=self.config.num_perm,
+            shingle_size=self.config.shingle_size,
+            seed=self.config.seed
+        )
+        self.index = MinHashLSH(
+            num_perm=self.config.num_perm,
+            threshold=self.config.threshold
+        )
+
+    def deduplicate(
+        self,
+        chunks: List[DocumentChunk],
+        document_source: str
+    ) -> List[DocumentChunk]:
+        """
+        Detect near-duplicate chunks and drop or link them.
+
+        In "drop" mode duplicates are removed from the result. In "link" mode
+        they are kept with a "duplicate_of" metadata entry pointing at the
+        first occurrence, so callers can skip embedding and graph building
+        for them while preserving the full document.
+
+        Args:
+            chunks: Chunks of a single document
+            document_source: Source of the document
+
+        Returns:
+            Chunks after deduplication
+        """
+        result = []
+        duplicates = 0
+
+        for chunk in chunks:
+            signature = self.hasher.signature(chunk.content)
+            match = self.index.find_duplicate(signature)
+
+            if match is None:
+                self.index.insert((document_source, chunk.index), signature)
+                result.append(chunk)
+                continue
+
+            duplicates += 1
+            (original_source, original_index), similarity = match
+
+            if self.config.mode == "link":
+                chunk.metadata = {
+                    **chunk.metadata,
+                    "duplicate_of": {
+                        "source": original_source,
+                        "chunk_index": original_index,
+                        "similarity": round(similarity, 4)
+                    }
+                }
+                result.append(chunk)
+
+        if duplicates:
+            action = "Linked" if self.config.mode == "link" else "Dropped"
+            logger.info(f"{action} {duplicates} near-duplicate chunks in {document_source}")
+
+        return result
+
+
+def is_duplicate_chunk(chunk: DocumentChunk) -> bool:
+    """Check whether a chunk was linked to an earlier near-duplicate."""
+    return "duplicate_of" in chunk.metadata
+
+
+# Factory function
+def create_deduplicator(config: Optional[DeduplicationConfig] = None) -> ChunkDeduplicator:
+    """Create chunk deduplicator instance."""
+    return ChunkDeduplicator(config)
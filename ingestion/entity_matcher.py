@@ -0,0 +1,292 @@
+"""
+Single-pass dictionary entity matching with an Aho-Corasick automaton.
+"""
+
+import os
+import json
+import logging
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Built-in dictionaries; override per entity type with ENTITY_DICTIONARIES_PATH
+DEFAULT_ENTITY_DICTIONARIES: Dict[str, Dict[str, Any]] = {
+    "companies": {
+        "case_sensitive": False,
+        "terms": [
+            "Google", "Microsoft", "Apple", "Amazon", "Meta", "Facebook",
+            "Tesla", "OpenAI", "Anthropic", "Nvidia", "Intel", "AMD",
+            "IBM", "Oracle", "Salesforce", "Adobe", "Netflix", "Uber",
+            "Airbnb", "Spotify", "Twitter", "LinkedIn", "Snapchat",
+            "TikTok", "ByteDance", "Baidu", "Alibaba", "Tencent",
+            "Samsung", "Sony", "Huawei", "Xiaomi", "DeepMind"
+        ]
+    },
+    "technologies": {
+        "case_sensitive": False,
+        "terms": [
+            "AI", "artificial intelligence", "machine learning", "ML",
+            "deep learning", "neural network", "LLM", "large language model",
+            "GPT", "transformer", "NLP", "natural language processing",
+            "computer vision", "reinforcement learning", "generative AI",
+            "foundation model", "multimodal", "chatbot", "API",
+            "cloud computing", "edge computing", "quantum computing",
+            "blockchain", "cryptocurrency", "IoT", "5G", "AR", "VR",
+            "autonomous vehicles", "robotics", "automation"
+        ]
+    },
+    "people": {
+        "case_sensitive": True,
+        "terms": [
+            "Elon Musk", "Jeff Bezos", "Tim Cook", "Satya Nadella",
+            "Sundar Pichai", "Mark Zuckerberg", "Sam Altman",
+            "Dario Amodei", "Daniela Amodei", "Jensen Huang",
+            "Bill Gates", "Larry Page", "Sergey Brin", "Jack Dorsey",
+            "Reed Hastings", "Marc Benioff", "Andy Jassy"
+        ]
+    },
+    "locations": {
+        "case_sensitive": True,
+        "terms": [
+            "Silicon Valley", "San Francisco", "Seattle", "Austin",
+            "New York", "Boston", "London", "Tel Aviv", "Singapore",
+            "Beijing", "Shanghai", "Tokyo", "Seoul", "Bangalore",
+            "Mountain View", "Cupertino", "Redmond", "Menlo Park"
+        ]
+    }
+}
+
+
+def _fold(text: str) -> str:
+    """Lowercase text while keeping character offsets aligned with the original."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+
+    # Some characters (e.g. 'İ') lowercase to several code points
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+def _is_word_char(ch: str) -> bool:
+    """Check whether a character is part of a word (same as regex \\w)."""
+    return ch.isalnum() or ch == "_"
+
+
+class AhoCorasickAutomaton:
+    """Multi-pattern string matcher that scans text once for all patterns."""
+
+    def __init__(self):
+        """Initialize empty automaton."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, value: Any):
+        """
+        Add a pattern to the automaton.
+
+        Args:
+            pattern: Pattern to match
+            value: Value reported for every match of the pattern
+        """
+        if not pattern:
+            return
+
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+
+        self._output[state].append((len(pattern), value))
+        self._built = False
+
+    def build(self):
+        """Compute failure links breadth-first."""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """
+        Find every pattern occurrence in a text.
+
+        Args:
+            text: Text to scan
+
+        Yields:
+            Tuples of (start, end, value) for each match
+        """
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+
+        for index, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            if output[state]:
+                end = index + 1
+                for length, value in output[state]:
+                    yield end - length, end, value
+
+
+class EntityMatcher:
+    """Finds dictionary entities of every type in a single pass over the text."""
+
+    def __init__(self, dictionaries: Optional[Dict[str, Any]] = None):
+        """
+        Initialize entity matcher.
+
+        Args:
+            dictionaries: Mapping of entity type to a list of terms, or to a dict
+                with "terms" and an optional "case_sensitive" flag
+        """
+        self.dictionaries = _normalize_dictionaries(dictionaries or DEFAULT_ENTITY_DICTIONARIES)
+        self.entity_types = list(self.dictionaries.keys())
+        self._automaton = AhoCorasickAutomaton()
+
+        for entity_type, spec in self.dictionaries.items():
+            for term in spec["terms"]:
+                self._automaton.add(_fold(term), (entity_type, term, spec["case_sensitive"]))
+
+        self._automaton.build()
+
+    @property
+    def term_count(self) -> int:
+        """Total number of dictionary terms."""
+        return sum(len(spec["terms"]) for spec in self.dictionaries.values())
+
+    def find_entities(
+        self,
+        text: str,
+        entity_types: Optional[List[str]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Find all dictionary entities in a text.
+
+        Matches must start and end on word boundaries. Case-insensitive
+        dictionaries match any casing; case-sensitive ones require the
+        exact dictionary spelling.
+
+        Args:
+            text: Text to scan
+            entity_types: Entity types to report (defaults to all)
+
+        Returns:
+            Mapping of entity type to distinct terms in order of first appearance
+        """
+        wanted = entity_types or self.entity_types
+        found: Dict[str, List[str]] = {entity_type: [] for entity_type in wanted}
+        seen = set()
+        length = len(text)
+
+        for start, end, (entity_type, term, case_sensitive) in self._automaton.iter_matches(_fold(text)):
+            if entity_type not in found or (entity_type, term) in seen:
+                continue
+
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < length and _is_word_char(text[end]):
+                continue
+            if case_sensitive and text[start:end] != term:
+                continue
+
+            seen.add((entity_type, term))
+            found[entity_type].append(term)
+
+        return found
+
+
+def _normalize_dictionaries(dictionaries: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Normalize dictionary specs to {"case_sensitive": bool, "terms": [...]}."""
+    normalized = {}
+
+    for entity_type, spec in dictionaries.items():
+        if isinstance(spec, dict):
+            terms = spec.get("terms", [])
+            case_sensitive = bool(spec.get("case_sensitive", False))
+        else:
+            terms = spec
+            case_sensitive = False
+
+        normalized[entity_type] = {
+            "case_sensitive": case_sensitive,
+            "terms": [term for term in dict.fromkeys(terms) if term and term.strip()]
+        }
+
+    return normalized
+
+
+def load_entity_dictionaries(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Load entity dictionaries, applying an optional JSON override file.
+
+    The file maps entity types to term lists or {"terms", "case_sensitive"}
+    objects. Types in the file replace the built-in dictionary of that type;
+    new types are added.
+
+    Args:
+        path: JSON file path (defaults to ENTITY_DICTIONARIES_PATH)
+
+    Returns:
+        Entity dictionaries
+    """
+    dictionaries = _normalize_dictionaries(DEFAULT_ENTITY_DICTIONARIES)
+    path = path or os.getenv("ENTITY_DICTIONARIES_PATH")
+
+    if not path:
+        return dictionaries
+
+    with open(path, "r", encoding="utf-8") as f:
+        overrides = json.load(f)
+
+    if not isinstance(overrides, dict):
+        raise ValueError(f"Entity dictionary file must contain a JSON object: {path}")
+
+    dictionaries.update(_normalize_dictionaries(overrides))
+    logger.info(f"Loaded entity dictionaries from {path}: {', '.join(overrides.keys())}")
+
+    return dictionaries
+
+
+_default_matcher: Optional[EntityMatcher] = None
+
+
+def get_entity_matcher() -> EntityMatcher:
+    """Get the process-wide entity matcher, building it on first use."""
+    global _default_matcher
+
+    if _default_matcher is None:
+        _default_matcher = EntityMatcher(load_entity_dictionaries())
+
+    return _default_matcher
@@ -4,6 +4,7 @@ Knowledge graph builder for extracting entities and relationships.
 
 import os
 import logging
+import hashlib
 from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timezone
 import asyncio
@@ -13,16 +14,17 @@ from graphiti_core import Graphiti
 from dotenv import load_dotenv
 
 from .chunker import DocumentChunk
+from .entity_matcher import EntityMatcher, get_entity_matcher
 
 # Import graph utilities
 try:
-    from ..agent.graph_utils import GraphitiClient
+    from ..agent.graph_utils import get_graph_client, close_graph
 except ImportError:
     # For direct execution or testing
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from agent.graph_utils import GraphitiClient
+    from agent.graph_utils import get_graph_client, close_graph
 
 # Load environment variables
 load_dotenv()
@@ -30,12 +32,70 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 
+class RateLimiter:
+    """Spaces out operations so they start at most `rate_per_second` times per second."""
+    
+    def __init__(self, rate_per_second: Optional[float] = None):
+        """
+        Initialize rate limiter.
+        
+        Args:
+            rate_per_second: Maximum operations per second (None or <= 0 disables limiting)
+        """
+        self.interval = 1.0 / rate_per_second if rate_per_second and rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until the next operation is allowed to start."""
+        if not self.interval:
+            return
+        
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
 class GraphBuilder:
     """Builds knowledge graph from document chunks."""
     
-    def __init__(self):
-        """Initialize graph builder."""
-        self.graph_client = GraphitiClient()
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        episodes_per_second: Optional[float] = None,
+        use_bulk: Optional[bool] = None,
+        bulk_size: Optional[int] = None,
+        entity_matcher: Optional[EntityMatcher] = None
+    ):
+        """
+        Initialize graph builder.
+        
+        Args:
+            max_concurrency: Maximum submissions to Graphiti in flight at once
+            episodes_per_second: Maximum submission rate (0 disables limiting)
+            use_bulk: Submit a document's episodes through Graphiti's bulk API
+            bulk_size: Episodes per bulk submission
+            entity_matcher: Dictionary entity matcher (defaults to the shared one)
+        """
+        self.graph_client = get_graph_client()
+        self.max_concurrency = max_concurrency or int(os.getenv("GRAPH_MAX_CONCURRENCY", "3"))
+        self.episodes_per_second = (
+            episodes_per_second
+            if episodes_per_second is not None
+            else float(os.getenv("GRAPH_EPISODES_PER_SECOND", "2.0"))
+        )
+        self.use_bulk = (
+            use_bulk
+            if use_bulk is not None
+            else os.getenv("GRAPH_BULK_INGESTION", "false").lower() == "true"
+        )
+        self.bulk_size = bulk_size or int(os.getenv("GRAPH_BULK_SIZE", "10"))
+        self.entity_matcher = entity_matcher or get_entity_matcher()
         self._initialized = False
     
     async def initialize(self):
@@ -45,10 +105,13 @@ class GraphBuilder:
             self._initialized = True
     
     async def close(self):
-        """Close graph client."""
-        if self._initialized:
-            await self.graph_client.close()
-            self._initialized = False
+        """
+        Release the builder's use of the graph client.
+        
+        The client is shared by the whole process (see get_graph_client), so
+        it is left open; close_graph() shuts it down at process exit.
+        """
+        self._initialized = False
     
     async def add_document_to_graph(
         self,
@@ -56,17 +119,22 @@ class GraphBuilder:
         document_title: str,
         document_source: str,
         document_metadata: Optional[Dict[str, Any]] = None,
-        batch_size: int = 3  # Reduced batch size for Graphiti
+        batch_size: Optional[int] = None,
+        skip_existing: bool = True
     ) -> Dict[str, Any]:
         """
         Add document chunks to the knowledge graph.
         
+        Episode ids are derived from the document source and a hash of the
+        episode content, so re-ingesting an unchanged chunk yields the same id.
+        
         Args:
             chunks: List of document chunks
             document_title: Title of the document
             document_source: Source of the document
             document_metadata: Additional metadata
-            batch_size: Number of chunks to process in each batch
+            batch_size: Maximum episodes in flight (defaults to max_concurrency)
+            skip_existing: Skip episodes already present in the graph
         
         Returns:
             Processing results
@@ -75,7 +143,7 @@ class GraphBuilder:
             await self.initialize()
         
         if not chunks:
-            return {"episodes_created": 0, "errors": []}
+            return {"episodes_created": 0, "episodes_skipped": 0, "errors": []}
         
         logger.info(f"Adding {len(chunks)} chunks to knowledge graph for document: {document_title}")
         logger.info("⚠️ Large chunks will be truncated to avoid Graphiti token limits.")
@@ -85,64 +153,249 @@ class GraphBuilder:
         if oversized_chunks:
             logger.warning(f"Found {len(oversized_chunks)} chunks over 6000 chars that will be truncated: {oversized_chunks}")
         
-        episodes_created = 0
-        errors = []
+        episodes = self.build_episodes(chunks, document_title, document_source, document_metadata)
         
-        # Process chunks one by one to avoid overwhelming Graphiti
-        for i, chunk in enumerate(chunks):
-            try:
-                # Create episode ID
-                episode_id = f"{document_source}_{chunk.index}_{datetime.now().timestamp()}"
-                
-                # Prepare episode content with size limits
-                episode_content = self._prepare_episode_content(
-                    chunk,
-                    document_title,
-                    document_metadata
-                )
-                
-                # Create source description (shorter)
-                source_description = f"Document: {document_title} (Chunk: {chunk.index})"
-                
-                # Add episode to graph
-                await self.graph_client.add_episode(
-                    episode_id=episode_id,
-                    content=episode_content,
-                    source=source_description,
-                    timestamp=datetime.now(timezone.utc),
-                    metadata={
-                        "document_title": document_title,
-                        "document_source": document_source,
-                        "chunk_index": chunk.index,
-                        "original_length": len(chunk.content),
-                        "processed_length": len(episode_content)
-                    }
-                )
-                
-                episodes_created += 1
-                logger.info(f"✓ Added episode {episode_id} to knowledge graph ({episodes_created}/{len(chunks)})")
-                
-                # Small delay between each episode to reduce API pressure
-                if i < len(chunks) - 1:
-                    await asyncio.sleep(0.5)
-                    
-            except Exception as e:
-                error_msg = f"Failed to add chunk {chunk.index} to graph: {str(e)}"
-                logger.error(error_msg)
-                errors.append(error_msg)
-                
-                # Continue processing other chunks even if one fails
-                continue
+        if skip_existing:
+            episodes = await self._filter_existing_episodes(episodes)
+        skipped = len(chunks) - len(episodes)
+        
+        if skipped:
+            logger.info(f"Skipping {skipped} chunks already in the knowledge graph")
+        
+        submission = await self._submit_episodes(
+            episodes,
+            max_concurrency=batch_size or self.max_concurrency,
+            bulk_size=self.bulk_size if self.use_bulk else None
+        )
         
         result = {
-            "episodes_created": episodes_created,
+            "episodes_created": submission["episodes_created"],
+            "episodes_skipped": skipped,
             "total_chunks": len(chunks),
-            "errors": errors
+            "errors": submission["errors"],
+            "elapsed_seconds": submission["elapsed_seconds"],
+            "episodes_per_second": submission["episodes_per_second"]
         }
         
-        logger.info(f"Graph building complete: {episodes_created} episodes created, {len(errors)} errors")
+        logger.info(
+            f"Graph building complete: {result['episodes_created']} episodes created, "
+            f"{skipped} skipped, {len(result['errors'])} errors, {result['episodes_per_second']:.2f} episodes/s"
+        )
         return result
     
+    def build_episodes(
+        self,
+        chunks: List[DocumentChunk],
+        document_title: str,
+        document_source: str,
+        document_metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the Graphiti episodes for a document's chunks.
+        
+        Args:
+            chunks: List of document chunks
+            document_title: Title of the document
+            document_source: Source of the document
+            document_metadata: Additional metadata
+        
+        Returns:
+            Episodes with distinct ids (identical chunks map to one episode)
+        """
+        episodes = []
+        episode_ids = set()
+        
+        for chunk in chunks:
+            episode = self._build_episode(chunk, document_title, document_source, document_metadata)
+            if episode["episode_id"] not in episode_ids:
+                episode_ids.add(episode["episode_id"])
+                episodes.append(episode)
+        
+        return episodes
+    
+    async def process_episodes(
+        self,
+        episodes: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Submit prebuilt episodes, skipping those already in the graph.
+        
+        Used by the graph job worker to drain queued episodes.
+        
+        Args:
+            episodes: Episodes built by build_episodes
+            max_concurrency: Maximum episodes in flight (defaults to max_concurrency)
+        
+        Returns:
+            Submission results plus the ids that were skipped and the errors per failed id
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        new_episodes = await self._filter_existing_episodes(episodes)
+        new_ids = {episode["episode_id"] for episode in new_episodes}
+        
+        submission = await self._submit_episodes(
+            new_episodes,
+            max_concurrency=max_concurrency or self.max_concurrency,
+            bulk_size=self.bulk_size if self.use_bulk else None
+        )
+        
+        return {
+            **submission,
+            "skipped_ids": [episode["episode_id"] for episode in episodes if episode["episode_id"] not in new_ids]
+        }
+    
+    def _build_episode(
+        self,
+        chunk: DocumentChunk,
+        document_title: str,
+        document_source: str,
+        document_metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the Graphiti episode for a chunk.
+        
+        Args:
+            chunk: Document chunk
+            document_title: Title of the document
+            document_source: Source of the document
+            document_metadata: Additional metadata
+        
+        Returns:
+            Episode fields for GraphitiClient.add_episode plus the chunk index
+        """
+        # Prepare episode content with size limits
+        episode_content = self._prepare_episode_content(
+            chunk,
+            document_title,
+            document_metadata
+        )
+        
+        return {
+            "episode_id": self._episode_id(document_source, episode_content),
+            "content": episode_content,
+            # Create source description (shorter)
+            "source": f"Document: {document_title} (Chunk: {chunk.index})",
+            "metadata": {
+                "document_title": document_title,
+                "document_source": document_source,
+                "chunk_index": chunk.index,
+                "original_length": len(chunk.content),
+                "processed_length": len(episode_content)
+            },
+            "chunk_index": chunk.index
+        }
+    
+    @staticmethod
+    def _episode_id(document_source: str, episode_content: str) -> str:
+        """Deterministic episode id from the document source and episode content."""
+        content_hash = hashlib.sha256(episode_content.encode("utf-8")).hexdigest()[:16]
+        return f"{document_source}_{content_hash}"
+    
+    async def _filter_existing_episodes(
+        self,
+        episodes: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Drop episodes whose id already exists in the graph.
+        
+        Args:
+            episodes: Episodes built by _build_episode
+        
+        Returns:
+            Episodes not yet in the graph (all of them if the lookup fails)
+        """
+        if not episodes:
+            return episodes
+        
+        try:
+            existing = await self.graph_client.get_existing_episode_names(
+                [episode["episode_id"] for episode in episodes]
+            )
+        except Exception as e:
+            logger.warning(f"Could not check for existing episodes, submitting all: {e}")
+            return episodes
+        
+        return [episode for episode in episodes if episode["episode_id"] not in existing]
+    
+    async def _submit_episodes(
+        self,
+        episodes: List[Dict[str, Any]],
+        max_concurrency: int,
+        bulk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Submit episodes to Graphiti with bounded concurrency and rate limiting.
+        
+        With bulk_size set, episodes are grouped into batches that each go
+        through one bulk call, so entity resolution runs once per batch.
+        
+        Args:
+            episodes: Episodes built by _build_episode
+            max_concurrency: Maximum submissions in flight
+            bulk_size: Episodes per bulk submission (None submits one by one)
+        
+        Returns:
+            Episodes created, per-episode errors, errors by episode id and throughput
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        rate_limiter = RateLimiter(self.episodes_per_second)
+        errors: List[str] = []
+        failed: Dict[str, str] = {}
+        episodes_created = 0
+        start = asyncio.get_running_loop().time()
+        
+        step = bulk_size or 1
+        batches = [episodes[i:i + step] for i in range(0, len(episodes), step)]
+        
+        async def submit(batch: List[Dict[str, Any]]):
+            nonlocal episodes_created
+            
+            async with semaphore:
+                await rate_limiter.acquire()
+                
+                try:
+                    if bulk_size:
+                        await self.graph_client.add_episodes_bulk([
+                            {**episode, "timestamp": datetime.now(timezone.utc)}
+                            for episode in batch
+                        ])
+                    else:
+                        episode = batch[0]
+                        await self.graph_client.add_episode(
+                            episode_id=episode["episode_id"],
+                            content=episode["content"],
+                            source=episode["source"],
+                            timestamp=datetime.now(timezone.utc),
+                            metadata=episode["metadata"]
+                        )
+                    
+                    episodes_created += len(batch)
+                    for episode in batch:
+                        logger.info(f"✓ Added episode {episode['episode_id']} to knowledge graph ({episodes_created}/{len(episodes)})")
+                    
+                except Exception as e:
+                    # Continue processing other chunks even if one submission fails
+                    for episode in batch:
+                        error_msg = f"Failed to add chunk {episode['chunk_index']} to graph: {str(e)}"
+                        logger.error(error_msg)
+                        errors.append(error_msg)
+                        failed[episode["episode_id"]] = str(e)
+        
+        await asyncio.gather(*(submit(batch) for batch in batches))
+        
+        elapsed = asyncio.get_running_loop().time() - start
+        
+        return {
+            "episodes_created": episodes_created,
+            "errors": errors,
+            "failed": failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "episodes_per_second": episodes_created / elapsed if elapsed > 0 else 0.0
+        }
+    
     def _prepare_episode_content(
         self,
         chunk: DocumentChunk,
@@ -220,7 +473,25 @@ class GraphBuilder:
         
         enriched_chunks = []
         
+        # Every dictionary type (built-in or from ENTITY_DICTIONARIES_PATH)
+        # except the built-ins switched off by the caller
+        disabled = {
+            entity_type
+            for entity_type, enabled in (
+                ("companies", extract_companies),
+                ("technologies", extract_technologies),
+                ("people", extract_people)
+            )
+            if not enabled
+        }
+        wanted = [
+            entity_type
+            for entity_type in self.entity_matcher.entity_types
+            if entity_type not in disabled
+        ]
+        
         for chunk in chunks:
+            # Built-in keys are always present, empty when disabled
             entities = {
                 "companies": [],
                 "technologies": [],
@@ -228,22 +499,9 @@ class GraphBuilder:
                 "locations": []
             }
             
-            content = chunk.content
-            
-            # Extract companies
-            if extract_companies:
-                entities["companies"] = self._extract_companies(content)
-            
-            # Extract technologies
-            if extract_technologies:
-                entities["technologies"] = self._extract_technologies(content)
-            
-            # Extract people
-            if extract_people:
-                entities["people"] = self._extract_people(content)
-            
-            # Extract locations
-            entities["locations"] = self._extract_locations(content)
+            # Single pass over the chunk for all entity types
+            if wanted:
+                entities.update(self.entity_matcher.find_entities(chunk.content, wanted))
             
             # Create enriched chunk
             enriched_chunk = DocumentChunk(
@@ -270,84 +528,19 @@ class GraphBuilder:
     
     def _extract_companies(self, text: str) -> List[str]:
         """Extract company names from text."""
-        # Known tech companies (extend this list as needed)
-        tech_companies = {
-            "Google", "Microsoft", "Apple", "Amazon", "Meta", "Facebook",
-            "Tesla", "OpenAI", "Anthropic", "Nvidia", "Intel", "AMD",
-            "IBM", "Oracle", "Salesforce", "Adobe", "Netflix", "Uber",
-            "Airbnb", "Spotify", "Twitter", "LinkedIn", "Snapchat",
-            "TikTok", "ByteDance", "Baidu", "Alibaba", "Tencent",
-            "Samsung", "Sony", "Huawei", "Xiaomi", "DeepMind"
-        }
-        
-        found_companies = set()
-        text_lower = text.lower()
-        
-        for company in tech_companies:
-            # Case-insensitive search with word boundaries
-            pattern = r'\b' + re.escape(company.lower()) + r'\b'
-            if re.search(pattern, text_lower):
-                found_companies.add(company)
-        
-        return list(found_companies)
+        return self.entity_matcher.find_entities(text, ["companies"])["companies"]
     
     def _extract_technologies(self, text: str) -> List[str]:
         """Extract technology terms from text."""
-        tech_terms = {
-            "AI", "artificial intelligence", "machine learning", "ML",
-            "deep learning", "neural network", "LLM", "large language model",
-            "GPT", "transformer", "NLP", "natural language processing",
-            "computer vision", "reinforcement learning", "generative AI",
-            "foundation model", "multimodal", "chatbot", "API",
-            "cloud computing", "edge computing", "quantum computing",
-            "blockchain", "cryptocurrency", "IoT", "5G", "AR", "VR",
-            "autonomous vehicles", "robotics", "automation"
-        }
-        
-        found_terms = set()
-        text_lower = text.lower()
-        
-        for term in tech_terms:
-            if term.lower() in text_lower:
-                found_terms.add(term)
-        
-        return list(found_terms)
+        return self.entity_matcher.find_entities(text, ["technologies"])["technologies"]
     
     def _extract_people(self, text: str) -> List[str]:
         """Extract person names from text."""
-        # Known tech leaders (extend this list as needed)
-        tech_leaders = {
-            "Elon Musk", "Jeff Bezos", "Tim Cook", "Satya Nadella",
-            "Sundar Pichai", "Mark Zuckerberg", "Sam Altman",
-            "Dario Amodei", "Daniela Amodei", "Jensen Huang",
-            "Bill Gates", "Larry Page", "Sergey Brin", "Jack Dorsey",
-            "Reed Hastings", "Marc Benioff", "Andy Jassy"
-        }
-        
-        found_people = set()
-        
-        for person in tech_leaders:
-            if person in text:
-                found_people.add(person)
-        
-        return list(found_people)
+        return self.entity_matcher.find_entities(text, ["people"])["people"]
     
     def _extract_locations(self, text: str) -> List[str]:
         """Extract location names from text."""
-        locations = {
-            "Silicon Valley", "San Francisco", "Seattle", "Austin",
-            "New York", "Boston", "London", "Tel Aviv", "Singapore",
-            "Beijing", "Shanghai", "Tokyo", "Seoul", "Bangalore",
-            "Mountain View", "Cupertino", "Redmond", "Menlo Park"
-        }
-        
-        found_locations = set()
-        
-        for location in locations:
-            if location in text:
-                found_locations.add(location)
-        
-        return list(found_locations)
+        return self.entity_matcher.find_entities(text, ["locations"])["locations"]
     
     async def clear_graph(self):
         """Clear all data from the knowledge graph."""
@@ -400,9 +593,9 @@ class SimpleEntityExtractor:
 
 
 # Factory function
-def create_graph_builder() -> GraphBuilder:
+def create_graph_builder(**kwargs) -> GraphBuilder:
     """Create graph builder instance."""
-    return GraphBuilder()
+    return GraphBuilder(**kwargs)
 
 
 # Example usage
@@ -457,6 +650,7 @@ async def main():
     
     finally:
         await graph_builder.close()
+        await close_graph()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,254 @@
+"""
+Postgres-backed queue of knowledge graph episodes for background graph building.
+"""
+
+import os
+import json
+import logging
+from typing import List, Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+# Import agent utilities
+try:
+    from ..agent.db_utils import db_pool
+except ImportError:
+    # For direct execution or testing
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from agent.db_utils import db_pool
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class GraphJobQueue:
+    """
+    Queue of pending Graphiti episodes stored in the graph_jobs table.
+
+    Workers lease jobs with FOR UPDATE SKIP LOCKED, so any number of worker
+    processes can drain the queue without handing out the same job twice.
+    A lease expires after lease_seconds, which returns the jobs of a crashed
+    worker to the queue.
+    """
+
+    def __init__(
+        self,
+        lease_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_delay_seconds: Optional[int] = None
+    ):
+        """
+        Initialize job queue.
+
+        Args:
+            lease_seconds: How long a leased job stays reserved for its worker
+            max_attempts: Attempts before a job is marked failed
+            retry_delay_seconds: Base delay before a failed job is retried (grows quadratically)
+        """
+        self.lease_seconds = lease_seconds or int(os.getenv("GRAPH_JOB_LEASE_SECONDS", "600"))
+        self.max_attempts = max_attempts or int(os.getenv("GRAPH_JOB_MAX_ATTEMPTS", "5"))
+        self.retry_delay_seconds = (
+            retry_delay_seconds
+            if retry_delay_seconds is not None
+            else int(os.getenv("GRAPH_JOB_RETRY_DELAY_SECONDS", "30"))
+        )
+
+    async def enqueue(self, document_id: str, episodes: List[Dict[str, Any]]) -> int:
+        """
+        Queue episodes for graph building.
+
+        Episodes whose id is already queued (or done) are ignored, so
+        re-ingesting unchanged chunks adds no work.
+
+        Args:
+            document_id: Document the episodes belong to
+            episodes: Episodes built by GraphBuilder.build_episodes
+
+        Returns:
+            Number of episodes queued
+        """
+        if not episodes:
+            return 0
+
+        async with db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                INSERT INTO graph_jobs (document_id, episode_id, content, source, metadata)
+                SELECT $1::uuid, e.episode_id, e.content, e.source, e.metadata
+                FROM unnest($2::text[], $3::text[], $4::text[], $5::jsonb[])
+                    AS e(episode_id, content, source, metadata)
+                ON CONFLICT (episode_id) DO NOTHING
+                RETURNING id
+                """,
+                document_id,
+                [episode["episode_id"] for episode in episodes],
+                [episode["content"] for episode in episodes],
+                [episode["source"] for episode in episodes],
+                [
+                    {**episode["metadata"], "chunk_index": episode["chunk_index"]}
+                    for episode in episodes
+                ]
+            )
+
+        logger.info(f"Queued {len(rows)} of {len(episodes)} episodes for graph building")
+        return len(rows)
+
+    async def lease(self, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Lease pending jobs, including jobs whose previous lease expired.
+
+        Args:
+            worker_id: Identifier of the leasing worker
+            limit: Maximum number of jobs to lease
+
+        Returns:
+            Leased jobs as episodes for GraphBuilder.process_episodes plus job_id and attempts
+        """
+        async with db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                UPDATE graph_jobs
+                SET status = 'running',
+                    attempts = attempts + 1,
+                    locked_by = $1,
+                    locked_until = CURRENT_TIMESTAMP + make_interval(secs => $3)
+                WHERE id IN (
+                    SELECT id
+                    FROM graph_jobs
+                    WHERE (status = 'pending' AND available_at <= CURRENT_TIMESTAMP)
+                       OR (status = 'running' AND locked_until < CURRENT_TIMESTAMP)
+                    ORDER BY created_at
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id::text, episode_id, content, source, metadata, attempts
+                """,
+                worker_id,
+                limit,
+                float(self.lease_seconds)
+            )
+
+        jobs = []
+        for row in rows:
+            metadata = row["metadata"] or {}
+            if isinstance(metadata, str):
+                metadata = json.loads(metadata)
+            jobs.append({
+                "job_id": row["id"],
+                "episode_id": row["episode_id"],
+                "content": row["content"],
+                "source": row["source"],
+                "metadata": metadata,
+                "chunk_index": metadata.get("chunk_index"),
+                "attempts": row["attempts"]
+            })
+
+        return jobs
+
+    async def complete(self, worker_id: str, job_ids: List[str]) -> int:
+        """
+        Mark jobs as done.
+
+        Jobs whose lease expired and was taken by another worker are left to
+        that worker.
+
+        Args:
+            worker_id: Identifier of the worker holding the leases
+            job_ids: Jobs whose episodes are in the graph
+
+        Returns:
+            Number of jobs marked done
+        """
+        if not job_ids:
+            return 0
+
+        async with db_pool.acquire() as conn:
+            status = await conn.execute(
+                """
+                UPDATE graph_jobs
+                SET status = 'done', locked_by = NULL, locked_until = NULL, last_error = NULL
+                WHERE id = ANY($1::uuid[])
+                    AND status = 'running'
+                    AND locked_by = $2
+                """,
+                job_ids,
+                worker_id
+            )
+
+        completed = int(status.split()[-1])
+        if completed < len(job_ids):
+            logger.warning(
+                f"Ignored completion of {len(job_ids) - completed} graph jobs no longer leased by {worker_id}"
+            )
+        return completed
+
+    async def fail(self, worker_id: str, job: Dict[str, Any], error: str):
+        """
+        Record a failed attempt, retrying later or giving up after max_attempts.
+
+        Ignored if the job's lease expired and was taken by another worker.
+
+        Args:
+            worker_id: Identifier of the worker holding the lease
+            job: Leased job
+            error: Error message
+        """
+        give_up = job["attempts"] >= self.max_attempts
+        delay = self.retry_delay_seconds * job["attempts"] ** 2
+
+        async with db_pool.acquire() as conn:
+            status = await conn.execute(
+                """
+                UPDATE graph_jobs
+                SET status = $2,
+                    last_error = $3,
+                    locked_by = NULL,
+                    locked_until = NULL,
+                    available_at = CURRENT_TIMESTAMP + make_interval(secs => $4)
+                WHERE id = $1::uuid
+                    AND status = 'running'
+                    AND locked_by = $5
+                """,
+                job["job_id"],
+                "failed" if give_up else "pending",
+                error,
+                float(delay),
+                worker_id
+            )
+
+        if status.split()[-1] == "0":
+            logger.warning(f"Ignored failure of graph job {job['episode_id']} no longer leased by {worker_id}")
+        elif give_up:
+            logger.error(f"Graph job {job['episode_id']} failed after {job['attempts']} attempts: {error}")
+
+    async def get_stats(self) -> Dict[str, int]:
+        """
+        Count jobs by status.
+
+        Returns:
+            Job counts for pending, running, done and failed
+        """
+        async with db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT status, COUNT(*) AS count FROM graph_jobs GROUP BY status"
+            )
+
+        stats = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        stats.update({row["status"]: row["count"] for row in rows})
+        return stats
+
+
+def create_graph_job_queue(**kwargs) -> GraphJobQueue:
+    """
+    Create graph job queue instance.
+
+    Args:
+        **kwargs: Queue settings (see GraphJobQueue)
+
+    Returns:
+        GraphJobQueue instance
+    """
+    return GraphJobQueue(**kwargs)
@@ -0,0 +1,191 @@
+"""
+Background worker that drains the graph job queue into the knowledge graph.
+
+Run one or more workers alongside ingestion with --queue-graph:
+    python -m ingestion.graph_worker --concurrency 3
+"""
+
+import os
+import socket
+import asyncio
+import logging
+import argparse
+from typing import Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+from .graph_builder import GraphBuilder, create_graph_builder
+from .graph_queue import GraphJobQueue, create_graph_job_queue
+
+# Import agent utilities
+try:
+    from ..agent.db_utils import initialize_database, close_database
+    from ..agent.graph_utils import close_graph
+except ImportError:
+    # For direct execution or testing
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from agent.db_utils import initialize_database, close_database
+    from agent.graph_utils import close_graph
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class GraphWorker:
+    """Leases queued episodes and submits them to Graphiti."""
+
+    def __init__(
+        self,
+        queue: GraphJobQueue,
+        graph_builder: GraphBuilder,
+        concurrency: int = 3,
+        batch_size: Optional[int] = None,
+        poll_interval: float = 5.0,
+        worker_id: Optional[str] = None,
+        max_backoff: float = 60.0
+    ):
+        """
+        Initialize worker.
+
+        Args:
+            queue: Graph job queue
+            graph_builder: Graph builder used to submit episodes
+            concurrency: Maximum episodes in flight
+            batch_size: Jobs leased per round (defaults to 4 x concurrency)
+            poll_interval: Seconds to wait when the queue is empty
+            worker_id: Identifier recorded on leased jobs
+            max_backoff: Longest wait in seconds between rounds after repeated errors
+        """
+        self.queue = queue
+        self.graph_builder = graph_builder
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size or self.concurrency * 4
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.max_backoff = max_backoff
+        self._stopping = False
+
+    def stop(self):
+        """Finish the current batch and exit the run loop."""
+        self._stopping = True
+
+    async def process_batch(self) -> Dict[str, int]:
+        """
+        Lease one batch of jobs and process it.
+
+        Returns:
+            Counts of leased, created, skipped and failed jobs
+        """
+        jobs = await self.queue.lease(self.worker_id, self.batch_size)
+        if not jobs:
+            return {"leased": 0, "created": 0, "skipped": 0, "failed": 0}
+
+        result = await self.graph_builder.process_episodes(jobs, max_concurrency=self.concurrency)
+        failed = result["failed"]
+
+        await self.queue.complete(self.worker_id, [job["job_id"] for job in jobs if job["episode_id"] not in failed])
+        for job in jobs:
+            if job["episode_id"] in failed:
+                await self.queue.fail(self.worker_id, job, failed[job["episode_id"]])
+
+        counts = {
+            "leased": len(jobs),
+            "created": result["episodes_created"],
+            "skipped": len(result["skipped_ids"]),
+            "failed": len(failed)
+        }
+        logger.info(
+            f"Processed {counts['leased']} graph jobs: {counts['created']} created, "
+            f"{counts['skipped']} already in graph, {counts['failed']} failed"
+        )
+        return counts
+
+    async def run(self, drain: bool = False) -> Dict[str, int]:
+        """
+        Process batches until stopped.
+
+        A failed round (e.g. a dropped database connection) is logged and
+        retried after poll_interval, doubling up to max_backoff while errors
+        repeat; jobs it leased are picked up again once their lease expires.
+
+        Args:
+            drain: Exit once the queue is empty instead of polling
+
+        Returns:
+            Totals over all batches
+        """
+        totals = {"leased": 0, "created": 0, "skipped": 0, "failed": 0}
+        logger.info(f"Graph worker {self.worker_id} started (concurrency {self.concurrency})")
+
+        errors = 0
+        while not self._stopping:
+            try:
+                counts = await self.process_batch()
+            except Exception:
+                errors += 1
+                delay = min(self.poll_interval * 2 ** (errors - 1), self.max_backoff)
+                logger.exception(f"Graph worker {self.worker_id} round failed, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            errors = 0
+            for key, value in counts.items():
+                totals[key] += value
+
+            if not counts["leased"]:
+                if drain:
+                    break
+                await asyncio.sleep(self.poll_interval)
+
+        logger.info(f"Graph worker {self.worker_id} stopped: {totals}")
+        return totals
+
+
+async def main():
+    """Main function for running a graph worker."""
+    parser = argparse.ArgumentParser(description="Drain the graph job queue into the knowledge graph")
+    parser.add_argument("--concurrency", "-c", type=int, default=int(os.getenv("GRAPH_MAX_CONCURRENCY", "3")), help="Episodes submitted concurrently")
+    parser.add_argument("--batch-size", type=int, default=None, help="Jobs leased per round (default: 4 x concurrency)")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to wait when the queue is empty")
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    parser.add_argument("--bulk-graph", action="store_true", help="Use Graphiti bulk episode ingestion")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    graph_builder = create_graph_builder(
+        max_concurrency=args.concurrency,
+        use_bulk=True if args.bulk_graph else None
+    )
+    worker = GraphWorker(
+        queue=create_graph_job_queue(),
+        graph_builder=graph_builder,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval
+    )
+
+    await initialize_database()
+    await graph_builder.initialize()
+
+    try:
+        totals = await worker.run(drain=args.drain)
+        print(f"Graph jobs processed: {totals}")
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\nGraph worker interrupted")
+    finally:
+        await graph_builder.close()
+        await close_graph()
+        await close_database()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,7 +5,6 @@ Main ingestion script for processing markdown documents into vector DB and knowl
 import os
 import asyncio
 import logging
-import json
 import glob
 from pathlib import Path
 from typing import List, Dict, Any, Optional
@@ -18,10 +17,13 @@ from dotenv import load_dotenv
 from .chunker import ChunkingConfig, create_chunker, DocumentChunk
 from .embedder import create_embedder
 from .graph_builder import create_graph_builder
+from .graph_queue import create_graph_job_queue
+from .dedup import DeduplicationConfig, create_deduplicator, is_duplicate_chunk
+from .language import resolve_fts_config, get_default_fts_config
 
 # Import agent utilities
 try:
-    from ..agent.db_utils import initialize_database, close_database, db_pool
+    from ..agent.db_utils import initialize_database, close_database, db_pool, SESSION_CACHE_CHANNEL
     from ..agent.graph_utils import initialize_graph, close_graph
     from ..agent.models import IngestionConfig, IngestionResult
 except ImportError:
@@ -29,7 +31,7 @@ except ImportError:
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from agent.db_utils import initialize_database, close_database, db_pool
+    from agent.db_utils import initialize_database, close_database, db_pool, SESSION_CACHE_CHANNEL
     from agent.graph_utils import initialize_graph, close_graph
     from agent.models import IngestionConfig, IngestionResult
 
@@ -70,7 +72,18 @@ class DocumentIngestionPipeline:
         
         self.chunker = create_chunker(self.chunker_config)
         self.embedder = create_embedder()
-        self.graph_builder = create_graph_builder()
+        self.graph_builder = create_graph_builder(
+            use_bulk=True if config.bulk_graph_ingestion else None
+        )
+        self.graph_queue = create_graph_job_queue() if config.queue_graph_building else None
+        
+        # One deduplicator per pipeline so duplicates are found across documents
+        self.deduplicator = None
+        if config.deduplicate_chunks:
+            self.deduplicator = create_deduplicator(DeduplicationConfig(
+                threshold=config.dedup_threshold,
+                mode=config.dedup_mode
+            ))
         
         self._initialized = False
     
@@ -178,7 +191,10 @@ class DocumentIngestionPipeline:
         # Extract metadata from content
         document_metadata = self._extract_document_metadata(document_content, file_path)
         
-        logger.info(f"Processing document: {document_title}")
+        # Full-text search language for the document's chunks
+        fts_config = resolve_fts_config(document_content, document_metadata)
+        
+        logger.info(f"Processing document: {document_title} ({fts_config})")
         
         # Chunk the document
         chunks = await self.chunker.chunk_document(
@@ -202,6 +218,10 @@ class DocumentIngestionPipeline:
         
         logger.info(f"Created {len(chunks)} chunks")
         
+        # Detect near-duplicate chunks before paying for embeddings
+        if self.deduplicator:
+            chunks = self.deduplicator.deduplicate(chunks, document_source)
+        
         # Extract entities if configured
         entities_extracted = 0
         if self.config.extract_entities:
@@ -214,9 +234,14 @@ class DocumentIngestionPipeline:
             )
             logger.info(f"Extracted {entities_extracted} entities")
         
-        # Generate embeddings
-        embedded_chunks = await self.embedder.embed_chunks(chunks)
-        logger.info(f"Generated embeddings for {len(embedded_chunks)} chunks")
+        # Generate embeddings (linked duplicates are stored without one)
+        unique_chunks = [chunk for chunk in chunks if not is_duplicate_chunk(chunk)]
+        embedded_unique = {
+            chunk.index: chunk
+            for chunk in await self.embedder.embed_chunks(unique_chunks)
+        }
+        embedded_chunks = [embedded_unique.get(chunk.index, chunk) for chunk in chunks]
+        logger.info(f"Generated embeddings for {len(embedded_unique)} chunks")
         
         # Save to PostgreSQL
         document_id = await self._save_to_postgres(
@@ -224,7 +249,8 @@ class DocumentIngestionPipeline:
             document_source,
             document_content,
             embedded_chunks,
-            document_metadata
+            document_metadata,
+            fts_config
         )
         
         logger.info(f"Saved document to PostgreSQL with ID: {document_id}")
@@ -233,11 +259,27 @@ class DocumentIngestionPipeline:
         relationships_created = 0
         graph_errors = []
         
-        if not self.config.skip_graph_building:
+        graph_chunks = [chunk for chunk in embedded_chunks if not is_duplicate_chunk(chunk)]
+        
+        if not self.config.skip_graph_building and self.graph_queue:
+            try:
+                queued = await self.graph_queue.enqueue(
+                    document_id,
+                    self.graph_builder.build_episodes(
+                        graph_chunks, document_title, document_source, document_metadata
+                    )
+                )
+                logger.info(f"Queued {queued} episodes for the graph worker")
+                
+            except Exception as e:
+                error_msg = f"Failed to queue knowledge graph episodes: {str(e)}"
+                logger.error(error_msg)
+                graph_errors.append(error_msg)
+        elif not self.config.skip_graph_building:
             try:
                 logger.info("Building knowledge graph relationships (this may take several minutes)...")
                 graph_result = await self.graph_builder.add_document_to_graph(
-                    chunks=embedded_chunks,
+                    chunks=graph_chunks,
                     document_title=document_title,
                     document_source=document_source,
                     document_metadata=document_metadata
@@ -246,7 +288,10 @@ class DocumentIngestionPipeline:
                 relationships_created = graph_result.get("episodes_created", 0)
                 graph_errors = graph_result.get("errors", [])
                 
-                logger.info(f"Added {relationships_created} episodes to knowledge graph")
+                logger.info(
+                    f"Added {relationships_created} episodes to knowledge graph "
+                    f"({graph_result.get('episodes_skipped', 0)} already present)"
+                )
                 
             except Exception as e:
                 error_msg = f"Failed to add to knowledge graph: {str(e)}"
@@ -340,7 +385,8 @@ class DocumentIngestionPipeline:
         source: str,
         content: str,
         chunks: List[DocumentChunk],
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        fts_config: Optional[str] = None
     ) -> str:
         """Save document and chunks to PostgreSQL."""
         async with db_pool.acquire() as conn:
@@ -355,31 +401,31 @@ class DocumentIngestionPipeline:
                     title,
                     source,
                     content,
-                    json.dumps(metadata)
+                    metadata
                 )
                 
                 document_id = document_result["id"]
                 
-                # Insert chunks
-                for chunk in chunks:
-                    # Convert embedding to PostgreSQL vector string format
-                    embedding_data = None
-                    if hasattr(chunk, 'embedding') and chunk.embedding:
-                        # PostgreSQL vector format: '[1.0,2.0,3.0]' (no spaces after commas)
-                        embedding_data = '[' + ','.join(map(str, chunk.embedding)) + ']'
-                    
-                    await conn.execute(
-                        """
-                        INSERT INTO chunks (document_id, content, embedding, chunk_index, metadata, token_count)
-                        VALUES ($1::uuid, $2, $3::vector, $4, $5, $6)
-                        """,
-                        document_id,
-                        chunk.content,
-                        embedding_data,
-                        chunk.index,
-                        json.dumps(chunk.metadata),
-                        chunk.token_count
-                    )
+                # Insert chunks in one round trip; the pool's codecs encode
+                # metadata dicts and embedding lists
+                await conn.executemany(
+                    """
+                    INSERT INTO chunks (document_id, content, embedding, chunk_index, metadata, token_count, fts_config)
+                    VALUES ($1::uuid, $2, $3::vector, $4, $5, $6, $7::regconfig)
+                    """,
+                    [
+                        (
+                            document_id,
+                            chunk.content,
+                            getattr(chunk, 'embedding', None) or None,
+                            chunk.index,
+                            chunk.metadata,
+                            chunk.token_count,
+                            fts_config or get_default_fts_config()
+                        )
+                        for chunk in chunks
+                    ]
+                )
                 
                 return document_id
     
@@ -390,8 +436,15 @@ class DocumentIngestionPipeline:
         # Clean PostgreSQL
         async with db_pool.acquire() as conn:
             async with conn.transaction():
+                await conn.execute("DELETE FROM graph_jobs")
                 await conn.execute("DELETE FROM messages")
                 await conn.execute("DELETE FROM sessions")
+                # Running API workers drop their cached sessions
+                await conn.execute(
+                    "SELECT pg_notify($1, $2)",
+                    SESSION_CACHE_CHANNEL,
+                    db_pool.session_cache.notify_payload("*")
+                )
                 await conn.execute("DELETE FROM chunks")
                 await conn.execute("DELETE FROM documents")
         
@@ -412,6 +465,11 @@ async def main():
     parser.add_argument("--no-semantic", action="store_true", help="Disable semantic chunking")
     parser.add_argument("--no-entities", action="store_true", help="Disable entity extraction")
     parser.add_argument("--fast", "-f", action="store_true", help="Fast mode: skip knowledge graph building")
+    parser.add_argument("--bulk-graph", action="store_true", help="Use Graphiti bulk episode ingestion for knowledge graph building")
+    parser.add_argument("--queue-graph", action="store_true", help="Queue knowledge graph building for ingestion.graph_worker")
+    parser.add_argument("--no-dedup", action="store_true", help="Disable near-duplicate chunk detection")
+    parser.add_argument("--dedup-threshold", type=float, default=0.9, help="Similarity above which chunks are near-duplicates")
+    parser.add_argument("--dedup-mode", choices=["drop", "link"], default="link", help="Drop near-duplicates or store them linked to the original")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
     
     args = parser.parse_args()
@@ -429,7 +487,12 @@ async def main():
         chunk_overlap=args.chunk_overlap,
         use_semantic_chunking=not args.no_semantic,
         extract_entities=not args.no_entities,
-        skip_graph_building=args.fast
+        skip_graph_building=args.fast,
+        bulk_graph_ingestion=args.bulk_graph,
+        queue_graph_building=args.queue_graph,
+        deduplicate_chunks=not args.no_dedup,
+        dedup_threshold=args.dedup_threshold,
+        dedup_mode=args.dedup_mode
     )
     
     # Create and run pipeline
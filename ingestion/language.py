@@ -0,0 +1,115 @@
+"""
+Document language detection for choosing the Postgres text search configuration.
+"""
+
+import os
+import re
+import logging
+from typing import Dict, FrozenSet, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+# Frequent function words; enough to tell the supported languages apart
+FTS_STOPWORDS: Dict[str, FrozenSet[str]] = {
+    "dutch": frozenset({
+        "de", "het", "een", "en", "van", "is", "dat", "die", "niet", "op",
+        "te", "zijn", "voor", "met", "als", "bij", "er", "maar", "om", "ook",
+        "aan", "wordt", "worden", "moet", "kan", "deze", "dit", "of", "naar",
+        "wat", "zo", "nog", "uit", "door", "over", "hij", "ze", "je", "wij"
+    }),
+    "english": frozenset({
+        "the", "and", "of", "to", "a", "in", "is", "that", "for", "it",
+        "with", "as", "was", "on", "are", "be", "by", "this", "an", "or",
+        "from", "at", "which", "but", "have", "has", "not", "they", "their",
+        "will", "can", "its", "were", "been", "more", "than", "also", "into"
+    })
+}
+
+# Language tags accepted in document frontmatter ("language: nl")
+LANGUAGE_ALIASES = {
+    "nl": "dutch",
+    "nl-nl": "dutch",
+    "nl-be": "dutch",
+    "nederlands": "dutch",
+    "dutch": "dutch",
+    "en": "english",
+    "en-us": "english",
+    "en-gb": "english",
+    "english": "english"
+}
+
+
+def get_default_fts_config() -> str:
+    """Text search configuration used when the language cannot be detected."""
+    return os.getenv("FTS_DEFAULT_CONFIG", "dutch")
+
+
+def fts_config_for_language(language: Optional[str]) -> Optional[str]:
+    """
+    Map a language tag to a text search configuration.
+
+    Args:
+        language: Language name or tag (e.g. "nl", "English")
+
+    Returns:
+        Text search configuration or None if unsupported
+    """
+    if not language or not isinstance(language, str):
+        return None
+    return LANGUAGE_ALIASES.get(language.strip().lower())
+
+
+def detect_fts_config(text: str, sample_words: int = 2000) -> str:
+    """
+    Detect the text search configuration for a text by stopword frequency.
+
+    Args:
+        text: Text to classify
+        sample_words: Number of leading words to inspect
+
+    Returns:
+        Text search configuration ("dutch" or "english")
+    """
+    scores = {config: 0 for config in FTS_STOPWORDS}
+
+    for index, match in enumerate(_WORD_PATTERN.finditer(text)):
+        if index >= sample_words:
+            break
+        word = match.group().lower()
+        for config, stopwords in FTS_STOPWORDS.items():
+            if word in stopwords:
+                scores[config] += 1
+
+    best = max(scores, key=scores.get)
+    if scores[best] == 0 or list(scores.values()).count(scores[best]) > 1:
+        return get_default_fts_config()
+
+    return best
+
+
+def resolve_fts_config(content: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Choose the text search configuration for a document.
+
+    A supported "language" in the document metadata (frontmatter) wins;
+    otherwise the language is detected from the content.
+
+    Args:
+        content: Document content
+        metadata: Document metadata
+
+    Returns:
+        Text search configuration
+    """
+    declared = (metadata or {}).get("language")
+    config = fts_config_for_language(declared)
+
+    if config:
+        return config
+
+    if declared:
+        logger.warning(f"Unsupported document language '{declared}', detecting from content")
+
+    return detect_fts_config(content)
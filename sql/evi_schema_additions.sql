@@ -15,6 +15,57 @@ CREATE INDEX IF NOT EXISTS idx_chunks_tier ON chunks (tier);
 -- Create composite index for tier + embedding searches
 CREATE INDEX IF NOT EXISTS idx_chunks_tier_document ON chunks (tier, document_id);
 
+-- Stored full-text vectors, stemmed per chunk language (guidelines default to Dutch).
+-- Existing chunks get 'dutch'; re-ingest English sources to restem them.
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS fts_config regconfig NOT NULL DEFAULT 'dutch';
+ALTER TABLE chunks ALTER COLUMN fts_config SET DEFAULT 'dutch';
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector(fts_config, content)) STORED;
+CREATE INDEX IF NOT EXISTS idx_chunks_content_tsv ON chunks USING GIN (content_tsv);
+
+-- Stored chunk count per document (read by list_documents), for databases
+-- created before schema.sql had it. The column list keeps chunk_count
+-- maintenance (and the backfill) from touching updated_at.
+DROP TRIGGER IF EXISTS update_documents_updated_at ON documents;
+CREATE TRIGGER update_documents_updated_at BEFORE UPDATE OF title, source, content, metadata ON documents
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE documents d
+SET chunk_count = counted.n
+FROM (SELECT document_id, COUNT(*) AS n FROM chunks GROUP BY document_id) counted
+WHERE d.id = counted.document_id
+    AND d.chunk_count <> counted.n;
+
+CREATE OR REPLACE FUNCTION sync_document_chunk_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE documents d
+        SET chunk_count = d.chunk_count + delta.n
+        FROM (SELECT document_id, COUNT(*) AS n FROM new_chunks GROUP BY document_id) delta
+        WHERE d.id = delta.document_id;
+    ELSE
+        UPDATE documents d
+        SET chunk_count = GREATEST(d.chunk_count - delta.n, 0)
+        FROM (SELECT document_id, COUNT(*) AS n FROM old_chunks GROUP BY document_id) delta
+        WHERE d.id = delta.document_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS chunks_count_insert ON chunks;
+CREATE TRIGGER chunks_count_insert AFTER INSERT ON chunks
+    REFERENCING NEW TABLE AS new_chunks
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_document_chunk_count();
+
+DROP TRIGGER IF EXISTS chunks_count_delete ON chunks;
+CREATE TRIGGER chunks_count_delete AFTER DELETE ON chunks
+    REFERENCING OLD TABLE AS old_chunks
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_document_chunk_count();
+
 -- =============================================================================
 -- 2. Create products table for EVI 360 product catalog
 -- =============================================================================
@@ -42,7 +93,7 @@ CREATE TABLE products (
 );
 
 -- Indexes for product table
-CREATE INDEX idx_products_embedding ON products USING ivfflat (embedding vector_cosine_ops) WITH (lists = 1);
+CREATE INDEX idx_products_embedding ON products USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 CREATE INDEX idx_products_category ON products (category);
 CREATE INDEX idx_products_compliance_tags ON products USING GIN (compliance_tags);
 CREATE INDEX idx_products_metadata ON products USING GIN (metadata);
@@ -53,17 +104,20 @@ CREATE TRIGGER update_products_updated_at BEFORE UPDATE ON products
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 -- =============================================================================
--- 3. Update hybrid_search function for Dutch language support
+-- 3. Update hybrid_search function for Dutch and English full-text search
 -- =============================================================================
 
--- Drop and recreate hybrid_search with Dutch language support
+-- Drop and recreate hybrid_search on the per-chunk-language content_tsv column
 DROP FUNCTION IF EXISTS hybrid_search(vector, TEXT, INT, FLOAT);
 
 CREATE OR REPLACE FUNCTION hybrid_search(
     query_embedding vector(1536),
     query_text TEXT,
     match_count INT DEFAULT 10,
-    text_weight FLOAT DEFAULT 0.3
+    text_weight FLOAT DEFAULT 0.3,
+    fusion_method TEXT DEFAULT 'weighted',
+    candidate_count INT DEFAULT NULL,
+    rrf_k INT DEFAULT 60
 )
 RETURNS TABLE (
     chunk_id UUID,
@@ -78,50 +132,85 @@ RETURNS TABLE (
 )
 LANGUAGE plpgsql
 AS $$
+DECLARE
+    -- Each branch returns at most this many candidates, so fusion cost does
+    -- not grow with the number of chunks
+    branch_limit INT := COALESCE(candidate_count, GREATEST(match_count * 4, 40));
+    -- Chunks are indexed in their own language (chunks.fts_config), so the
+    -- query is parsed in every supported language and OR'ed
+    text_query tsquery := plainto_tsquery('dutch', query_text) || plainto_tsquery('english', query_text);
 BEGIN
+    IF fusion_method NOT IN ('weighted', 'rrf') THEN
+        RAISE EXCEPTION 'Unknown fusion_method: % (expected weighted or rrf)', fusion_method;
+    END IF;
+    
+    -- An HNSW scan returns at most ef_search rows; let the vector branch fill
+    IF current_setting('hnsw.ef_search', true)::int < branch_limit THEN
+        PERFORM set_config('hnsw.ef_search', branch_limit::text, true);
+    END IF;
+
     RETURN QUERY
     WITH vector_results AS (
+        -- Top-K by cosine distance; ORDER BY distance + LIMIT uses the HNSW index
         SELECT
             c.id AS chunk_id,
-            c.document_id,
-            c.content,
             1 - (c.embedding <=> query_embedding) AS vector_sim,
-            c.metadata,
-            d.title AS doc_title,
-            d.source AS doc_source
-        FROM chunks c
-        JOIN documents d ON c.document_id = d.id
-        WHERE c.embedding IS NOT NULL
+            ROW_NUMBER() OVER (ORDER BY c.embedding <=> query_embedding) AS vector_rank
+        FROM (
+            SELECT ch.id, ch.embedding
+            FROM chunks ch
+            WHERE ch.embedding IS NOT NULL
+            ORDER BY ch.embedding <=> query_embedding
+            LIMIT branch_limit
+        ) c
     ),
     text_results AS (
+        -- Top-K by text rank; the @@ match uses the GIN index on content_tsv
         SELECT
             c.id AS chunk_id,
-            c.document_id,
-            c.content,
-            -- Updated to use Dutch language for full-text search
-            ts_rank_cd(to_tsvector('dutch', c.content), plainto_tsquery('dutch', query_text)) AS text_sim,
-            c.metadata,
-            d.title AS doc_title,
-            d.source AS doc_source
-        FROM chunks c
-        JOIN documents d ON c.document_id = d.id
-        -- Updated to use Dutch language for full-text search
-        WHERE to_tsvector('dutch', c.content) @@ plainto_tsquery('dutch', query_text)
+            c.text_sim,
+            ROW_NUMBER() OVER (ORDER BY c.text_sim DESC) AS text_rank
+        FROM (
+            SELECT
+                ch.id,
+                ts_rank_cd(ch.content_tsv, text_query) AS text_sim
+            FROM chunks ch
+            WHERE ch.content_tsv @@ text_query
+            ORDER BY text_sim DESC
+            LIMIT branch_limit
+        ) c
+    ),
+    fused AS (
+        SELECT
+            COALESCE(v.chunk_id, t.chunk_id) AS fused_id,
+            CASE fusion_method
+                WHEN 'rrf' THEN
+                    COALESCE((1 - text_weight) / (rrf_k + v.vector_rank), 0)
+                    + COALESCE(text_weight / (rrf_k + t.text_rank), 0)
+                ELSE
+                    COALESCE(v.vector_sim, 0) * (1 - text_weight) + COALESCE(t.text_sim, 0) * text_weight
+            END AS score,
+            COALESCE(v.vector_sim, 0) AS vector_sim,
+            COALESCE(t.text_sim, 0) AS text_sim
+        FROM vector_results v
+        FULL OUTER JOIN text_results t ON v.chunk_id = t.chunk_id
+        ORDER BY score DESC
+        LIMIT match_count
     )
     SELECT
-        COALESCE(v.chunk_id, t.chunk_id) AS chunk_id,
-        COALESCE(v.document_id, t.document_id) AS document_id,
-        COALESCE(v.content, t.content) AS content,
-        (COALESCE(v.vector_sim, 0) * (1 - text_weight) + COALESCE(t.text_sim, 0) * text_weight) AS combined_score,
-        COALESCE(v.vector_sim, 0) AS vector_similarity,
-        COALESCE(t.text_sim, 0) AS text_similarity,
-        COALESCE(v.metadata, t.metadata) AS metadata,
-        COALESCE(v.doc_title, t.doc_title) AS document_title,
-        COALESCE(v.doc_source, t.doc_source) AS document_source
-    FROM vector_results v
-    FULL OUTER JOIN text_results t ON v.chunk_id = t.chunk_id
-    ORDER BY combined_score DESC
-    LIMIT match_count;
+        f.fused_id AS chunk_id,
+        c.document_id,
+        c.content,
+        f.score::FLOAT AS combined_score,
+        f.vector_sim::FLOAT AS vector_similarity,
+        f.text_sim::FLOAT AS text_similarity,
+        c.metadata,
+        d.title AS document_title,
+        d.source AS document_source
+    FROM fused f
+    JOIN chunks c ON c.id = f.fused_id
+    JOIN documents d ON c.document_id = d.id
+    ORDER BY f.score DESC;
 END;
 $$;
 
@@ -150,6 +239,8 @@ RETURNS TABLE (
 )
 LANGUAGE plpgsql
 AS $$
+DECLARE
+    text_query tsquery := plainto_tsquery('dutch', query_text) || plainto_tsquery('english', query_text);
 BEGIN
     RETURN QUERY
     WITH vector_results AS (
@@ -173,13 +264,13 @@ BEGIN
             c.document_id,
             c.content,
             c.tier,
-            ts_rank_cd(to_tsvector('dutch', c.content), plainto_tsquery('dutch', query_text)) AS text_sim,
+            ts_rank_cd(c.content_tsv, text_query) AS text_sim,
             c.metadata,
             d.title AS doc_title,
             d.source AS doc_source
         FROM chunks c
         JOIN documents d ON c.document_id = d.id
-        WHERE to_tsvector('dutch', c.content) @@ plainto_tsquery('dutch', query_text)
+        WHERE c.content_tsv @@ text_query
             AND (tier_filter IS NULL OR c.tier = tier_filter)
     )
     SELECT
@@ -207,11 +298,26 @@ $$;
 -- 5. Create product search function
 -- =============================================================================
 
+-- search_products finds the products nearest to query_embedding among those
+-- matching optional compliance tag (any of) and category filters.
+-- Filters are applied inside the search instead of on a fixed ANN candidate list,
+-- which could leave too few results for selective filters:
+--   * filters matching at most exact_threshold products are answered exactly:
+--     the GIN (compliance_tags) / btree (category) indexes find the matches and
+--     only those are ranked by distance ("+ 0" keeps the planner off HNSW);
+--   * broader filters use the HNSW index with pgvector 0.8+ iterative scans,
+--     which keep scanning until match_count filtered rows are found (older
+--     pgvector versions get the maximum ef_search instead).
+-- benchmarks/product_search_benchmark.py measures both paths on 100k products.
+DROP FUNCTION IF EXISTS search_products(vector, TEXT, TEXT[], INT);
+
 CREATE OR REPLACE FUNCTION search_products(
     query_embedding vector(1536),
     query_text TEXT,
     compliance_tags_filter TEXT[] DEFAULT NULL,
-    match_count INT DEFAULT 10
+    match_count INT DEFAULT 10,
+    category_filter TEXT DEFAULT NULL,
+    exact_threshold INT DEFAULT 2000
 )
 RETURNS TABLE (
     product_id UUID,
@@ -225,22 +331,57 @@ RETURNS TABLE (
 )
 LANGUAGE plpgsql
 AS $$
+DECLARE
+    conditions TEXT := 'p.embedding IS NOT NULL';
+    distance_order TEXT := 'p.embedding <=> $1';
+    filtered_count INT;
 BEGIN
-    RETURN QUERY
-    SELECT
-        p.id AS product_id,
-        p.name,
-        p.description,
-        p.url,
-        p.category,
-        1 - (p.embedding <=> query_embedding) AS similarity,
-        p.compliance_tags,
-        p.metadata
-    FROM products p
-    WHERE p.embedding IS NOT NULL
-        AND (compliance_tags_filter IS NULL OR p.compliance_tags && compliance_tags_filter)
-    ORDER BY p.embedding <=> query_embedding
-    LIMIT match_count;
+    -- Concrete predicates (no "param IS NULL OR ...") so each filter can use its index
+    IF compliance_tags_filter IS NOT NULL THEN
+        conditions := conditions || ' AND p.compliance_tags && $3';
+    END IF;
+    IF category_filter IS NOT NULL THEN
+        conditions := conditions || ' AND p.category = $4';
+    END IF;
+    
+    IF compliance_tags_filter IS NOT NULL OR category_filter IS NOT NULL THEN
+        EXECUTE format('SELECT count(*) FROM (SELECT 1 FROM products p WHERE %s LIMIT $2) matches', conditions)
+        INTO filtered_count
+        USING query_embedding, exact_threshold + 1, compliance_tags_filter, category_filter;
+        
+        IF filtered_count <= exact_threshold THEN
+            distance_order := '(p.embedding <=> $1) + 0';
+        ELSIF (
+            SELECT string_to_array(extversion, '.')::int[] >= ARRAY[0, 8]
+            FROM pg_extension WHERE extname = 'vector'
+        ) THEN
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        ELSE
+            PERFORM set_config('hnsw.ef_search', '1000', true);
+        END IF;
+    END IF;
+    
+    IF current_setting('hnsw.ef_search', true)::int < match_count THEN
+        PERFORM set_config('hnsw.ef_search', match_count::text, true);
+    END IF;
+    
+    -- Iterative scans may return neighbours slightly out of order; re-sort them
+    RETURN QUERY EXECUTE format(
+        'WITH nearest AS MATERIALIZED (
+            SELECT p.id, p.name, p.description, p.url, p.category,
+                p.embedding <=> $1 AS distance, p.compliance_tags, p.metadata
+            FROM products p
+            WHERE %s
+            ORDER BY %s
+            LIMIT $2
+        )
+        SELECT id, name, description, url, category, 1 - distance, compliance_tags, metadata
+        FROM nearest
+        ORDER BY distance',
+        conditions,
+        distance_order
+    )
+    USING query_embedding, match_count, compliance_tags_filter, category_filter;
 END;
 $$;
 
@@ -292,7 +433,8 @@ ORDER BY product_count DESC;
 -- =============================================================================
 
 COMMENT ON COLUMN chunks.tier IS 'Guideline tier: 1=Summary, 2=Key Facts, 3=Detailed Content';
+COMMENT ON COLUMN chunks.fts_config IS 'Text search configuration (language) content_tsv is built with';
 COMMENT ON TABLE products IS 'EVI 360 product catalog with embeddings for semantic search';
 COMMENT ON COLUMN products.compliance_tags IS 'Safety standards and compliance tags (e.g., EN_361, CE_certified)';
 COMMENT ON FUNCTION search_guidelines_by_tier IS 'Tier-aware hybrid search for guidelines with Dutch language support';
-COMMENT ON FUNCTION search_products IS 'Semantic search for products with compliance tag filtering';
+COMMENT ON FUNCTION search_products IS 'Semantic search for products filtered by compliance tags and category';
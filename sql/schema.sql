@@ -2,6 +2,7 @@ CREATE EXTENSION IF NOT EXISTS vector;
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
+DROP TABLE IF EXISTS graph_jobs CASCADE;
 DROP TABLE IF EXISTS messages CASCADE;
 DROP TABLE IF EXISTS sessions CASCADE;
 DROP TABLE IF EXISTS chunks CASCADE;
@@ -17,12 +18,15 @@ CREATE TABLE documents (
     source TEXT NOT NULL,
     content TEXT NOT NULL,
     metadata JSONB DEFAULT '{}',
+    -- Maintained by the sync_document_chunk_count trigger on chunks
+    chunk_count INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX idx_documents_metadata ON documents USING GIN (metadata);
-CREATE INDEX idx_documents_created_at ON documents (created_at DESC);
+-- Keyset pagination order for list_documents: (created_at, id) descending
+CREATE INDEX idx_documents_created_at ON documents (created_at DESC, id DESC);
 
 CREATE TABLE chunks (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -32,13 +36,21 @@ CREATE TABLE chunks (
     chunk_index INTEGER NOT NULL,
     metadata JSONB DEFAULT '{}',
     token_count INTEGER,
+    -- Text search configuration the chunk is stemmed with (set by ingestion per document
+    -- language; the default matches FTS_DEFAULT_CONFIG and evi_schema_additions.sql)
+    fts_config regconfig NOT NULL DEFAULT 'dutch',
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector(fts_config, content)) STORED,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_chunks_embedding ON chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 1);
+-- HNSW keeps query latency sub-linear in corpus size (pgvector >= 0.5.0).
+-- Tune per query with hnsw.ef_search (SearchRequest.ef_search) or per database with
+-- ALTER DATABASE ... SET hnsw.ef_search; rebuild with rebuild_vector_index() below.
+CREATE INDEX idx_chunks_embedding ON chunks USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 CREATE INDEX idx_chunks_document_id ON chunks (document_id);
 CREATE INDEX idx_chunks_chunk_index ON chunks (document_id, chunk_index);
 CREATE INDEX idx_chunks_content_trgm ON chunks USING GIN (content gin_trgm_ops);
+CREATE INDEX idx_chunks_content_tsv ON chunks USING GIN (content_tsv);
 
 CREATE TABLE sessions (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -52,17 +64,135 @@ CREATE TABLE sessions (
 CREATE INDEX idx_sessions_user_id ON sessions (user_id);
 CREATE INDEX idx_sessions_expires_at ON sessions (expires_at);
 
+-- Messages are partitioned by month (UTC) on created_at so old history can be
+-- dropped or archived a partition at a time and each index stays small.
+-- ensure_message_partitions() creates upcoming months; the API maintenance task
+-- calls it periodically. Rows outside every month land in messages_default.
 CREATE TABLE messages (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     session_id UUID NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
     role TEXT NOT NULL CHECK (role IN ('user', 'assistant', 'system')),
     content TEXT NOT NULL,
     metadata JSONB DEFAULT '{}',
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- A partitioned table's primary key must include the partition key
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE messages_default PARTITION OF messages DEFAULT;
 
 CREATE INDEX idx_messages_session_id ON messages (session_id, created_at);
 
+-- Create the monthly partitions from the current month through months_ahead.
+-- Rows already in messages_default for a new month are moved into it.
+CREATE OR REPLACE FUNCTION ensure_message_partitions(months_ahead INT DEFAULT 2)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    current_month TIMESTAMP := date_trunc('month', CURRENT_TIMESTAMP AT TIME ZONE 'UTC');
+    month_start TIMESTAMPTZ;
+    month_end TIMESTAMPTZ;
+    partition_name TEXT;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := (current_month + make_interval(months => i)) AT TIME ZONE 'UTC';
+        month_end := (current_month + make_interval(months => i + 1)) AT TIME ZONE 'UTC';
+        partition_name := 'messages_' || to_char(current_month + make_interval(months => i), 'YYYY_MM');
+        
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        
+        EXECUTE format('CREATE TABLE %I (LIKE messages INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM messages_default WHERE created_at >= %L AND created_at < %L RETURNING *)
+             INSERT INTO %I SELECT * FROM moved',
+            month_start, month_end, partition_name
+        );
+        EXECUTE format(
+            'ALTER TABLE messages ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, month_end
+        );
+        RETURN NEXT partition_name;
+    END LOOP;
+END;
+$$;
+
+-- Drop (or, with archive, detach into standalone tables for export) monthly
+-- partitions that ended more than retain_months months before the current month.
+CREATE OR REPLACE FUNCTION drop_message_partitions(retain_months INT, archive BOOLEAN DEFAULT FALSE)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cutoff TIMESTAMP := date_trunc('month', CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - make_interval(months => retain_months);
+    partition_name TEXT;
+BEGIN
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'messages'
+        AND child.relname ~ '^messages_[0-9]{4}_[0-9]{2}$'
+        AND to_timestamp(substr(child.relname, 10), 'YYYY_MM')::timestamp < cutoff
+        ORDER BY child.relname
+    LOOP
+        IF archive THEN
+            EXECUTE format('ALTER TABLE messages DETACH PARTITION %I', partition_name);
+        ELSE
+            EXECUTE format('DROP TABLE %I', partition_name);
+        END IF;
+        RETURN NEXT partition_name;
+    END LOOP;
+END;
+$$;
+
+SELECT ensure_message_partitions();
+
+-- Delete up to batch_size sessions (and, by cascade, their messages) that
+-- expired more than grace ago. Returns the number of sessions deleted.
+CREATE OR REPLACE FUNCTION delete_expired_sessions(batch_size INT DEFAULT 1000, grace INTERVAL DEFAULT '0')
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    deleted INT;
+BEGIN
+    DELETE FROM sessions
+    WHERE id IN (
+        SELECT id FROM sessions
+        WHERE expires_at < CURRENT_TIMESTAMP - grace
+        ORDER BY expires_at
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    );
+    GET DIAGNOSTICS deleted = ROW_COUNT;
+    RETURN deleted;
+END;
+$$;
+
+-- Knowledge graph episodes waiting for a graph worker (python -m ingestion.graph_worker)
+CREATE TABLE graph_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    document_id UUID REFERENCES documents(id) ON DELETE CASCADE,
+    episode_id TEXT NOT NULL UNIQUE,
+    content TEXT NOT NULL,
+    source TEXT NOT NULL,
+    metadata JSONB DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    locked_by TEXT,
+    locked_until TIMESTAMP WITH TIME ZONE,
+    available_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_graph_jobs_pending ON graph_jobs (available_at, created_at) WHERE status = 'pending';
+CREATE INDEX idx_graph_jobs_running ON graph_jobs (locked_until) WHERE status = 'running';
+CREATE INDEX idx_graph_jobs_document_id ON graph_jobs (document_id);
+
 CREATE OR REPLACE FUNCTION match_chunks(
     query_embedding vector(1536),
     match_count INT DEFAULT 10
@@ -79,6 +209,11 @@ RETURNS TABLE (
 LANGUAGE plpgsql
 AS $$
 BEGIN
+    -- An HNSW scan returns at most ef_search rows
+    IF current_setting('hnsw.ef_search', true)::int < match_count THEN
+        PERFORM set_config('hnsw.ef_search', match_count::text, true);
+    END IF;
+    
     RETURN QUERY
     SELECT 
         c.id AS chunk_id,
@@ -96,11 +231,19 @@ BEGIN
 END;
 $$;
 
+-- hybrid_search fuses the top candidates of an ANN search and a full-text search.
+-- fusion_method 'weighted' blends the raw scores with text_weight; 'rrf' uses
+-- Reciprocal Rank Fusion, sum(weight / (rrf_k + rank)), which ignores score scales.
+DROP FUNCTION IF EXISTS hybrid_search(vector, TEXT, INT, FLOAT);
+
 CREATE OR REPLACE FUNCTION hybrid_search(
     query_embedding vector(1536),
     query_text TEXT,
     match_count INT DEFAULT 10,
-    text_weight FLOAT DEFAULT 0.3
+    text_weight FLOAT DEFAULT 0.3,
+    fusion_method TEXT DEFAULT 'weighted',
+    candidate_count INT DEFAULT NULL,
+    rrf_k INT DEFAULT 60
 )
 RETURNS TABLE (
     chunk_id UUID,
@@ -115,48 +258,85 @@ RETURNS TABLE (
 )
 LANGUAGE plpgsql
 AS $$
+DECLARE
+    -- Each branch returns at most this many candidates, so fusion cost does
+    -- not grow with the number of chunks
+    branch_limit INT := COALESCE(candidate_count, GREATEST(match_count * 4, 40));
+    -- Chunks are indexed in their own language (chunks.fts_config), so the
+    -- query is parsed in every supported language and OR'ed
+    text_query tsquery := plainto_tsquery('dutch', query_text) || plainto_tsquery('english', query_text);
 BEGIN
+    IF fusion_method NOT IN ('weighted', 'rrf') THEN
+        RAISE EXCEPTION 'Unknown fusion_method: % (expected weighted or rrf)', fusion_method;
+    END IF;
+    
+    -- An HNSW scan returns at most ef_search rows; let the vector branch fill
+    IF current_setting('hnsw.ef_search', true)::int < branch_limit THEN
+        PERFORM set_config('hnsw.ef_search', branch_limit::text, true);
+    END IF;
+
     RETURN QUERY
     WITH vector_results AS (
-        SELECT 
+        -- Top-K by cosine distance; ORDER BY distance + LIMIT uses the HNSW index
+        SELECT
             c.id AS chunk_id,
-            c.document_id,
-            c.content,
             1 - (c.embedding <=> query_embedding) AS vector_sim,
-            c.metadata,
-            d.title AS doc_title,
-            d.source AS doc_source
-        FROM chunks c
-        JOIN documents d ON c.document_id = d.id
-        WHERE c.embedding IS NOT NULL
+            ROW_NUMBER() OVER (ORDER BY c.embedding <=> query_embedding) AS vector_rank
+        FROM (
+            SELECT ch.id, ch.embedding
+            FROM chunks ch
+            WHERE ch.embedding IS NOT NULL
+            ORDER BY ch.embedding <=> query_embedding
+            LIMIT branch_limit
+        ) c
     ),
     text_results AS (
-        SELECT 
+        -- Top-K by text rank; the @@ match uses the GIN index on content_tsv
+        SELECT
             c.id AS chunk_id,
-            c.document_id,
-            c.content,
-            ts_rank_cd(to_tsvector('english', c.content), plainto_tsquery('english', query_text)) AS text_sim,
-            c.metadata,
-            d.title AS doc_title,
-            d.source AS doc_source
-        FROM chunks c
-        JOIN documents d ON c.document_id = d.id
-        WHERE to_tsvector('english', c.content) @@ plainto_tsquery('english', query_text)
+            c.text_sim,
+            ROW_NUMBER() OVER (ORDER BY c.text_sim DESC) AS text_rank
+        FROM (
+            SELECT
+                ch.id,
+                ts_rank_cd(ch.content_tsv, text_query) AS text_sim
+            FROM chunks ch
+            WHERE ch.content_tsv @@ text_query
+            ORDER BY text_sim DESC
+            LIMIT branch_limit
+        ) c
+    ),
+    fused AS (
+        SELECT
+            COALESCE(v.chunk_id, t.chunk_id) AS fused_id,
+            CASE fusion_method
+                WHEN 'rrf' THEN
+                    COALESCE((1 - text_weight) / (rrf_k + v.vector_rank), 0)
+                    + COALESCE(text_weight / (rrf_k + t.text_rank), 0)
+                ELSE
+                    COALESCE(v.vector_sim, 0) * (1 - text_weight) + COALESCE(t.text_sim, 0) * text_weight
+            END AS score,
+            COALESCE(v.vector_sim, 0) AS vector_sim,
+            COALESCE(t.text_sim, 0) AS text_sim
+        FROM vector_results v
+        FULL OUTER JOIN text_results t ON v.chunk_id = t.chunk_id
+        ORDER BY score DESC
+        LIMIT match_count
     )
-    SELECT 
-        COALESCE(v.chunk_id, t.chunk_id) AS chunk_id,
-        COALESCE(v.document_id, t.document_id) AS document_id,
-        COALESCE(v.content, t.content) AS content,
-        (COALESCE(v.vector_sim, 0) * (1 - text_weight) + COALESCE(t.text_sim, 0) * text_weight) AS combined_score,
-        COALESCE(v.vector_sim, 0) AS vector_similarity,
-        COALESCE(t.text_sim, 0) AS text_similarity,
-        COALESCE(v.metadata, t.metadata) AS metadata,
-        COALESCE(v.doc_title, t.doc_title) AS document_title,
-        COALESCE(v.doc_source, t.doc_source) AS document_source
-    FROM vector_results v
-    FULL OUTER JOIN text_results t ON v.chunk_id = t.chunk_id
-    ORDER BY combined_score DESC
-    LIMIT match_count;
+    SELECT
+        f.fused_id AS chunk_id,
+        c.document_id,
+        c.content,
+        f.score::FLOAT AS combined_score,
+        f.vector_sim::FLOAT AS vector_similarity,
+        f.text_sim::FLOAT AS text_similarity,
+        c.metadata,
+        d.title AS document_title,
+        d.source AS document_source
+    FROM fused f
+    JOIN chunks c ON c.id = f.fused_id
+    JOIN documents d ON c.document_id = d.id
+    ORDER BY f.score DESC;
 END;
 $$;
 
@@ -182,6 +362,46 @@ BEGIN
 END;
 $$;
 
+-- Rebuild the embedding index of chunks or products, e.g.
+--   SELECT rebuild_vector_index('chunks', 'hnsw', 24, 128);
+--   SELECT rebuild_vector_index('products', 'ivfflat', ivfflat_lists => 100);
+-- Raise maintenance_work_mem first for large tables so HNSW builds in memory.
+CREATE OR REPLACE FUNCTION rebuild_vector_index(
+    target_table TEXT,
+    index_method TEXT DEFAULT 'hnsw',
+    hnsw_m INT DEFAULT 16,
+    hnsw_ef_construction INT DEFAULT 64,
+    ivfflat_lists INT DEFAULT 100
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    index_name TEXT := 'idx_' || target_table || '_embedding';
+    index_options TEXT;
+BEGIN
+    IF target_table NOT IN ('chunks', 'products') THEN
+        RAISE EXCEPTION 'rebuild_vector_index: unsupported table %', target_table;
+    END IF;
+
+    IF index_method = 'hnsw' THEN
+        index_options := format('WITH (m = %s, ef_construction = %s)', hnsw_m, hnsw_ef_construction);
+    ELSIF index_method = 'ivfflat' THEN
+        index_options := format('WITH (lists = %s)', ivfflat_lists);
+    ELSE
+        RAISE EXCEPTION 'rebuild_vector_index: unsupported index method %', index_method;
+    END IF;
+
+    EXECUTE format('DROP INDEX IF EXISTS %I', index_name);
+    EXECUTE format(
+        'CREATE INDEX %I ON %I USING %s (embedding vector_cosine_ops) %s',
+        index_name, target_table, index_method, index_options
+    );
+
+    RETURN index_name;
+END;
+$$;
+
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
 BEGIN
@@ -190,12 +410,43 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER update_documents_updated_at BEFORE UPDATE ON documents
+-- Column list keeps chunk_count maintenance from touching updated_at
+CREATE TRIGGER update_documents_updated_at BEFORE UPDATE OF title, source, content, metadata ON documents
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Keep documents.chunk_count in step with chunks, once per statement
+CREATE OR REPLACE FUNCTION sync_document_chunk_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE documents d
+        SET chunk_count = d.chunk_count + delta.n
+        FROM (SELECT document_id, COUNT(*) AS n FROM new_chunks GROUP BY document_id) delta
+        WHERE d.id = delta.document_id;
+    ELSE
+        UPDATE documents d
+        SET chunk_count = GREATEST(d.chunk_count - delta.n, 0)
+        FROM (SELECT document_id, COUNT(*) AS n FROM old_chunks GROUP BY document_id) delta
+        WHERE d.id = delta.document_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER chunks_count_insert AFTER INSERT ON chunks
+    REFERENCING NEW TABLE AS new_chunks
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_document_chunk_count();
+
+CREATE TRIGGER chunks_count_delete AFTER DELETE ON chunks
+    REFERENCING OLD TABLE AS old_chunks
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_document_chunk_count();
+
 CREATE TRIGGER update_sessions_updated_at BEFORE UPDATE ON sessions
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_graph_jobs_updated_at BEFORE UPDATE ON graph_jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 CREATE OR REPLACE VIEW document_summaries AS
 SELECT 
     d.id,
@@ -0,0 +1,54 @@
+"""
+Tests for in-memory caches.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from agent.cache import TTLCache
+
+
+class TestTTLCache:
+    """Test LRU and TTL behaviour."""
+
+    def test_hit_and_miss(self):
+        """Hits count the latency saved."""
+        cache = TTLCache(max_size=2, ttl_seconds=60)
+
+        assert cache.get("q") is None
+        cache.set("q", ["result"], cost_seconds=0.5)
+
+        assert cache.get("q") == ["result"]
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["hit_ratio"] == 0.5
+        assert stats["latency_saved_seconds"] == 0.5
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first."""
+        cache = TTLCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_expiry(self):
+        """Entries expire after the TTL."""
+        cache = TTLCache(max_size=2, ttl_seconds=10)
+
+        with patch("agent.cache.time.monotonic", return_value=100.0):
+            cache.set("q", 1)
+        with patch("agent.cache.time.monotonic", return_value=111.0):
+            assert cache.get("q") is None
+        assert len(cache) == 0
+
+    def test_disabled(self):
+        """A zero-size cache stores nothing."""
+        cache = TTLCache(max_size=0)
+        cache.set("q", 1)
+
+        assert cache.get("q") is None
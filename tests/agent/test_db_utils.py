@@ -5,19 +5,41 @@ Tests for database utilities.
 import pytest
 import asyncio
 import json
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import Mock, MagicMock, AsyncMock, patch
 from datetime import datetime, timezone, timedelta
 
+import asyncpg
+
+from agent.cache import TTLCache
 from agent.db_utils import (
     DatabasePool,
+    PreparedConnection,
+    _init_connection,
+    _uses_prepared_statements,
+    SlowQueryMonitor,
+    SessionCache,
+    MessageWriter,
+    MessageMaintenance,
+    MAINTENANCE_LOCK_ID,
+    queue_message,
+    _decode_json,
+    _json_dumps,
+    _vector_encode,
+    _vector_decode,
     create_session,
     get_session,
     update_session,
     add_message,
     get_session_messages,
+    list_session_messages,
+    encode_message_cursor,
     get_document,
     list_documents,
+    count_documents,
+    encode_document_cursor,
+    decode_document_cursor,
     vector_search,
+    product_search,
     hybrid_search,
     get_document_chunks,
     test_connection as db_test_connection
@@ -56,9 +78,25 @@ class TestDatabasePool:
                 min_size=5,
                 max_size=20,
                 max_inactive_connection_lifetime=300,
-                command_timeout=60
+                command_timeout=60,
+                statement_cache_size=100,
+                connection_class=PreparedConnection,
+                init=_init_connection
             )
     
+    @pytest.mark.asyncio
+    async def test_initialize_without_prepared_statements(self):
+        """DB_STATEMENT_CACHE_SIZE=0 disables prepared statements for poolers."""
+        pool = DatabasePool("postgresql://test")
+        
+        with patch('asyncpg.create_pool', new_callable=AsyncMock) as mock_create_pool, \
+             patch.dict('os.environ', {"DB_STATEMENT_CACHE_SIZE": "0"}):
+            await pool.initialize()
+            
+            kwargs = mock_create_pool.call_args[1]
+            assert kwargs["statement_cache_size"] == 0
+            assert kwargs["connection_class"] is asyncpg.Connection
+    
     @pytest.mark.asyncio
     async def test_close(self):
         """Test pool closure."""
@@ -93,6 +131,154 @@ class TestDatabasePool:
         async with pool.acquire() as conn:
             assert conn == mock_connection
 
+    
+    def _replica(self, name: str, size: int = 5, idle: int = 5) -> Mock:
+        """Mock replica pool that hands out a named connection."""
+        replica = Mock()
+        replica.acquire = AsyncMock(return_value=name)
+        replica.release = AsyncMock()
+        replica.get_size.return_value = size
+        replica.get_idle_size.return_value = idle
+        return replica
+    
+    def _primary(self) -> Mock:
+        """Mock primary pool that hands out the "primary" connection."""
+        class PrimaryContext:
+            async def __aenter__(self):
+                return "primary"
+            async def __aexit__(self, exc_type, exc_val, exc_tb):
+                return None
+        
+        primary = Mock()
+        primary.acquire = Mock(side_effect=lambda **kwargs: PrimaryContext())
+        return primary
+    
+    def test_replica_urls_from_env(self):
+        """DATABASE_REPLICA_URLS is a comma-separated list."""
+        with patch.dict('os.environ', {"DATABASE_REPLICA_URLS": "postgresql://r1, postgresql://r2,"}):
+            pool = DatabasePool("postgresql://test")
+        assert pool.replica_urls == ["postgresql://r1", "postgresql://r2"]
+    
+    def test_invalid_replica_selection(self):
+        """Unknown selection strategies are rejected."""
+        with pytest.raises(ValueError):
+            DatabasePool("postgresql://test", replica_selection="random")
+    
+    @pytest.mark.asyncio
+    async def test_readonly_round_robin(self):
+        """Reads rotate over replicas; writes stay on the primary."""
+        pool = DatabasePool("postgresql://test", replica_urls=[], replica_selection="round_robin")
+        pool.pool = self._primary()
+        pool.replica_pools = [self._replica("r1"), self._replica("r2")]
+        
+        used = []
+        for readonly in (True, True, True, False):
+            async with pool.acquire(readonly=readonly) as conn:
+                used.append(conn)
+        
+        assert used == ["r1", "r2", "r1", "primary"]
+        pool.replica_pools[0].release.assert_called_with("r1")
+    
+    @pytest.mark.asyncio
+    async def test_readonly_least_busy(self):
+        """least_busy picks the replica with the fewest connections in use."""
+        pool = DatabasePool("postgresql://test", replica_urls=[], replica_selection="least_busy")
+        pool.pool = self._primary()
+        pool.replica_pools = [self._replica("busy", size=10, idle=2), self._replica("idle", size=10, idle=9)]
+        
+        async with pool.acquire(readonly=True) as conn:
+            assert conn == "idle"
+    
+    @pytest.mark.asyncio
+    async def test_readonly_falls_back_to_primary(self):
+        """Reads use the primary without replicas or when a replica is down."""
+        pool = DatabasePool("postgresql://test", replica_urls=[])
+        pool.pool = self._primary()
+        
+        async with pool.acquire(readonly=True) as conn:
+            assert conn == "primary"
+        
+        down = self._replica("r1")
+        down.acquire.side_effect = OSError("connection refused")
+        pool.replica_pools = [down]
+        
+        async with pool.acquire(readonly=True) as conn:
+            assert conn == "primary"
+    
+    @pytest.mark.asyncio
+    async def test_pool_settings_from_env(self):
+        """Pool sizes and timeouts come from the environment."""
+        env = {
+            "DB_POOL_MIN_SIZE": "2",
+            "DB_POOL_MAX_SIZE": "50",
+            "DB_POOL_MAX_INACTIVE_LIFETIME": "120",
+            "DB_COMMAND_TIMEOUT": "15",
+            "DB_POOL_ACQUIRE_TIMEOUT": "5"
+        }
+        with patch.dict('os.environ', env):
+            pool = DatabasePool("postgresql://test", replica_urls=[])
+        
+        with patch('asyncpg.create_pool', new_callable=AsyncMock) as mock_create_pool:
+            await pool.initialize()
+        
+        kwargs = mock_create_pool.call_args[1]
+        assert (kwargs["min_size"], kwargs["max_size"]) == (2, 50)
+        assert kwargs["max_inactive_connection_lifetime"] == 120
+        assert kwargs["command_timeout"] == 15
+        assert pool.acquire_timeout == 5
+    
+    @pytest.mark.asyncio
+    async def test_acquire_records_wait_and_stats(self):
+        """Acquire wait is recorded and stats report in-use connections."""
+        pool = DatabasePool("postgresql://test", replica_urls=[])
+        pool.pool = self._primary()
+        pool.pool.get_size.return_value = 8
+        pool.pool.get_idle_size.return_value = 3
+        
+        async with pool.acquire():
+            pass
+        
+        stats = pool.stats()
+        assert stats["acquire_wait"]["count"] == 1
+        assert stats["primary"] == {"size": 8, "idle": 3, "in_use": 5}
+        assert stats["replicas"] == []
+    
+    @pytest.mark.asyncio
+    async def test_acquire_timeout_counted(self):
+        """Pool starvation timeouts are counted; query timeouts are not."""
+        pool = DatabasePool("postgresql://test", replica_urls=[])
+        
+        class StarvedContext:
+            async def __aenter__(self):
+                raise asyncio.TimeoutError()
+            async def __aexit__(self, exc_type, exc_val, exc_tb):
+                return None
+        
+        pool.pool = Mock()
+        pool.pool.acquire = Mock(return_value=StarvedContext())
+        with pytest.raises(asyncio.TimeoutError):
+            async with pool.acquire():
+                pass
+        assert pool.metrics.acquire_timeouts == 1
+        
+        pool.pool = self._primary()
+        with pytest.raises(asyncio.TimeoutError):
+            async with pool.acquire():
+                raise asyncio.TimeoutError()
+        assert pool.metrics.acquire_timeouts == 1
+    
+    @pytest.mark.asyncio
+    async def test_initialize_skips_unreachable_replica(self):
+        """A replica that cannot be reached does not block startup."""
+        pool = DatabasePool("postgresql://test", replica_urls=["postgresql://r1", "postgresql://r2"])
+        replica = Mock()
+        
+        with patch('asyncpg.create_pool', new_callable=AsyncMock) as mock_create_pool:
+            mock_create_pool.side_effect = [Mock(), OSError("connection refused"), replica]
+            await pool.initialize()
+        
+        assert pool.replica_pools == [replica]
+
 
 class TestSessionManagement:
     """Test session management functions."""
@@ -101,6 +287,7 @@ class TestSessionManagement:
     async def test_create_session(self):
         """Test session creation."""
         with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_pool.session_cache = SessionCache(mock_pool)
             mock_conn = AsyncMock()
             mock_conn.fetchrow.return_value = {"id": "session-123"}
             mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
@@ -119,12 +306,13 @@ class TestSessionManagement:
             call_args = mock_conn.fetchrow.call_args
             assert "INSERT INTO sessions" in call_args[0][0]
             assert call_args[0][1] == "user-123"  # user_id
-            assert json.loads(call_args[0][2]) == {"client": "web"}  # metadata
+            assert call_args[0][2] == {"client": "web"}  # metadata (encoded by the pool codec)
     
     @pytest.mark.asyncio
     async def test_get_session_exists(self):
         """Test getting existing session."""
         with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_pool.session_cache = SessionCache(mock_pool)
             mock_conn = AsyncMock()
             mock_result = {
                 "id": "session-123",
@@ -151,6 +339,7 @@ class TestSessionManagement:
     async def test_get_session_not_found(self):
         """Test getting non-existent session."""
         with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_pool.session_cache = SessionCache(mock_pool)
             mock_conn = AsyncMock()
             mock_conn.fetchrow.return_value = None
             mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
@@ -164,15 +353,17 @@ class TestSessionManagement:
     async def test_update_session(self):
         """Test session update."""
         with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_pool.session_cache = SessionCache(mock_pool)
             mock_conn = AsyncMock()
-            mock_conn.execute.return_value = "UPDATE 1"  # PostgreSQL result for 1 row updated
+            mock_conn.fetch.return_value = [{"pg_notify": ""}]  # one row per updated session
             mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
             mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
             
             result = await update_session("session-123", {"new_key": "new_value"})
             
             assert result is True
-            mock_conn.execute.assert_called_once()
+            mock_conn.fetch.assert_called_once()
+            assert mock_conn.fetch.call_args[0][3] == "session_cache_invalidate"
 
 
 class TestMessageManagement:
@@ -182,6 +373,7 @@ class TestMessageManagement:
     async def test_add_message(self):
         """Test adding message."""
         with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_pool.session_cache = SessionCache(mock_pool)
             mock_conn = AsyncMock()
             mock_conn.fetchrow.return_value = {"id": "message-123"}
             mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
@@ -207,6 +399,7 @@ class TestMessageManagement:
     async def test_get_session_messages(self):
         """Test getting session messages."""
         with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_pool.session_cache = SessionCache(mock_pool)
             mock_conn = AsyncMock()
             mock_messages = [
                 {
@@ -224,7 +417,8 @@ class TestMessageManagement:
                     "created_at": datetime.now(timezone.utc)
                 }
             ]
-            mock_conn.fetch.return_value = mock_messages
+            # Rows arrive newest first and are returned in conversation order
+            mock_conn.fetch.return_value = list(reversed(mock_messages))
             mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
             mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
             
@@ -234,6 +428,32 @@ class TestMessageManagement:
             assert messages[0]["role"] == "user"
             assert messages[1]["role"] == "assistant"
             mock_conn.fetch.assert_called_once()
+            args = mock_conn.fetch.call_args[0]
+            assert "ORDER BY created_at DESC, id DESC LIMIT $2" in args[0]
+            assert args[1:] == ("session-123", 10)
+    
+    @pytest.mark.asyncio
+    async def test_list_session_messages_cursor(self):
+        """A cursor continues the export after the last message."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_pool.session_cache = SessionCache(mock_pool)
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = []
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            created_at = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+            cursor = encode_message_cursor({
+                "created_at": created_at.isoformat(),
+                "id": "0b7c0a56-4f1e-4a8e-9d43-6a2f3c1b5e70"
+            })
+            
+            await list_session_messages("session-123", limit=50, cursor=cursor)
+            
+            args = mock_conn.fetch.call_args[0]
+            assert "(created_at, id) > ($2::timestamptz, $3::uuid)" in args[0]
+            assert "ORDER BY created_at, id LIMIT $4" in args[0]
+            assert args[1:] == ("session-123", created_at, "0b7c0a56-4f1e-4a8e-9d43-6a2f3c1b5e70", 50)
 
 
 class TestDocumentManagement:
@@ -300,6 +520,55 @@ class TestDocumentManagement:
             assert len(documents) == 2
             assert documents[0]["title"] == "Document 1"
             assert documents[1]["title"] == "Document 2"
+            assert documents[0]["chunk_count"] == 5
+            
+            # chunk_count is read from documents, not aggregated over chunks
+            query = mock_conn.fetch.call_args[0][0]
+            assert "JOIN chunks" not in query
+            assert "ORDER BY d.created_at DESC, d.id DESC" in query
+    
+    @pytest.mark.asyncio
+    async def test_list_documents_cursor(self):
+        """A cursor continues after the last document with a keyset condition."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = []
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            created_at = datetime(2025, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+            cursor = encode_document_cursor({
+                "created_at": created_at.isoformat(),
+                "id": "5d0c1a3e-8a4b-4f5e-9c2d-1b2a3c4d5e6f"
+            })
+            
+            await list_documents(limit=10, metadata_filter={"tier": 1}, cursor=cursor)
+            
+            args = mock_conn.fetch.call_args[0]
+            assert "(d.created_at, d.id) < ($2::timestamptz, $3::uuid)" in args[0]
+            assert args[1:] == ({"tier": 1}, created_at, "5d0c1a3e-8a4b-4f5e-9c2d-1b2a3c4d5e6f", 10, 0)
+    
+    def test_invalid_cursor(self):
+        """Malformed cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_document_cursor("not-a-cursor")
+    
+    @pytest.mark.asyncio
+    async def test_count_documents_cached(self):
+        """The total is counted once and then served from the cache."""
+        with patch('agent.db_utils.db_pool') as mock_pool, \
+             patch('agent.db_utils._document_count_cache', TTLCache(max_size=8, ttl_seconds=60)):
+            mock_conn = AsyncMock()
+            mock_conn.fetchval.return_value = 42
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            assert await count_documents() == 42
+            assert await count_documents() == 42
+            mock_conn.fetchval.assert_called_once_with("SELECT COUNT(*) FROM documents")
+            # Timed and slow-query logged like the other named queries
+            mock_pool.metrics.time_query.assert_called_once_with("count_documents")
+            assert mock_pool.slow_queries.observe.call_args[0][0] == "count_documents"
 
 
 class TestVectorSearch:
@@ -322,6 +591,7 @@ class TestVectorSearch:
                 }
             ]
             mock_conn.fetch.return_value = mock_results
+            mock_conn.transaction = Mock(return_value=AsyncMock())
             mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
             mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
             
@@ -337,6 +607,77 @@ class TestVectorSearch:
             call_args = mock_conn.fetch.call_args
             assert "match_chunks" in call_args[0][0]
     
+    @pytest.mark.asyncio
+    async def test_product_search_filters(self):
+        """Tag and category filters are passed into search_products."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = [
+                {
+                    "product_id": "5d0c1a3e-8a4b-4f5e-9c2d-1b2a3c4d5e6f",
+                    "name": "Valharnas",
+                    "description": "Harnas voor werken op hoogte",
+                    "url": "https://evi360.nl/products/valharnas",
+                    "category": "fall_protection",
+                    "similarity": 0.87,
+                    "compliance_tags": ["EN_361"],
+                    "metadata": '{}'
+                }
+            ]
+            mock_conn.transaction = Mock(return_value=AsyncMock())
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            with patch.dict('os.environ', {"PRODUCT_SEARCH_EXACT_THRESHOLD": "500"}):
+                results = await product_search(
+                    [0.1] * 1536,
+                    limit=5,
+                    compliance_tags=["EN_361"],
+                    category="fall_protection"
+                )
+            
+            assert results[0]["compliance_tags"] == ["EN_361"]
+            assert results[0]["metadata"] == {}
+            args = mock_conn.fetch.call_args[0]
+            assert "search_products" in args[0]
+            assert args[2:] == (["EN_361"], 5, "fall_protection", 500)
+    
+    @pytest.mark.asyncio
+    async def test_vector_search_ef_search(self):
+        """ef_search is set transaction-locally before the search."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = []
+            mock_conn.transaction = Mock(return_value=AsyncMock())
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            await vector_search([0.1] * 1536, limit=50, ef_search=20)
+            
+            mock_conn.transaction.assert_called_once()
+            set_config_args = mock_conn.fetchval.call_args[0]
+            assert "set_config(" in set_config_args[0] and "'hnsw.ef_search'" in set_config_args[0]
+            # Raised to the limit in SQL so HNSW can return every requested row
+            assert "GREATEST(" in set_config_args[0]
+            assert set_config_args[1:] == (20, 50)
+    
+    @pytest.mark.asyncio
+    async def test_vector_search_default_ef_search_covers_limit(self):
+        """Without ef_search the server default is still raised to the limit."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = []
+            mock_conn.transaction = Mock(return_value=AsyncMock())
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            await vector_search([0.1] * 1536, limit=50)
+            
+            mock_conn.transaction.assert_called_once()
+            set_config_args = mock_conn.fetchval.call_args[0]
+            assert "current_setting('hnsw.ef_search', true)" in set_config_args[0]
+            assert set_config_args[1:] == (None, 50)
+    
     @pytest.mark.asyncio
     async def test_hybrid_search(self):
         """Test hybrid search."""
@@ -356,6 +697,7 @@ class TestVectorSearch:
                 }
             ]
             mock_conn.fetch.return_value = mock_results
+            mock_conn.transaction = Mock(return_value=AsyncMock())
             mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
             mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
             
@@ -371,6 +713,62 @@ class TestVectorSearch:
             assert results[0]["combined_score"] == 0.90
             assert results[0]["vector_similarity"] == 0.85
             assert results[0]["text_similarity"] == 0.70
+            
+            # Weighted fusion over 4 x limit candidates (at least 40) per branch
+            call_args = mock_conn.fetch.call_args[0]
+            assert call_args[5] == "weighted"
+            assert call_args[6] == 40
+            # Without ef_search, HNSW is still raised to the candidate count
+            assert mock_conn.fetchval.call_args[0][1:] == (None, 40)
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_search_default_ef_search_covers_candidates(self):
+        """The vector branch can fill candidate counts above the server default."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = []
+            mock_conn.transaction = Mock(return_value=AsyncMock())
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            await hybrid_search([0.1] * 1536, "test query", limit=50)
+            
+            mock_conn.transaction.assert_called_once()
+            set_config = mock_conn.fetchval.call_args[0]
+            assert "'hnsw.ef_search'" in set_config[0]
+            assert set_config[1:] == (None, 200)
+            assert mock_conn.fetch.call_args[0][6] == 200
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_search_rrf(self):
+        """RRF fusion and candidate count are passed to the SQL function."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = []
+            mock_conn.transaction = Mock(return_value=AsyncMock())
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            await hybrid_search(
+                embedding=[0.1] * 1536,
+                query_text="test query",
+                limit=5,
+                fusion_method="rrf",
+                candidate_count=100,
+                ef_search=40
+            )
+            
+            call_args = mock_conn.fetch.call_args[0]
+            assert call_args[5] == "rrf"
+            assert call_args[6] == 100
+            # ef_search is raised to the candidate count
+            assert mock_conn.fetchval.call_args[0][1:] == (40, 100)
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_search_unknown_fusion(self):
+        """Unknown fusion methods are rejected before querying."""
+        with pytest.raises(ValueError):
+            await hybrid_search([0.1] * 1536, "test", fusion_method="max")
     
     @pytest.mark.asyncio
     async def test_get_document_chunks(self):
@@ -402,6 +800,594 @@ class TestVectorSearch:
             assert chunks[1]["chunk_index"] == 1
 
 
+class TestCodecs:
+    """Test connection codecs and prepared statements."""
+    
+    def test_json_round_trip(self):
+        """Dicts are encoded, pre-serialized strings pass through."""
+        assert json.loads(_json_dumps({"a": 1, 2: "b"})) == {"a": 1, "2": "b"}
+        assert _json_dumps('{"a": 1}') == '{"a": 1}'
+        assert _decode_json('{"a": 1}') == {"a": 1}
+        assert _decode_json({"a": 1}) == {"a": 1}
+        assert _decode_json(None) == {}
+    
+    def test_vector_round_trip(self):
+        """Embeddings use pgvector's text format."""
+        assert _vector_encode([1.0, 2.5]) == "[1.0,2.5]"
+        assert _vector_encode("[1,2]") == "[1,2]"
+        assert _vector_decode("[1,2.5]") == [1.0, 2.5]
+        assert _vector_decode("[]") == []
+    
+    @pytest.mark.asyncio
+    async def test_init_connection_registers_codecs(self):
+        """JSON, JSONB and vector codecs are registered on new connections."""
+        conn = AsyncMock()
+        conn.fetchval.return_value = "extensions"
+        
+        await _init_connection(conn)
+        
+        registered = {c.args[0]: c.kwargs["schema"] for c in conn.set_type_codec.call_args_list}
+        assert registered == {"json": "pg_catalog", "jsonb": "pg_catalog", "vector": "extensions"}
+    
+    @pytest.mark.asyncio
+    async def test_init_connection_without_pgvector(self):
+        """A database without pgvector still gets JSON codecs."""
+        conn = AsyncMock()
+        conn.fetchval.return_value = None
+        
+        await _init_connection(conn)
+        
+        assert conn.set_type_codec.call_count == 2
+    
+    def test_plain_connections_skip_prepared_statements(self):
+        """Only PreparedConnection instances are treated as preparing."""
+        assert _uses_prepared_statements(AsyncMock()) is False
+    
+    @pytest.mark.asyncio
+    async def test_hot_queries_use_prepared_statements(self):
+        """Hot queries run through the connection's prepared statements."""
+        with patch('agent.db_utils.db_pool') as mock_pool, \
+             patch('agent.db_utils._uses_prepared_statements', return_value=True):
+            mock_conn = AsyncMock()
+            mock_conn.run_prepared.return_value = [
+                {"chunk_id": "chunk-1", "content": "c", "chunk_index": 0, "metadata": {"k": "v"}}
+            ]
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            chunks = await get_document_chunks("doc-123")
+            
+            assert chunks[0]["metadata"] == {"k": "v"}
+            method, query = mock_conn.run_prepared.call_args[0][:2]
+            assert method == "fetch"
+            assert "get_document_chunks" in query
+            mock_conn.fetch.assert_not_called()
+
+
+class TestSlowQueryMonitor:
+    """Test the slow-query log and EXPLAIN capture."""
+    
+    def _monitor(self, env, pool=None):
+        """Create a monitor with DB_SLOW_QUERY_* settings."""
+        with patch.dict('os.environ', env):
+            monitor = SlowQueryMonitor(pool or Mock())
+        monitor._log = Mock()
+        return monitor
+    
+    def test_disabled_by_default(self):
+        """Without DB_SLOW_QUERY_MS nothing is recorded."""
+        with patch.dict('os.environ', {}, clear=True):
+            monitor = SlowQueryMonitor(Mock())
+        monitor.observe("vector_search", "SELECT 1", (), 10.0)
+        assert not monitor.enabled
+        assert monitor.slow_queries == 0
+    
+    def test_slow_query_logged_without_values(self):
+        """Slow queries are logged with fingerprints, never parameter values."""
+        monitor = self._monitor({"DB_SLOW_QUERY_MS": "100", "DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE": "0"})
+        
+        monitor.observe("get_document", "SELECT 1", ("secret-id",), 0.05)
+        assert monitor.slow_queries == 0
+        
+        monitor.observe("get_document", "SELECT  *\n FROM documents WHERE id = $1", ("secret-id",), 0.25)
+        entry = json.loads(monitor._log.warning.call_args[0][0])
+        assert entry["name"] == "get_document"
+        assert entry["elapsed_ms"] == 250.0
+        assert entry["params"] == ["text[9]"]
+        assert "secret-id" not in json.dumps(entry)
+        
+        # Whitespace does not change the query fingerprint
+        same = SlowQueryMonitor.fingerprint("SELECT * FROM documents WHERE id = $1", ("other",))
+        assert same["query_fingerprint"] == entry["query_fingerprint"]
+        assert same["params_fingerprint"] != entry["params_fingerprint"]
+    
+    @pytest.mark.asyncio
+    async def test_explain_captures_seq_scans(self):
+        """Sampled read-only slow queries get an EXPLAIN with sequential scans listed."""
+        plan = [{
+            "Plan": {
+                "Node Type": "Limit",
+                "Shared Read Blocks": 900,
+                "Plans": [{"Node Type": "Seq Scan", "Relation Name": "chunks", "Actual Rows": 10}]
+            },
+            "Execution Time": 312.5
+        }]
+        conn = AsyncMock()
+        conn.transaction = Mock(return_value=AsyncMock())
+        conn.fetchval.return_value = json.dumps(plan)
+        pool = Mock()
+        pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+        pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        
+        monitor = self._monitor({"DB_SLOW_QUERY_MS": "100", "DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE": "1"}, pool)
+        monitor.observe("list_documents", "SELECT * FROM documents LIMIT $1", (10,), 0.5)
+        await asyncio.gather(*monitor._tasks)
+        
+        pool.acquire.assert_called_with(readonly=True)
+        conn.transaction.assert_called_with(readonly=True)
+        assert conn.fetchval.call_args[0][0].startswith("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT")
+        
+        entry = json.loads(monitor._log.warning.call_args[0][0])
+        assert entry["explain"]["execution_ms"] == 312.5
+        assert entry["explain"]["shared_read_blocks"] == 900
+        assert entry["explain"]["seq_scans"][0]["relation"] == "chunks"
+        assert monitor.explains == 1
+    
+    @pytest.mark.asyncio
+    async def test_function_query_explained_with_auto_explain(self):
+        """Search functions are explained statement by statement with the search's ef_search."""
+        def notice(duration, plan):
+            return Mock(message=f"duration: {duration} ms  plan:\n{json.dumps(plan)}")
+        
+        nested = {
+            "Query Text": "SELECT ... FROM chunks c ORDER BY c.embedding <=> query_embedding",
+            "Query Parameters": "$1 = '[0.1,...]'",
+            "Plan": {
+                "Node Type": "Limit",
+                "Shared Read Blocks": 800,
+                "Plans": [{"Node Type": "Seq Scan", "Relation Name": "chunks", "Actual Rows": 5000}]
+            }
+        }
+        outer = {
+            "Query Text": "SELECT * FROM match_chunks($1::vector, $2)",
+            "Query Parameters": "$1 = '[0.1,...]', $2 = '50'",
+            "Plan": {"Node Type": "Function Scan", "Shared Read Blocks": 820}
+        }
+        
+        explain_conn = AsyncMock()
+        explain_conn.transaction = Mock(return_value=AsyncMock())
+        listeners = []
+        explain_conn.add_log_listener = Mock(side_effect=listeners.append)
+        explain_conn.remove_log_listener = Mock(side_effect=listeners.remove)
+        
+        async def run_function(query, *args):
+            for listener in list(listeners):
+                listener(explain_conn, Mock(message="auto_explain: unrelated notice"))
+                listener(explain_conn, notice(410.2, nested))
+                listener(explain_conn, notice(412.5, outer))
+            return []
+        explain_conn.fetch.side_effect = run_function
+        explain_pool = Mock()
+        explain_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=explain_conn)
+        explain_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        
+        monitor = self._monitor(
+            {"DB_SLOW_QUERY_MS": "0.000001", "DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE": "1"},
+            explain_pool
+        )
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            search_conn = AsyncMock()
+            search_conn.fetch.return_value = []
+            search_conn.fetchval.return_value = "50"
+            search_conn.transaction = Mock(return_value=AsyncMock())
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=search_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            mock_pool.slow_queries = monitor
+            
+            await vector_search([0.1] * 1536, limit=50, ef_search=20)
+            await asyncio.gather(*monitor._tasks)
+        
+        executed = [call[0] for call in explain_conn.execute.call_args_list]
+        assert ("SELECT set_config($1, $2, true)", "hnsw.ef_search", "50") in executed
+        assert ("LOAD 'auto_explain'",) in executed
+        assert ("SELECT set_config($1, $2, true)", "auto_explain.log_nested_statements", "on") in executed
+        explain_conn.fetchval.assert_not_called()
+        assert not listeners
+        
+        entry = json.loads(monitor._log.warning.call_args[0][0])
+        assert entry["name"] == "vector_search"
+        assert entry["explain"]["execution_ms"] == 412.5
+        assert entry["explain"]["shared_read_blocks"] == 820
+        assert entry["explain"]["seq_scans"] == [
+            {"relation": "chunks", "rows": 5000, "rows_removed_by_filter": 0}
+        ]
+        assert len(entry["explain"]["statements"]) == 2
+        assert "Query Parameters" not in json.dumps(entry)
+        assert monitor.explains == 1
+    
+    @pytest.mark.asyncio
+    async def test_function_query_falls_back_without_auto_explain(self):
+        """Without auto_explain the plain EXPLAIN is logged with a note."""
+        conn = AsyncMock()
+        conn.transaction = Mock(return_value=AsyncMock())
+        conn.add_log_listener = Mock()
+        
+        async def execute(query, *args):
+            if query.startswith("LOAD"):
+                raise asyncpg.InsufficientPrivilegeError("access to library \"auto_explain\" is not allowed")
+        conn.execute.side_effect = execute
+        conn.fetchval.return_value = json.dumps([{"Plan": {"Node Type": "Function Scan"}, "Execution Time": 300.0}])
+        pool = Mock()
+        pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+        pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        
+        monitor = self._monitor({"DB_SLOW_QUERY_MS": "100", "DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE": "1"}, pool)
+        monitor.observe("get_document_chunks", "SELECT * FROM get_document_chunks($1::uuid)", ("doc",), 0.5)
+        await asyncio.gather(*monitor._tasks)
+        
+        conn.add_log_listener.assert_not_called()
+        entry = json.loads(monitor._log.warning.call_args[0][0])
+        assert "auto_explain unavailable" in entry["explain_note"]
+        assert entry["explain"]["execution_ms"] == 300.0
+    
+    def test_writes_are_never_explained(self):
+        """EXPLAIN ANALYZE would re-run a write, so writes are only logged."""
+        monitor = self._monitor({"DB_SLOW_QUERY_MS": "1", "DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE": "1"})
+        monitor.observe("add_message", "INSERT INTO messages VALUES ($1)", ("x",), 1.0)
+        assert not monitor._tasks
+        monitor._log.warning.assert_called_once()
+
+
+class TestSessionCache:
+    """Test the session and conversation-context cache."""
+    
+    def _cache(self, mock_pool, window: str = "20") -> SessionCache:
+        """Create an active cache (as if its LISTEN connection were up)."""
+        with patch.dict('os.environ', {"SESSION_CACHE_MESSAGES": window}):
+            cache = SessionCache(mock_pool)
+        cache._listener = Mock(is_closed=Mock(return_value=False))
+        mock_pool.session_cache = cache
+        return cache
+    
+    @pytest.mark.asyncio
+    async def test_new_session_served_from_cache(self):
+        """A created session and its (empty) context need no further reads."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            self._cache(mock_pool)
+            mock_conn = AsyncMock()
+            now = datetime.now(timezone.utc)
+            mock_conn.fetchrow.return_value = {"id": "session-123", "created_at": now, "updated_at": now}
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            session_id = await create_session(user_id="user-123")
+            session = await get_session(session_id)
+            messages = await get_session_messages(session_id, limit=6, read_your_writes=True)
+            
+            assert session["user_id"] == "user-123"
+            assert messages == []
+            mock_conn.fetchrow.assert_called_once()
+            mock_conn.fetch.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_messages_written_through(self):
+        """Added messages extend the cached window, which is trimmed to its size."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            cache = self._cache(mock_pool, window="3")
+            cache.set_messages("session-123", [], complete=True)
+            mock_conn = AsyncMock()
+            mock_conn.fetchrow.side_effect = [
+                {"id": f"msg-{i}", "created_at": datetime.now(timezone.utc)} for i in range(4)
+            ]
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            for i in range(4):
+                await add_message("session-123", "user", f"message {i}")
+            
+            messages = await get_session_messages("session-123", limit=2)
+            assert [m["id"] for m in messages] == ["msg-2", "msg-3"]
+            
+            # Older messages were trimmed, so a larger tail must be read
+            assert cache.get_messages("session-123", 3) is not None
+            assert cache.get_messages("session-123", 4) is None
+            assert "pg_notify" in mock_conn.fetchrow.call_args[0][0]
+    
+    @pytest.mark.asyncio
+    async def test_queued_messages_merged_into_reads(self):
+        """Messages still queued for writing are part of a database read and its cached window."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            cache = self._cache(mock_pool)
+            mock_pool.message_writer = MessageWriter(mock_pool)
+            written_at = datetime.now(timezone.utc) - timedelta(seconds=5)
+            await mock_pool.message_writer.enqueue(
+                "00000000-0000-0000-0000-000000000002",
+                "session-123",
+                "user",
+                "Queued",
+                {},
+                datetime.now(timezone.utc)
+            )
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = [{
+                "id": "00000000-0000-0000-0000-000000000001",
+                "role": "assistant",
+                "content": "Written",
+                "metadata": '{}',
+                "created_at": written_at
+            }]
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            messages = await get_session_messages("session-123", limit=6, read_your_writes=True)
+            
+            assert [m["content"] for m in messages] == ["Written", "Queued"]
+            assert [m["content"] for m in cache.get_messages("session-123", 6)] == ["Written", "Queued"]
+    
+    @pytest.mark.asyncio
+    async def test_invalidation_during_read_not_cached(self):
+        """A read that overlaps an invalidation from another worker is returned but not cached."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            cache = self._cache(mock_pool)
+            mock_pool.message_writer = MessageWriter(mock_pool)
+            
+            async def read_then_notified(*args, **kwargs):
+                # Another worker writes to the session while our read is in flight
+                cache._on_notify(None, 1, "session_cache_invalidate", "other-worker:session-123")
+                return [{
+                    "id": "00000000-0000-0000-0000-000000000001",
+                    "role": "user",
+                    "content": "Before the write",
+                    "metadata": '{}',
+                    "created_at": datetime.now(timezone.utc)
+                }]
+            
+            mock_conn = AsyncMock()
+            mock_conn.fetch.side_effect = read_then_notified
+            mock_conn.fetchrow.side_effect = lambda *args, **kwargs: (
+                cache._on_notify(None, 1, "session_cache_invalidate", "other-worker:session-123")
+                or {
+                    "id": "session-123",
+                    "user_id": "user-123",
+                    "metadata": '{}',
+                    "created_at": datetime.now(timezone.utc),
+                    "updated_at": datetime.now(timezone.utc),
+                    "expires_at": None
+                }
+            )
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            messages = await get_session_messages("session-123", limit=6, read_your_writes=True)
+            session = await get_session("session-123")
+            
+            assert [m["content"] for m in messages] == ["Before the write"]
+            assert session["user_id"] == "user-123"
+            assert cache.get_messages("session-123", 6) is None
+            assert cache.get_session("session-123") is None
+            
+            # Without an overlapping invalidation the next read is cached
+            mock_conn.fetch.side_effect = None
+            mock_conn.fetch.return_value = []
+            await get_session_messages("session-123", limit=6, read_your_writes=True)
+            assert cache.get_messages("session-123", 6) == []
+    
+    def test_notifications_invalidate(self):
+        """Writes announced by other workers drop entries; our own are ignored."""
+        cache = self._cache(Mock())
+        for session_id in ("a", "b"):
+            cache.set_session({"id": session_id, "expires_at": None})
+        
+        cache._on_notify(None, 1, "session_cache_invalidate", cache.notify_payload("a"))
+        assert cache.get_session("a") is not None
+        
+        cache._on_notify(None, 1, "session_cache_invalidate", "other-worker:a")
+        assert cache.get_session("a") is None
+        assert cache.get_session("b") is not None
+        
+        cache._on_notify(None, 1, "session_cache_invalidate", "other-worker:*")
+        assert cache.get_session("b") is None
+        assert cache.invalidations == 2
+    
+    def test_bypassed_without_listener(self):
+        """Without invalidations nothing is cached or served."""
+        cache = self._cache(Mock())
+        cache.set_session({"id": "a", "expires_at": None})
+        
+        cache._listener = None
+        
+        assert not cache.active
+        assert cache.get_session("a") is None
+    
+    def test_expired_session_not_served(self):
+        """Sessions past expires_at are dropped."""
+        cache = self._cache(Mock())
+        expired = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+        cache.set_session({"id": "a", "expires_at": expired})
+        
+        assert cache.get_session("a") is None
+        assert len(cache.sessions) == 0
+
+
+class TestMessageWriter:
+    """Test write-behind message persistence."""
+    
+    def _writer(self, mock_conn) -> MessageWriter:
+        """Create a writer with batches of two on a mocked pool."""
+        mock_pool = Mock()
+        mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        mock_pool.session_cache = SessionCache(mock_pool)
+        with patch.dict('os.environ', {"MESSAGE_WRITE_BATCH_SIZE": "2", "MESSAGE_WRITE_FLUSH_MS": "1"}):
+            return MessageWriter(mock_pool)
+    
+    async def _enqueue(self, writer: MessageWriter, count: int):
+        """Queue count messages for one session."""
+        for i in range(count):
+            await writer.enqueue(
+                f"00000000-0000-0000-0000-00000000000{i}",
+                "session-123",
+                "user",
+                f"message {i}",
+                {},
+                datetime.now(timezone.utc)
+            )
+    
+    @pytest.mark.asyncio
+    async def test_flush_writes_batches(self):
+        """Queued messages are written with one multi-row insert per batch."""
+        mock_conn = AsyncMock()
+        writer = self._writer(mock_conn)
+        await self._enqueue(writer, 3)
+        
+        await writer.flush()
+        
+        assert mock_conn.fetch.call_count == 2
+        query, ids, sessions, roles, contents = mock_conn.fetch.call_args_list[0][0][:5]
+        assert "unnest(" in query and "pg_notify" in query
+        assert len(ids) == 2 and contents == ["message 0", "message 1"]
+        assert writer.stats()["written"] == 3
+        assert writer.stats()["pending"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_failed_batch_retried_per_row(self):
+        """A rejected batch is retried row by row and only bad rows are dropped."""
+        mock_conn = AsyncMock()
+        mock_conn.fetch.side_effect = [
+            asyncpg.ForeignKeyViolationError("missing session"),
+            [],
+            asyncpg.ForeignKeyViolationError("missing session")
+        ]
+        writer = self._writer(mock_conn)
+        await self._enqueue(writer, 2)
+        
+        await writer.flush()
+        
+        assert writer.written == 1
+        assert writer.failed == 1
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error", [
+        asyncpg.ConnectionDoesNotExistError("connection was closed"),
+        asyncpg.AdminShutdownError("terminating connection due to administrator command"),
+        asyncpg.QueryCanceledError("canceling statement due to statement timeout")
+    ])
+    async def test_transient_error_keeps_messages_queued(self, error):
+        """Connection loss, shutdowns and timeouts never drop messages."""
+        mock_conn = AsyncMock()
+        mock_conn.fetch.side_effect = error
+        writer = self._writer(mock_conn)
+        await self._enqueue(writer, 2)
+        
+        with pytest.raises(type(error)):
+            await writer.flush()
+        
+        assert writer.stats()["pending"] == 2
+        assert writer.failed == 0
+        
+        # The next flush writes them once the database is back
+        mock_conn.fetch.side_effect = None
+        await writer.flush()
+        assert writer.written == 2
+        assert writer.stats()["pending"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_stop_logs_failed_final_flush(self):
+        """A failing final flush is logged so shutdown can continue."""
+        mock_conn = AsyncMock()
+        mock_conn.fetch.side_effect = asyncpg.CannotConnectNowError("the database system is shutting down")
+        writer = self._writer(mock_conn)
+        await self._enqueue(writer, 1)
+        
+        await writer.stop()
+        
+        assert writer.stats()["pending"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending(self):
+        """Stopping the writer writes everything still queued."""
+        mock_conn = AsyncMock()
+        writer = self._writer(mock_conn)
+        writer.start()
+        assert writer.running
+        await self._enqueue(writer, 1)
+        
+        await writer.stop()
+        
+        assert not writer.running
+        assert writer.written == 1
+    
+    @pytest.mark.asyncio
+    async def test_queue_message_inline_without_writer(self):
+        """Without a running writer messages are inserted inline."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_pool.session_cache = SessionCache(mock_pool)
+            mock_pool.message_writer = MessageWriter(mock_pool)
+            mock_conn = AsyncMock()
+            mock_conn.fetchrow.return_value = {"id": "message-123"}
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            assert await queue_message("session-123", "user", "Hello") == "message-123"
+            mock_conn.fetchrow.assert_called_once()
+
+
+class TestMessageMaintenance:
+    """Test session expiry and message partition maintenance."""
+    
+    def _maintenance(self, mock_conn, env=None) -> MessageMaintenance:
+        """Create maintenance on a mocked pool."""
+        mock_pool = MagicMock()
+        mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch.dict('os.environ', {"SESSION_CLEANUP_BATCH_SIZE": "100", **(env or {})}):
+            return MessageMaintenance(mock_pool)
+    
+    @pytest.mark.asyncio
+    async def test_run_once(self):
+        """A pass creates partitions and deletes expired sessions until a short batch."""
+        mock_conn = AsyncMock()
+        mock_conn.fetchval.side_effect = [True, ["messages_2026_12"], 100, 7]
+        maintenance = self._maintenance(mock_conn)
+        
+        result = await maintenance.run_once()
+        
+        assert result == {
+            "partitions_created": ["messages_2026_12"],
+            "partitions_removed": [],
+            "sessions_deleted": 107
+        }
+        assert "drop_message_partitions" not in str(mock_conn.fetchval.call_args_list)
+        mock_conn.execute.assert_called_once_with("SELECT pg_advisory_unlock($1)", MAINTENANCE_LOCK_ID)
+        assert maintenance.stats()["runs"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_retention_archives_partitions(self):
+        """With a retention, old partitions are dropped or detached."""
+        mock_conn = AsyncMock()
+        mock_conn.fetchval.side_effect = [True, None, 0, ["messages_2025_01"]]
+        maintenance = self._maintenance(
+            mock_conn,
+            {"MESSAGE_RETENTION_MONTHS": "12", "MESSAGE_RETENTION_ARCHIVE": "true"}
+        )
+        
+        result = await maintenance.run_once()
+        
+        assert result["partitions_removed"] == ["messages_2025_01"]
+        assert mock_conn.fetchval.call_args[0][1:] == (12, True)
+    
+    @pytest.mark.asyncio
+    async def test_skipped_when_locked(self):
+        """Another worker holding the lock skips the pass."""
+        mock_conn = AsyncMock()
+        mock_conn.fetchval.return_value = False
+        maintenance = self._maintenance(mock_conn)
+        
+        assert await maintenance.run_once() is None
+        mock_conn.fetchval.assert_called_once()
+        mock_conn.execute.assert_not_called()
+
+
 class TestUtilityFunctions:
     """Test utility functions."""
     
@@ -0,0 +1,416 @@
+"""
+Tests for graph utilities.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from agent.graph_utils import GraphitiClient, test_graph_connection as graph_test_connection
+
+
+@pytest.fixture
+def client():
+    """Graphiti client with a mocked Neo4j driver."""
+    client = GraphitiClient()
+    client.graphiti = Mock()
+    client.graphiti.driver.execute_query = AsyncMock()
+    client.graphiti.search = AsyncMock()
+    client.graphiti.add_episode = AsyncMock()
+    client._initialized = True
+    return client
+
+
+COUNTS = {
+    "total_nodes": 120,
+    "total_relationships": 300,
+    "entities": 90,
+    "episodes": 25,
+    "communities": 5,
+    "relates_to": 200,
+    "mentions": 95,
+    "has_member": 5
+}
+
+
+class TestGraphStatistics:
+    """Test Cypher-based statistics."""
+
+    @pytest.mark.asyncio
+    async def test_counts(self, client):
+        """Statistics come from Cypher counts, not search."""
+        client.graphiti.driver.execute_query.side_effect = [
+            ([COUNTS], None, None),
+            ([{"source": "Document: Arbo", "episodes": 25}], None, None)
+        ]
+
+        stats = await client.get_graph_statistics()
+
+        assert stats["total_nodes"] == 120
+        assert stats["node_types"]["Episodic"] == 25
+        assert stats["relationship_types"]["RELATES_TO"] == 200
+        assert stats["episodes_by_source"] == {"Document: Arbo": 25}
+        client.graphiti.search.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_cached(self, client):
+        """Statistics are served from cache within the TTL."""
+        client.graphiti.driver.execute_query.side_effect = [
+            ([COUNTS], None, None),
+            ([], None, None)
+        ]
+
+        first = await client.get_graph_statistics()
+        second = await client.get_graph_statistics()
+
+        assert first is second
+        assert client.graphiti.driver.execute_query.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failure(self, client):
+        """Driver errors are reported rather than raised."""
+        client.graphiti.driver.execute_query.side_effect = RuntimeError("Neo4j unavailable")
+
+        stats = await client.get_graph_statistics()
+
+        assert stats["graphiti_initialized"] is False
+        assert "Neo4j unavailable" in stats["error"]
+
+
+class TestGraphConnection:
+    """Test the health check."""
+
+    @pytest.mark.asyncio
+    async def test_ping(self, client):
+        """The connection test only runs a trivial query."""
+        client.graphiti.driver.execute_query.return_value = ([{"ok": 1}], None, None)
+
+        with patch('agent.graph_utils.graph_client', client):
+            assert await graph_test_connection() is True
+
+        client.graphiti.driver.execute_query.assert_called_once_with("RETURN 1 AS ok")
+        client.graphiti.search.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ping_failure(self, client):
+        """An unreachable database fails the check."""
+        client.graphiti.driver.execute_query.side_effect = RuntimeError("Connection refused")
+
+        with patch('agent.graph_utils.graph_client', client):
+            assert await graph_test_connection() is False
+
+
+def edge(uuid, source, target, neighbor_uuid, neighbor_name, type_="WORKS_FOR"):
+    """Traversal record for testing."""
+    return {
+        "source": source,
+        "target": target,
+        "uuid": uuid,
+        "type": type_,
+        "fact": f"{source} {type_} {target}",
+        "valid_at": None,
+        "invalid_at": None,
+        "neighbor_uuid": neighbor_uuid,
+        "neighbor_name": neighbor_name,
+        "neighbor_summary": ""
+    }
+
+
+class TestRelatedEntities:
+    """Test Cypher traversal of entity relationships."""
+
+    @pytest.mark.asyncio
+    async def test_two_hops(self, client):
+        """Each hop expands from the previous frontier."""
+        client.graphiti.driver.execute_query.side_effect = [
+            ([{"uuid": "u-sam", "name": "Sam Altman", "summary": ""}], None, None),
+            ([edge("e1", "Sam Altman", "OpenAI", "u-openai", "OpenAI")], None, None),
+            ([edge("e2", "Microsoft", "OpenAI", "u-msft", "Microsoft", "INVESTED_IN")], None, None)
+        ]
+
+        result = await client.get_related_entities("Sam Altman", depth=2)
+
+        assert result["entity_found"] is True
+        assert result["search_method"] == "cypher_traversal"
+        assert [e["name"] for e in result["related_entities"]] == ["OpenAI", "Microsoft"]
+        assert [e["hops"] for e in result["related_entities"]] == [1, 2]
+        assert result["relationships"][1] == {
+            "from": "Microsoft",
+            "to": "OpenAI",
+            "type": "INVESTED_IN",
+            "fact": "Microsoft INVESTED_IN OpenAI",
+            "valid_at": None,
+            "invalid_at": None,
+            "hops": 2
+        }
+        second_hop = client.graphiti.driver.execute_query.call_args_list[2].kwargs["params"]
+        assert second_hop["frontier"] == ["u-openai"]
+        assert set(second_hop["visited"]) == {"u-sam", "u-openai"}
+        client.graphiti.search.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_fulltext_fallback_and_types(self, client):
+        """Unmatched names resolve through the fulltext index; types are normalized."""
+        client.graphiti.driver.execute_query.side_effect = [
+            ([], None, None),
+            ([{"uuid": "u-sam", "name": "Sam Altman", "summary": ""}], None, None),
+            ([], None, None)
+        ]
+
+        result = await client.get_related_entities("altman", relationship_types=["works for"], depth=9)
+
+        assert result["central_entity"] == "Sam Altman"
+        assert result["depth"] == 5
+        fulltext_query = client.graphiti.driver.execute_query.call_args_list[1].args[0]
+        assert "node_name_and_summary" in fulltext_query
+        assert client.graphiti.driver.execute_query.call_args_list[2].kwargs["params"]["types"] == ["WORKS_FOR"]
+
+    @pytest.mark.asyncio
+    async def test_not_found(self, client):
+        """An unknown entity returns empty results."""
+        client.graphiti.driver.execute_query.return_value = ([], None, None)
+
+        result = await client.get_related_entities("Nobody")
+
+        assert result["entity_found"] is False
+        assert result["related_entities"] == []
+
+    @pytest.mark.asyncio
+    async def test_limit(self, client):
+        """Results beyond the limit are cut off and flagged."""
+        client.graphiti.driver.execute_query.side_effect = [
+            ([{"uuid": "u-0", "name": "Hub", "summary": ""}], None, None),
+            ([edge(f"e{i}", "Hub", f"N{i}", f"u-{i + 1}", f"N{i}") for i in range(3)], None, None)
+        ]
+
+        result = await client.get_related_entities("Hub", depth=2, limit=2)
+
+        assert len(result["relationships"]) == 2
+        assert result["truncated"] is True
+        assert client.graphiti.driver.execute_query.call_count == 2
+
+
+class TestEntityTimeline:
+    """Test Cypher timeline queries."""
+
+    @pytest.mark.asyncio
+    async def test_filters_and_paging_in_cypher(self, client):
+        """Date bounds and paging are passed to the query as parameters."""
+        from datetime import datetime, timezone
+
+        client.graphiti.driver.execute_query.side_effect = [
+            ([{"uuid": "u-msft", "name": "Microsoft", "summary": ""}], None, None),
+            ([{
+                "uuid": "e1",
+                "fact": "Microsoft invested in OpenAI",
+                "type": "INVESTED_IN",
+                "valid_at": datetime(2023, 1, 23, tzinfo=timezone.utc),
+                "invalid_at": None,
+                "related_entity": "OpenAI"
+            }], None, None)
+        ]
+
+        timeline = await client.get_entity_timeline(
+            "Microsoft",
+            start_date=datetime(2023, 1, 1),
+            limit=10,
+            offset=20
+        )
+
+        query = client.graphiti.driver.execute_query.call_args.args[0]
+        params = client.graphiti.driver.execute_query.call_args.kwargs["params"]
+        assert "ORDER BY" in query and "SKIP $offset" in query
+        assert params["start"] == datetime(2023, 1, 1, tzinfo=timezone.utc)
+        assert params["end"] is None
+        assert (params["limit"], params["offset"]) == (10, 20)
+        assert timeline[0]["related_entity"] == "OpenAI"
+        assert timeline[0]["invalid_at"] is None
+        client.graphiti.search.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unknown_entity(self, client):
+        """An unknown entity has an empty timeline."""
+        client.graphiti.driver.execute_query.return_value = ([], None, None)
+
+        assert await client.get_entity_timeline("Nobody") == []
+
+
+class TestSearchCache:
+    """Test graph search caching and invalidation."""
+
+    @pytest.fixture
+    def search_client(self, client):
+        """Client whose generation token is stable."""
+        client.graphiti.driver.execute_query.return_value = ([{"token": "gen-1"}], None, None)
+        client.graphiti.search.return_value = [
+            Mock(fact="OpenAI partners with Microsoft", uuid="e1", valid_at=None, invalid_at=None, source_node_uuid=None)
+        ]
+        return client
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_hits_cache(self, search_client):
+        """Equivalent queries are answered from cache."""
+        first = await search_client.search("OpenAI  partners")
+        second = await search_client.search("openai partners")
+
+        assert first == second
+        assert search_client.graphiti.search.call_count == 1
+        assert search_client.search_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_add_episode_invalidates(self, search_client):
+        """Writes to the graph invalidate cached results."""
+        await search_client.search("OpenAI partners")
+        await search_client.add_episode(episode_id="ep", content="text", source="doc")
+        await search_client.search("OpenAI partners")
+
+        assert search_client.graphiti.search.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_remote_generation_change_invalidates(self, search_client):
+        """A generation bumped by another process clears the cache."""
+        search_client.generation_check_seconds = 0
+
+        await search_client.search("OpenAI partners")
+        search_client.graphiti.driver.execute_query.return_value = ([{"token": "gen-2"}], None, None)
+        await search_client.search("OpenAI partners")
+
+        assert search_client.graphiti.search.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_not_cached(self, search_client):
+        """Failed searches are retried on the next call."""
+        search_client.graphiti.search.side_effect = [RuntimeError("rerank failed"), []]
+
+        assert await search_client.search("OpenAI partners") == []
+        await search_client.search("OpenAI partners")
+
+        assert search_client.graphiti.search.call_count == 2
+
+
+class TestSharedClients:
+    """Test the process-wide client registry and pooled driver."""
+
+    def test_registry_returns_shared_client(self):
+        """The same database always maps to the same client."""
+        from agent.graph_utils import get_graph_client, graph_client
+
+        assert get_graph_client() is graph_client
+        assert get_graph_client("bolt://other:7687") is not graph_client
+
+    def test_graphiti_shares_http_clients(self):
+        """Graphiti gets the shared OpenAI clients and a pooled driver."""
+        from agent.graph_utils import PooledNeo4jDriver
+        from agent.providers import get_openai_client
+
+        graphiti = GraphitiClient()._build_graphiti()
+
+        assert isinstance(graphiti.driver, PooledNeo4jDriver)
+        assert graphiti.llm_client.client is get_openai_client("https://api.openai.com/v1", "sk-test-key-for-testing")
+        assert graphiti.cross_encoder.client is graphiti.llm_client.client
+        assert graphiti.embedder.client is get_openai_client("https://api.openai.com/v1", "sk-test-key-for-testing")
+
+    @pytest.mark.asyncio
+    async def test_pool_gate(self):
+        """Queries beyond the pool size wait and are counted."""
+        import asyncio
+        from agent.graph_utils import PooledNeo4jDriver
+
+        driver = PooledNeo4jDriver("bolt://localhost:7687", "neo4j", "test", max_connection_pool_size=2)
+
+        async def slow_query(*args, **kwargs):
+            await asyncio.sleep(0.02)
+            return ([], None, None)
+
+        driver.client = Mock()
+        driver.client.execute_query = slow_query
+
+        await asyncio.gather(*(driver.execute_query("RETURN 1") for _ in range(4)))
+
+        stats = driver.pool_stats()
+        assert stats["queries"] == 4
+        assert stats["peak_in_flight"] == 2
+        assert stats["waited"] == 2
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_pool_gate_covers_sessions(self):
+        """Sessions (Graphiti bulk writes) hold a pool slot until closed."""
+        import asyncio
+        from agent.graph_utils import PooledNeo4jDriver
+
+        driver = PooledNeo4jDriver("bolt://localhost:7687", "neo4j", "test", max_connection_pool_size=1)
+
+        async def slow_write(func, *args, **kwargs):
+            await asyncio.sleep(0.02)
+
+        def open_session(database):
+            session = AsyncMock()
+            session.execute_write = slow_write
+            return session
+
+        driver.client = Mock()
+        driver.client.session = Mock(side_effect=open_session)
+
+        async def bulk_write():
+            session = driver.session(database="neo4j")
+            try:
+                await session.execute_write(Mock())
+            finally:
+                await session.close()
+
+        async def clear():
+            async with driver.session(database="neo4j") as session:
+                await session.execute_write(Mock())
+
+        await asyncio.gather(bulk_write(), bulk_write(), clear())
+
+        stats = driver.pool_stats()
+        assert stats["sessions"] == 3
+        assert stats["queries"] == 0
+        assert stats["peak_in_flight"] == 1
+        assert stats["waited"] == 2
+        assert stats["in_flight"] == 0
+
+
+class TestSchemaMigration:
+    """Test version-gated index building."""
+
+    @pytest.fixture
+    def migrating_client(self, client):
+        """Client whose Graphiti index building is mocked."""
+        client.graphiti.build_indices_and_constraints = AsyncMock()
+        return client
+
+    @pytest.mark.asyncio
+    async def test_skips_when_current(self, migrating_client):
+        """A current schema version skips index building."""
+        from agent.graph_utils import get_graph_schema_version
+
+        migrating_client.graphiti.driver.execute_query.return_value = (
+            [{"version": get_graph_schema_version()}], None, None
+        )
+
+        assert await migrating_client.migrate_schema() is False
+        migrating_client.graphiti.build_indices_and_constraints.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_builds_when_outdated(self, migrating_client):
+        """An old or missing version builds indices and stores the marker."""
+        migrating_client.graphiti.driver.execute_query.return_value = ([], None, None)
+
+        assert await migrating_client.migrate_schema() is True
+
+        migrating_client.graphiti.build_indices_and_constraints.assert_called_once()
+        last_query = migrating_client.graphiti.driver.execute_query.call_args.args[0]
+        assert "MERGE (s:SchemaVersion" in last_query
+
+    @pytest.mark.asyncio
+    async def test_force(self, migrating_client):
+        """Force rebuilds a current schema."""
+        from agent.graph_utils import get_graph_schema_version
+
+        migrating_client.graphiti.driver.execute_query.return_value = (
+            [{"version": get_graph_schema_version()}], None, None
+        )
+
+        assert await migrating_client.migrate_schema(force=True) is True
@@ -0,0 +1,66 @@
+"""
+Tests for latency metrics.
+"""
+
+import pytest
+
+from agent.metrics import LatencyHistogram, QueryMetrics
+
+
+class TestLatencyHistogram:
+    """Test histogram bookkeeping and percentile estimates."""
+
+    def test_empty(self):
+        """An empty histogram reports no latencies."""
+        snapshot = LatencyHistogram().snapshot()
+        assert snapshot["count"] == 0
+        assert snapshot["p95_ms"] is None
+        assert snapshot["buckets"]["le_inf"] == 0
+
+    def test_observe_and_percentiles(self):
+        """Percentiles are the upper bound of the bucket holding the quantile."""
+        histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+        for _ in range(90):
+            histogram.observe(0.005)
+        for _ in range(10):
+            histogram.observe(0.5)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 100
+        assert snapshot["p50_ms"] == 10.0
+        assert snapshot["p95_ms"] == 500.0  # capped at the observed max
+        assert snapshot["max_ms"] == 500.0
+        assert snapshot["buckets"] == {"le_10ms": 90, "le_100ms": 90, "le_1000ms": 100, "le_inf": 100}
+
+    def test_overflow_bucket(self):
+        """Observations above the last bucket report the max."""
+        histogram = LatencyHistogram(buckets=(0.01,))
+        histogram.observe(3.0)
+        assert histogram.percentile(0.99) == 3.0
+
+
+class TestQueryMetrics:
+    """Test named query timing."""
+
+    def test_time_query(self):
+        """Each named query gets its own histogram."""
+        metrics = QueryMetrics()
+        with metrics.time_query("vector_search"):
+            pass
+        with metrics.time_query("vector_search"):
+            pass
+
+        snapshot = metrics.snapshot()
+        assert snapshot["queries"]["vector_search"]["count"] == 2
+        assert snapshot["queries"]["vector_search"]["errors"] == 0
+
+    def test_time_query_counts_errors(self):
+        """Failing queries are timed and counted as errors."""
+        metrics = QueryMetrics()
+        with pytest.raises(RuntimeError):
+            with metrics.time_query("hybrid_search"):
+                raise RuntimeError("boom")
+
+        query = metrics.snapshot()["queries"]["hybrid_search"]
+        assert query["count"] == 1
+        assert query["errors"] == 1
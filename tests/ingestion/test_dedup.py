@@ -0,0 +1,146 @@
+"""
+Tests for near-duplicate chunk detection.
+"""
+
+import pytest
+
+from ingestion.chunker import DocumentChunk
+from ingestion.dedup import (
+    DeduplicationConfig,
+    MinHasher,
+    MinHashLSH,
+    ChunkDeduplicator,
+    optimal_bands,
+    is_duplicate_chunk
+)
+
+
+DISCLAIMER = (
+    "Deze informatie is met zorg samengesteld. Aan de inhoud van dit document "
+    "kunnen geen rechten worden ontleend. Raadpleeg bij twijfel altijd een "
+    "deskundige of neem contact op met de klantenservice van EVI 360."
+)
+
+ARTICLE = (
+    "Google's DeepMind has made significant breakthroughs in artificial intelligence, "
+    "particularly in protein folding prediction with AlphaFold and game-playing AI "
+    "with AlphaGo. The company continues to invest heavily in transformer architectures."
+)
+
+
+def make_chunk(content: str, index: int) -> DocumentChunk:
+    """Create a chunk for testing."""
+    return DocumentChunk(
+        content=content,
+        index=index,
+        start_char=0,
+        end_char=len(content),
+        metadata={"title": "Test Doc"}
+    )
+
+
+class TestDeduplicationConfig:
+    """Test deduplication configuration."""
+
+    def test_defaults(self):
+        """Test default configuration."""
+        config = DeduplicationConfig()
+
+        assert config.num_perm == 128
+        assert config.threshold == 0.9
+        assert config.mode == "link"
+
+    def test_invalid_threshold(self):
+        """Test invalid threshold."""
+        with pytest.raises(ValueError, match="Threshold must be between 0 and 1"):
+            DeduplicationConfig(threshold=1.5)
+
+    def test_invalid_mode(self):
+        """Test invalid mode."""
+        with pytest.raises(ValueError, match="Mode must be one of"):
+            DeduplicationConfig(mode="merge")
+
+
+class TestMinHasher:
+    """Test MinHash signatures."""
+
+    def test_identical_text(self):
+        """Identical text has identical signatures."""
+        hasher = MinHasher()
+
+        assert hasher.similarity(hasher.signature(ARTICLE), hasher.signature(ARTICLE)) == 1.0
+
+    def test_normalization(self):
+        """Case and whitespace differences are ignored."""
+        hasher = MinHasher()
+        variant = "  " + ARTICLE.upper().replace(" ", "\n  ")
+
+        assert hasher.similarity(hasher.signature(ARTICLE), hasher.signature(variant)) == 1.0
+
+    def test_unrelated_text(self):
+        """Unrelated text has low similarity."""
+        hasher = MinHasher()
+
+        assert hasher.similarity(hasher.signature(ARTICLE), hasher.signature(DISCLAIMER)) < 0.2
+
+    def test_short_text(self):
+        """Text shorter than a shingle still gets a signature."""
+        hasher = MinHasher(shingle_size=5)
+
+        assert hasher.shingles("Only three words") == ["only three words"]
+        assert len(hasher.signature("Only three words")) == 128
+
+
+class TestMinHashLSH:
+    """Test LSH index."""
+
+    def test_optimal_bands(self):
+        """Band split fits in the signature and crosses below the threshold."""
+        bands, rows = optimal_bands(128, 0.9)
+
+        assert bands * rows <= 128
+        assert (1.0 / bands) ** (1.0 / rows) <= 0.9
+
+    def test_find_duplicate(self):
+        """Indexed near-duplicates are found, unrelated text is not."""
+        hasher = MinHasher()
+        index = MinHashLSH(threshold=0.8)
+        index.insert("disclaimer", hasher.signature(DISCLAIMER))
+
+        match = index.find_duplicate(hasher.signature(DISCLAIMER + " Versie 2."))
+
+        assert match is not None
+        assert match[0] == "disclaimer"
+        assert index.find_duplicate(hasher.signature(ARTICLE)) is None
+
+
+class TestChunkDeduplicator:
+    """Test chunk deduplication."""
+
+    def test_link_mode_within_document(self):
+        """Duplicates are kept and linked to the first occurrence."""
+        deduplicator = ChunkDeduplicator()
+        chunks = [make_chunk(ARTICLE, 0), make_chunk(DISCLAIMER, 1), make_chunk(DISCLAIMER, 2)]
+
+        result = deduplicator.deduplicate(chunks, "doc1.md")
+
+        assert len(result) == 3
+        assert not is_duplicate_chunk(result[1])
+        assert is_duplicate_chunk(result[2])
+        assert result[2].metadata["duplicate_of"]["source"] == "doc1.md"
+        assert result[2].metadata["duplicate_of"]["chunk_index"] == 1
+        assert result[2].metadata["title"] == "Test Doc"
+
+    def test_drop_mode_across_documents(self):
+        """Duplicates of chunks from earlier documents are dropped."""
+        deduplicator = ChunkDeduplicator(DeduplicationConfig(mode="drop"))
+
+        first = deduplicator.deduplicate([make_chunk(DISCLAIMER, 0)], "doc1.md")
+        second = deduplicator.deduplicate(
+            [make_chunk(ARTICLE, 0), make_chunk(DISCLAIMER, 1)],
+            "doc2.md"
+        )
+
+        assert len(first) == 1
+        assert [chunk.index for chunk in second] == [0]
+        assert len(deduplicator.index) == 2
@@ -0,0 +1,123 @@
+"""
+Tests for dictionary entity matching.
+"""
+
+import json
+import pytest
+
+from ingestion.entity_matcher import (
+    AhoCorasickAutomaton,
+    EntityMatcher,
+    load_entity_dictionaries
+)
+
+
+class TestAhoCorasickAutomaton:
+    """Test the multi-pattern automaton."""
+
+    def test_overlapping_patterns(self):
+        """Patterns sharing suffixes are all reported."""
+        automaton = AhoCorasickAutomaton()
+        for pattern in ["he", "she", "his", "hers"]:
+            automaton.add(pattern, pattern)
+
+        matches = sorted((start, value) for start, _, value in automaton.iter_matches("ushers"))
+
+        assert matches == [(1, "she"), (2, "he"), (2, "hers")]
+
+    def test_no_match(self):
+        """Text without patterns yields nothing."""
+        automaton = AhoCorasickAutomaton()
+        automaton.add("neo4j", "neo4j")
+
+        assert list(automaton.iter_matches("postgres only")) == []
+
+
+class TestEntityMatcher:
+    """Test entity matching over dictionaries."""
+
+    @pytest.fixture
+    def matcher(self):
+        """Matcher with the built-in dictionaries."""
+        return EntityMatcher()
+
+    def test_all_types_single_pass(self, matcher):
+        """All entity types are found in one call."""
+        text = "Sam Altman said OpenAI and Microsoft train a large language model in San Francisco."
+
+        entities = matcher.find_entities(text)
+
+        assert entities["people"] == ["Sam Altman"]
+        assert entities["companies"] == ["OpenAI", "Microsoft"]
+        assert entities["technologies"] == ["large language model"]
+        assert entities["locations"] == ["San Francisco"]
+
+    def test_word_boundaries(self, matcher):
+        """Terms inside longer words are not matched."""
+        entities = matcher.find_entities("The chairman said the metadata was fine.")
+
+        assert entities["technologies"] == []
+        assert entities["companies"] == []
+
+    def test_case_sensitivity(self, matcher):
+        """Companies ignore case, people require exact spelling."""
+        entities = matcher.find_entities("openai hired tim cook")
+
+        assert entities["companies"] == ["OpenAI"]
+        assert entities["people"] == []
+
+    def test_distinct_terms(self, matcher):
+        """Repeated mentions are reported once."""
+        entities = matcher.find_entities("Google, google and GOOGLE", ["companies"])
+
+        assert entities == {"companies": ["Google"]}
+
+    def test_offsets_survive_unicode_folding(self, matcher):
+        """Characters that lowercase to several code points keep offsets aligned."""
+        entities = matcher.find_entities("İstanbul office of Tesla")
+
+        assert entities["companies"] == ["Tesla"]
+
+    def test_custom_dictionaries(self):
+        """Plain term lists default to case-insensitive matching."""
+        matcher = EntityMatcher({"products": ["Pro-Tec helm", "veiligheidsschoen"]})
+
+        entities = matcher.find_entities("Draag een pro-tec HELM en een veiligheidsschoen.")
+
+        assert entities == {"products": ["Pro-Tec helm", "veiligheidsschoen"]}
+
+
+class TestLoadEntityDictionaries:
+    """Test dictionary loading."""
+
+    def test_defaults(self, monkeypatch):
+        """Without a file the built-in dictionaries are used."""
+        monkeypatch.delenv("ENTITY_DICTIONARIES_PATH", raising=False)
+
+        dictionaries = load_entity_dictionaries()
+
+        assert set(dictionaries) == {"companies", "technologies", "people", "locations"}
+        assert dictionaries["people"]["case_sensitive"] is True
+
+    def test_file_override(self, tmp_path, monkeypatch):
+        """Types in the file replace the built-in ones and new types are added."""
+        path = tmp_path / "entities.json"
+        path.write_text(json.dumps({
+            "companies": ["EVI"],
+            "regulations": {"terms": ["ARBO"], "case_sensitive": True}
+        }))
+        monkeypatch.setenv("ENTITY_DICTIONARIES_PATH", str(path))
+
+        dictionaries = load_entity_dictionaries()
+
+        assert dictionaries["companies"]["terms"] == ["EVI"]
+        assert dictionaries["regulations"] == {"case_sensitive": True, "terms": ["ARBO"]}
+        assert "Seattle" in dictionaries["locations"]["terms"]
+
+    def test_invalid_file(self, tmp_path):
+        """A non-object JSON file is rejected."""
+        path = tmp_path / "entities.json"
+        path.write_text(json.dumps(["EVI"]))
+
+        with pytest.raises(ValueError):
+            load_entity_dictionaries(str(path))
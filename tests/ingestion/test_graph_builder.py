@@ -0,0 +1,276 @@
+"""
+Tests for knowledge graph building.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from ingestion.chunker import DocumentChunk
+from ingestion.entity_matcher import EntityMatcher
+from ingestion.graph_builder import GraphBuilder, RateLimiter
+
+
+def make_chunks(count: int):
+    """Create chunks for testing."""
+    return [
+        DocumentChunk(
+            content=f"Chunk {i} mentions OpenAI and Microsoft.",
+            index=i,
+            start_char=0,
+            end_char=40,
+            metadata={}
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def graph_builder():
+    """Graph builder with a mocked Graphiti client."""
+    builder = GraphBuilder(max_concurrency=3, episodes_per_second=0)
+    builder.graph_client = AsyncMock()
+    builder.graph_client.get_existing_episode_names.return_value = set()
+    builder._initialized = True
+    return builder
+
+
+class TestClose:
+    """Test releasing the shared graph client."""
+
+    @pytest.mark.asyncio
+    async def test_close_keeps_shared_client_open(self, graph_builder):
+        """Closing one builder leaves the process-wide client to close_graph()."""
+        await graph_builder.close()
+
+        graph_builder.graph_client.close.assert_not_called()
+        assert not graph_builder._initialized
+
+
+class TestRateLimiter:
+    """Test submission rate limiting."""
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        """A zero rate never waits."""
+        limiter = RateLimiter(0)
+
+        assert limiter.interval == 0.0
+        await limiter.acquire()
+
+    @pytest.mark.asyncio
+    async def test_spacing(self):
+        """Acquisitions are spaced by the interval."""
+        limiter = RateLimiter(50)
+        loop = asyncio.get_running_loop()
+
+        start = loop.time()
+        for _ in range(3):
+            await limiter.acquire()
+
+        assert loop.time() - start >= 2 * limiter.interval * 0.9
+
+
+class TestAddDocumentToGraph:
+    """Test episode submission."""
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency(self, graph_builder):
+        """No more than max_concurrency episodes are in flight."""
+        in_flight = 0
+        peak = 0
+
+        async def add_episode(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        graph_builder.graph_client.add_episode.side_effect = add_episode
+
+        result = await graph_builder.add_document_to_graph(
+            chunks=make_chunks(10),
+            document_title="Test Doc",
+            document_source="test.md"
+        )
+
+        assert result["episodes_created"] == 10
+        assert result["errors"] == []
+        assert 1 < peak <= 3
+
+    @pytest.mark.asyncio
+    async def test_errors_collected(self, graph_builder):
+        """A failing episode does not stop the others."""
+        async def add_episode(**kwargs):
+            if kwargs["metadata"]["chunk_index"] == 1:
+                raise RuntimeError("LLM timeout")
+
+        graph_builder.graph_client.add_episode.side_effect = add_episode
+
+        result = await graph_builder.add_document_to_graph(
+            chunks=make_chunks(3),
+            document_title="Test Doc",
+            document_source="test.md"
+        )
+
+        assert result["episodes_created"] == 2
+        assert len(result["errors"]) == 1
+        assert "chunk 1" in result["errors"][0]
+
+    @pytest.mark.asyncio
+    async def test_bulk_batches(self, graph_builder):
+        """Bulk mode submits episodes in batches of bulk_size."""
+        graph_builder.use_bulk = True
+        graph_builder.bulk_size = 4
+
+        result = await graph_builder.add_document_to_graph(
+            chunks=make_chunks(10),
+            document_title="Test Doc",
+            document_source="test.md"
+        )
+
+        batch_sizes = sorted(
+            len(call.args[0]) for call in graph_builder.graph_client.add_episodes_bulk.call_args_list
+        )
+        assert batch_sizes == [2, 4, 4]
+        assert result["episodes_created"] == 10
+        graph_builder.graph_client.add_episode.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_bulk_batch_failure(self, graph_builder):
+        """A failed bulk batch reports an error for each of its chunks."""
+        graph_builder.use_bulk = True
+        graph_builder.bulk_size = 5
+        graph_builder.graph_client.add_episodes_bulk.side_effect = RuntimeError("Neo4j unavailable")
+
+        result = await graph_builder.add_document_to_graph(
+            chunks=make_chunks(5),
+            document_title="Test Doc",
+            document_source="test.md"
+        )
+
+        assert result["episodes_created"] == 0
+        assert len(result["errors"]) == 5
+
+    @pytest.mark.asyncio
+    async def test_empty_chunks(self, graph_builder):
+        """No chunks means no episodes."""
+        result = await graph_builder.add_document_to_graph(
+            chunks=[],
+            document_title="Test Doc",
+            document_source="test.md"
+        )
+
+        assert result["episodes_created"] == 0
+        graph_builder.graph_client.add_episode.assert_not_called()
+
+
+class TestEpisodeIds:
+    """Test deterministic episode ids and skipping existing episodes."""
+
+    def test_deterministic(self, graph_builder):
+        """The same chunk always gets the same id; changed content gets a new one."""
+        chunk = make_chunks(1)[0]
+        first = graph_builder._build_episode(chunk, "Test Doc", "test.md")
+        second = graph_builder._build_episode(chunk, "Test Doc", "test.md")
+
+        chunk.content += " Updated."
+        changed = graph_builder._build_episode(chunk, "Test Doc", "test.md")
+
+        assert first["episode_id"] == second["episode_id"]
+        assert first["episode_id"].startswith("test.md_")
+        assert changed["episode_id"] != first["episode_id"]
+
+    @pytest.mark.asyncio
+    async def test_skip_existing(self, graph_builder):
+        """Episodes already in the graph are not resubmitted."""
+        chunks = make_chunks(3)
+        existing_id = graph_builder._build_episode(chunks[1], "Test Doc", "test.md")["episode_id"]
+        graph_builder.graph_client.get_existing_episode_names.return_value = {existing_id}
+
+        result = await graph_builder.add_document_to_graph(
+            chunks=chunks,
+            document_title="Test Doc",
+            document_source="test.md"
+        )
+
+        submitted = [call.kwargs["episode_id"] for call in graph_builder.graph_client.add_episode.call_args_list]
+        assert result["episodes_created"] == 2
+        assert result["episodes_skipped"] == 1
+        assert existing_id not in submitted
+
+    @pytest.mark.asyncio
+    async def test_lookup_failure_submits_all(self, graph_builder):
+        """A failed existence check falls back to submitting every episode."""
+        graph_builder.graph_client.get_existing_episode_names.side_effect = RuntimeError("Neo4j unavailable")
+
+        result = await graph_builder.add_document_to_graph(
+            chunks=make_chunks(3),
+            document_title="Test Doc",
+            document_source="test.md"
+        )
+
+        assert result["episodes_created"] == 3
+        assert result["episodes_skipped"] == 0
+
+    @pytest.mark.asyncio
+    async def test_identical_chunks_submitted_once(self, graph_builder):
+        """Chunks with identical content share one episode."""
+        chunks = make_chunks(2)
+        chunks[1].content = chunks[0].content
+
+        result = await graph_builder.add_document_to_graph(
+            chunks=chunks,
+            document_title="Test Doc",
+            document_source="test.md",
+            skip_existing=False
+        )
+
+        assert graph_builder.graph_client.add_episode.call_count == 1
+        assert result["episodes_skipped"] == 1
+        graph_builder.graph_client.get_existing_episode_names.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_process_episodes(self, graph_builder):
+        """Queued episodes are filtered against the graph and failures keyed by id."""
+        episodes = graph_builder.build_episodes(make_chunks(3), "Test Doc", "test.md")
+        graph_builder.graph_client.get_existing_episode_names.return_value = {episodes[0]["episode_id"]}
+
+        async def add_episode(**kwargs):
+            if kwargs["episode_id"] == episodes[2]["episode_id"]:
+                raise RuntimeError("LLM timeout")
+
+        graph_builder.graph_client.add_episode.side_effect = add_episode
+
+        result = await graph_builder.process_episodes(episodes)
+
+        assert result["episodes_created"] == 1
+        assert result["skipped_ids"] == [episodes[0]["episode_id"]]
+        assert result["failed"] == {episodes[2]["episode_id"]: "LLM timeout"}
+
+
+class TestExtractEntities:
+    """Test dictionary entity extraction on chunks."""
+
+    @pytest.mark.asyncio
+    async def test_custom_types_extracted(self):
+        """Dictionary types are added to the built-in keys; disabled built-ins stay empty."""
+        matcher = EntityMatcher({
+            "companies": ["Microsoft"],
+            "technologies": ["OpenAI"],
+            "regulations": {"terms": ["ARBO"], "case_sensitive": True}
+        })
+        builder = GraphBuilder(episodes_per_second=0, entity_matcher=matcher)
+        chunk = make_chunks(1)[0]
+        chunk.content = "OpenAI and Microsoft follow the ARBO rules."
+
+        enriched = await builder.extract_entities_from_chunks([chunk], extract_technologies=False)
+
+        assert enriched[0].metadata["entities"] == {
+            "companies": ["Microsoft"],
+            "technologies": [],
+            "people": [],
+            "locations": [],
+            "regulations": ["ARBO"]
+        }
@@ -0,0 +1,193 @@
+"""
+Tests for the graph job queue and worker.
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from ingestion.graph_queue import GraphJobQueue
+from ingestion.graph_worker import GraphWorker
+
+
+def make_jobs(count: int, attempts: int = 1):
+    """Create leased jobs for testing."""
+    return [
+        {
+            "job_id": f"job-{i}",
+            "episode_id": f"test.md_{i:016x}",
+            "content": f"Chunk {i}",
+            "source": f"Document: Test Doc (Chunk: {i})",
+            "metadata": {"chunk_index": i},
+            "chunk_index": i,
+            "attempts": attempts
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def mock_conn():
+    """Patch the database pool with a mocked connection."""
+    with patch('ingestion.graph_queue.db_pool') as mock_pool:
+        conn = AsyncMock()
+        mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+        mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        yield conn
+
+
+class TestGraphJobQueue:
+    """Test queue operations."""
+
+    @pytest.mark.asyncio
+    async def test_enqueue(self, mock_conn):
+        """Episodes are inserted in one statement, ignoring queued ids."""
+        mock_conn.fetch.return_value = [{"id": "job-0"}]
+        episodes = [
+            {"episode_id": "a", "content": "A", "source": "s", "metadata": {"document_title": "T"}, "chunk_index": 0},
+            {"episode_id": "b", "content": "B", "source": "s", "metadata": {}, "chunk_index": 1}
+        ]
+
+        queued = await GraphJobQueue().enqueue("doc-1", episodes)
+
+        query, document_id, ids, _, _, metadata = mock_conn.fetch.call_args.args
+        assert queued == 1
+        assert "ON CONFLICT (episode_id) DO NOTHING" in query
+        assert document_id == "doc-1"
+        assert ids == ["a", "b"]
+        assert metadata[0] == {"document_title": "T", "chunk_index": 0}
+
+    @pytest.mark.asyncio
+    async def test_lease(self, mock_conn):
+        """Leasing skips locked rows and returns episodes."""
+        mock_conn.fetch.return_value = [{
+            "id": "job-0",
+            "episode_id": "a",
+            "content": "A",
+            "source": "s",
+            "metadata": '{"chunk_index": 3}',
+            "attempts": 1
+        }]
+
+        jobs = await GraphJobQueue(lease_seconds=60).lease("worker-1", 10)
+
+        query = mock_conn.fetch.call_args.args[0]
+        assert "FOR UPDATE SKIP LOCKED" in query
+        assert mock_conn.fetch.call_args.args[1:] == ("worker-1", 10, 60.0)
+        assert jobs[0]["chunk_index"] == 3
+        assert jobs[0]["job_id"] == "job-0"
+
+    @pytest.mark.asyncio
+    async def test_fail_retries_then_gives_up(self, mock_conn):
+        """Failed jobs return to pending until max_attempts is reached."""
+        mock_conn.execute.return_value = "UPDATE 1"
+        queue = GraphJobQueue(max_attempts=3, retry_delay_seconds=10)
+
+        await queue.fail("worker-1", make_jobs(1, attempts=2)[0], "timeout")
+        assert mock_conn.execute.call_args.args[2:] == ("pending", "timeout", 40.0, "worker-1")
+
+        await queue.fail("worker-1", make_jobs(1, attempts=3)[0], "timeout")
+        assert mock_conn.execute.call_args.args[2] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_stale_lease_is_ignored(self, mock_conn):
+        """A worker whose lease expired cannot complete or fail the re-leased job."""
+        queue = GraphJobQueue()
+        jobs = make_jobs(2)
+        # job-1 was re-leased by another worker after this worker's lease expired
+        mock_conn.execute.return_value = "UPDATE 1"
+
+        completed = await queue.complete("worker-1", ["job-0", "job-1"])
+
+        query, job_ids, worker_id = mock_conn.execute.call_args.args
+        assert "status = 'running'" in query
+        assert "locked_by = $2" in query
+        assert (job_ids, worker_id) == (["job-0", "job-1"], "worker-1")
+        assert completed == 1
+
+        mock_conn.execute.return_value = "UPDATE 0"
+        with patch('ingestion.graph_queue.logger') as mock_logger:
+            await queue.fail("worker-1", jobs[1], "timeout")
+
+        query = mock_conn.execute.call_args.args[0]
+        assert "status = 'running'" in query
+        assert "locked_by = $5" in query
+        mock_logger.warning.assert_called_once()
+        mock_logger.error.assert_not_called()
+
+
+class TestGraphWorker:
+    """Test draining the queue."""
+
+    @pytest.fixture
+    def worker(self):
+        """Worker with mocked queue and graph builder."""
+        queue = AsyncMock()
+        builder = AsyncMock()
+        return GraphWorker(queue=queue, graph_builder=builder, concurrency=2, poll_interval=0)
+
+    @pytest.mark.asyncio
+    async def test_process_batch(self, worker):
+        """Successful and skipped jobs complete; failed ones are recorded."""
+        jobs = make_jobs(3)
+        worker.queue.lease.return_value = jobs
+        worker.graph_builder.process_episodes.return_value = {
+            "episodes_created": 1,
+            "skipped_ids": [jobs[0]["episode_id"]],
+            "failed": {jobs[2]["episode_id"]: "LLM timeout"}
+        }
+
+        counts = await worker.process_batch()
+
+        assert counts == {"leased": 3, "created": 1, "skipped": 1, "failed": 1}
+        worker.queue.complete.assert_called_once_with(worker.worker_id, ["job-0", "job-1"])
+        worker.queue.fail.assert_called_once_with(worker.worker_id, jobs[2], "LLM timeout")
+        worker.graph_builder.process_episodes.assert_called_once_with(jobs, max_concurrency=2)
+
+    @pytest.mark.asyncio
+    async def test_run_drain(self, worker):
+        """Drain mode stops once the queue is empty."""
+        jobs = make_jobs(2)
+        worker.queue.lease.side_effect = [jobs, []]
+        worker.graph_builder.process_episodes.return_value = {
+            "episodes_created": 2,
+            "skipped_ids": [],
+            "failed": {}
+        }
+
+        totals = await worker.run(drain=True)
+
+        assert totals == {"leased": 2, "created": 2, "skipped": 0, "failed": 0}
+        assert worker.queue.lease.call_count == 2
+        assert worker.batch_size == 8
+
+    @pytest.mark.asyncio
+    async def test_run_survives_failed_round(self, worker):
+        """A transient error in one round is logged and the worker keeps going."""
+        jobs = make_jobs(2)
+        worker.queue.lease.side_effect = [ConnectionResetError("connection lost"), jobs, []]
+        worker.graph_builder.process_episodes.return_value = {
+            "episodes_created": 2,
+            "skipped_ids": [],
+            "failed": {}
+        }
+
+        with patch('ingestion.graph_worker.logger') as mock_logger:
+            totals = await worker.run(drain=True)
+
+        assert totals == {"leased": 2, "created": 2, "skipped": 0, "failed": 0}
+        assert worker.queue.lease.call_count == 3
+        mock_logger.exception.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_run_backs_off_on_repeated_errors(self, worker):
+        """Waits double after each consecutive failure, up to max_backoff."""
+        worker.poll_interval = 1.0
+        worker.max_backoff = 3.0
+        worker.queue.lease.side_effect = [RuntimeError("down")] * 3 + [[]]
+
+        with patch('ingestion.graph_worker.asyncio.sleep', new=AsyncMock()) as mock_sleep, \
+             patch('ingestion.graph_worker.logger'):
+            await worker.run(drain=True)
+
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [1.0, 2.0, 3.0]
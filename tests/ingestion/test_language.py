@@ -0,0 +1,59 @@
+"""
+Tests for document language detection.
+"""
+
+import os
+import pytest
+from unittest.mock import patch
+
+from ingestion.language import (
+    detect_fts_config,
+    fts_config_for_language,
+    resolve_fts_config
+)
+
+
+class TestDetectFtsConfig:
+    """Test stopword-based language detection."""
+
+    def test_detects_dutch(self):
+        """Dutch guideline text is stemmed as Dutch."""
+        text = "Het dragen van een veiligheidshelm is verplicht op de bouwplaats en moet worden gecontroleerd."
+        assert detect_fts_config(text) == "dutch"
+
+    def test_detects_english(self):
+        """English articles are stemmed as English."""
+        text = "Apple's artificial intelligence initiative faces delays that have forced the company to disable features."
+        assert detect_fts_config(text) == "english"
+
+    def test_undetectable_uses_default(self):
+        """Text without stopwords falls back to FTS_DEFAULT_CONFIG."""
+        with patch.dict(os.environ, {"FTS_DEFAULT_CONFIG": "english"}):
+            assert detect_fts_config("ISO 45001 CE 2024") == "english"
+        with patch.dict(os.environ, {"FTS_DEFAULT_CONFIG": "dutch"}):
+            assert detect_fts_config("") == "dutch"
+
+
+class TestResolveFtsConfig:
+    """Test frontmatter language overrides."""
+
+    @pytest.mark.parametrize("language,expected", [
+        ("nl", "dutch"),
+        ("EN", "english"),
+        ("English", "english"),
+        ("fr", None),
+        (None, None)
+    ])
+    def test_language_aliases(self, language, expected):
+        """Language tags map to supported configurations."""
+        assert fts_config_for_language(language) == expected
+
+    def test_metadata_language_wins(self):
+        """A declared language overrides detection."""
+        text = "The quick brown fox and the lazy dog are in the garden."
+        assert resolve_fts_config(text, {"language": "nl"}) == "dutch"
+
+    def test_unsupported_language_detects(self):
+        """Unsupported declared languages fall back to detection."""
+        text = "The quick brown fox and the lazy dog are in the garden."
+        assert resolve_fts_config(text, {"language": "fr"}) == "english"